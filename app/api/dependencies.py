@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import os
+import time
+
+from fastapi import Request, Response
+
+from app.db.session import async_read_session
+
+
+# GETs go to a read replica unless the caller wrote within READ_AFTER_WRITE_SECONDS.
+READ_AFTER_WRITE_SECONDS = float(os.getenv("REPLICA_READ_AFTER_WRITE_SECONDS", "5"))
+LAST_WRITE_COOKIE = "tradex_last_write"
+LAST_WRITE_HEADER = "X-Last-Write"
+
+
+def mark_write(response: Response) -> None:
+    # Pins the caller's reads to the primary until replicas have had time to catch up.
+    stamp = f"{time.time():.3f}"
+    response.set_cookie(LAST_WRITE_COOKIE, stamp, max_age=max(1, int(READ_AFTER_WRITE_SECONDS + 0.999)), httponly=True)
+    response.headers[LAST_WRITE_HEADER] = stamp
+
+
+def _wrote_recently(request: Request) -> bool:
+    stamp = request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE)
+    if not stamp:
+        return False
+    try:
+        return time.time() - float(stamp) < READ_AFTER_WRITE_SECONDS
+    except ValueError:
+        return False
+
+
+async def get_async_read_db(request: Request):
+    async with async_read_session(primary=_wrote_recently(request)) as db:
+        yield db
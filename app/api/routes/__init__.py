@@ -1,3 +1,5 @@
 from app.api.routes.analysis import router as analysis_router
+from app.api.routes.leaderboard import router as leaderboard_router
+from app.api.routes.screener import router as screener_router
 
-__all__ = ["analysis_router"]
+__all__ = ["analysis_router", "leaderboard_router", "screener_router"]
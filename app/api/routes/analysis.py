@@ -1,171 +1,611 @@
 from __future__ import annotations
 
+import base64
+import hashlib
+import json
 import os
-from datetime import UTC, datetime
-from uuid import uuid4
+import time
+from datetime import UTC, date, datetime, timedelta
+from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+from redis.exceptions import RedisError
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
 
-from app.db.session import get_db
+from app.api.dependencies import get_async_read_db, mark_write
+from app.api.responses import ORJSONResponse
+from app.db.session import AsyncSessionLocal, get_async_db, run_write
 from app.models.analysis import Analysis
 from app.models.analysis_result import AnalysisResult
-from app.models.thread import Thread
-from app.models.user import User
+from app.models.archived_analysis import ArchivedAnalysis
+from app.models.fundamental_score_period import FundamentalScorePeriod
+from app.models.score_history import ScoreHistory
 from app.services.alpha_vantage_service import AlphaVantageService
 from app.services.analysis_orchestrator import AnalysisOrchestrator
-from app.tasks.llm_tasks import generate_llm_analysis
+from app.services.analysis_writer import AnalysisWriter, get_analysis_writer
+from app.services.fundamental_history import fundamental_period_values, upsert_fundamental_periods
+from app.services.llm_stream import NARRATION_COLUMNS, NarrationBroker, get_narration_broker
+from app.services.narration_cache import NarrationCache, get_narration_cache
+from app.services.reweighting import ScoreReweighter
+from app.services.score_history import choose_interval, downsample
+from app.services.snapshot_archive import get_snapshot_archive
+from app.tasks.analysis_tasks import dispatch_watchlist_analysis, watchlist_job_status
+from app.utils import fast_json
+from app.utils.cache import RedisCache, get_redis_cache
 from app.utils.logger import get_logger
 
 
-router = APIRouter(prefix="/analysis", tags=["analysis"])
+router = APIRouter(prefix="/analysis", tags=["analysis"], default_response_class=ORJSONResponse)
 logger = get_logger(__name__)
 
+# llm_status values after which a stored analysis never changes again (None: LLM not requested).
+FINAL_LLM_STATUSES = {None, "completed", "failed"}
+SNAPSHOT_SECTIONS = ("fundamental", "technical")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("ANALYSIS_RESPONSE_CACHE_TTL", "86400"))
+NARRATION_STREAM_TIMEOUT_SECONDS = float(os.getenv("LLM_STREAM_TIMEOUT_SECONDS", "600"))
 
-def _get_or_create_system_user(db: Session) -> User:
-    user = db.query(User).filter(User.email == "system@local").first()
-    if user:
-        return user
-    user = User(email="system@local", hashed_password="", is_active=True)
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    return user
 
+class WeightVector(BaseModel):
+    blend: dict[str, float] | None = None
+    fundamental_categories: dict[str, float] | None = None
+    technical_categories: dict[str, float] | None = None
+    fundamental_metrics: dict[str, float] | None = None
+    technical_indicators: dict[str, float] | None = None
 
-def _get_or_create_thread(db: Session, thread_id: str | None) -> Thread:
-    if thread_id:
-        thread = db.query(Thread).filter(Thread.id == thread_id).first()
-        if thread:
-            return thread
-    user = _get_or_create_system_user(db)
-    now = datetime.now(UTC)
-    thread = Thread(id=str(uuid4()), user_id=user.id, title=None, created_at=now, updated_at=now)
-    db.add(thread)
-    db.commit()
-    db.refresh(thread)
-    return thread
+
+class ReweightRequest(BaseModel):
+    weights: WeightVector | None = None
+    grid: list[WeightVector] | None = Field(default=None, max_length=10000)
+
+
+class WatchlistRequest(BaseModel):
+    symbols: list[str] = Field(min_length=1, max_length=50)
+    selected_fundamentals: list[str] | None = None
+    selected_technicals: list[str] | None = None
+    thread_id: str | None = None
+    fundamental_basis: Literal["annual", "ttm"] = "annual"
+
+
+async def _load_result(db: AsyncSession, analysis_id: str) -> AnalysisResult:
+    result = (
+        await db.scalars(
+            select(AnalysisResult)
+            .options(joinedload(AnalysisResult.fundamental_blob), joinedload(AnalysisResult.technical_blob))
+            .where(AnalysisResult.analysis_id == analysis_id)
+            .limit(1)
+        )
+    ).first()
+    if result:
+        return result
+
+    # Expired snapshots live in the Parquet archive behind a pointer row.
+    pointer = await db.get(ArchivedAnalysis, analysis_id)
+    if pointer is not None:
+        result = await run_in_threadpool(get_snapshot_archive().read, pointer)
+    if not result:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    return result
+
+
+def _serialize_result(result: AnalysisResult) -> dict:
+    return {
+        "fundamental": result.fundamental,
+        "technical": result.technical,
+        "combined": result.combined_json,
+        "llm_status": result.llm_status,
+        "llm_summary": result.llm_summary,
+        "llm_bull_case": result.llm_bull_case,
+        "llm_bear_case": result.llm_bear_case,
+        "llm_risk_assessment": result.llm_risk_assessment,
+        "llm_confidence": result.llm_confidence,
+        "llm_model": result.llm_model,
+        # Template and streaming rows already have text; the narration is ready once it is final.
+        "llm_ready": result.llm_summary is not None and result.llm_status in FINAL_LLM_STATUSES,
+    }
+
+
+def _parse_fields(fields: str | None) -> tuple[list[str], list[str]]:
+    # "a,b.c" keeps only those paths; "-name" drops a key at the top level and inside each snapshot.
+    include, exclude = set(), set()
+    for token in (fields or "").split(","):
+        token = token.strip()
+        if token.startswith("-"):
+            exclude.add(token[1:])
+        elif token:
+            include.add(token)
+    return sorted(include), sorted(exclude)
+
+
+def _project(payload: dict, include: list[str], exclude: list[str]) -> dict:
+    if include:
+        projected: dict = {}
+        for path in include:
+            head, _, rest = path.partition(".")
+            if head not in payload:
+                raise HTTPException(status_code=400, detail=f"Unknown field: {path}")
+            if not rest:
+                projected[head] = payload[head]
+            elif isinstance(payload[head], dict) and rest in payload[head]:
+                section = projected.setdefault(head, {})
+                if isinstance(section, dict):
+                    section[rest] = payload[head][rest]
+        payload = projected
+    else:
+        payload = dict(payload)
+
+    for path in exclude:
+        head, _, rest = path.partition(".")
+        if rest:
+            if isinstance(payload.get(head), dict):
+                payload[head] = {k: v for k, v in payload[head].items() if k != rest}
+            continue
+        payload.pop(head, None)
+        for section in SNAPSHOT_SECTIONS:
+            if isinstance(payload.get(section), dict):
+                payload[section] = {k: v for k, v in payload[section].items() if k != head}
+    return payload
+
+
+def _response_cache_key(analysis_id: str, include: list[str], exclude: list[str]) -> str:
+    projection = ",".join(include + [f"-{path}" for path in exclude])
+    digest = hashlib.sha256(projection.encode("utf-8")).hexdigest()[:12] if projection else "all"
+    return f"analysis:response:{analysis_id}:{digest}"
+
+
+async def _cache_get(cache: RedisCache, key: str) -> bytes | None:
+    try:
+        return await run_in_threadpool(cache.get_bytes, key)
+    except RedisError:
+        logger.warning("Response cache read failed | key=%s", key, exc_info=True)
+        return None
+
+
+async def _cache_set(cache: RedisCache, key: str, value: bytes) -> None:
+    try:
+        await run_in_threadpool(cache.set_bytes, key, value, RESPONSE_CACHE_TTL_SECONDS)
+    except RedisError:
+        logger.warning("Response cache write failed | key=%s", key, exc_info=True)
+
+
+def _conditional_response(body: bytes, etag: str, cache_control: str, if_none_match: str | None) -> Response:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if if_none_match:
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if "*" in candidates or etag in candidates:
+            return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _encode_cursor(analysis: Analysis) -> str:
+    payload = json.dumps([analysis.created_at.isoformat(), analysis.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        created_at, analysis_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(created_at), str(analysis_id)
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+
+
+async def _list_analyses(db: AsyncSession, column: str, value: str, cursor: str | None, limit: int) -> dict:
+    query = (
+        select(Analysis)
+        .options(
+            selectinload(Analysis.result).load_only(
+                AnalysisResult.analysis_id,
+                AnalysisResult.combined_json,
+                AnalysisResult.llm_status,
+            )
+        )
+        .where(getattr(Analysis, column) == value)
+    )
+    archived_query = select(ArchivedAnalysis).where(getattr(ArchivedAnalysis, column) == value)
+    if cursor:
+        created_at, analysis_id = _decode_cursor(cursor)
+        query = query.where(tuple_(Analysis.created_at, Analysis.id) < (created_at, analysis_id))
+        archived_query = archived_query.where(
+            tuple_(ArchivedAnalysis.created_at, ArchivedAnalysis.id) < (created_at, analysis_id)
+        )
+    # One extra row tells us whether another page exists without a COUNT.
+    query = query.order_by(Analysis.created_at.desc(), Analysis.id.desc()).limit(limit + 1)
+    archived_query = archived_query.order_by(ArchivedAnalysis.created_at.desc(), ArchivedAnalysis.id.desc())
+    live = (await db.scalars(query)).all()
+    archived = (await db.scalars(archived_query.limit(limit + 1))).all()
+    # Live and archived rows share the (created_at, id) keyset, so one page merges both.
+    rows = sorted([*live, *archived], key=lambda row: (row.created_at, row.id), reverse=True)[: limit + 1]
+
+    page = rows[:limit]
+    items = []
+    for row in page:
+        if isinstance(row, ArchivedAnalysis):
+            investment_bias, llm_status = row.investment_bias, row.llm_status
+        else:
+            investment_bias = ((row.result.combined_json if row.result else None) or {}).get("investment_bias")
+            llm_status = row.result.llm_status if row.result else None
+        items.append(
+            {
+                "analysis_id": row.id,
+                "thread_id": row.thread_id,
+                "symbol": row.symbol,
+                "created_at": row.created_at.isoformat(),
+                "overall_score": row.overall_score,
+                "investment_bias": investment_bias,
+                "llm_status": llm_status,
+                "archived": isinstance(row, ArchivedAnalysis),
+            }
+        )
+    next_cursor = _encode_cursor(page[-1]) if len(rows) > limit else None
+    return {"items": items, "next_cursor": next_cursor}
 
 
 @router.post("/")
-def create_analysis(
+async def create_analysis(
     symbol: str,
+    response: Response,
     selected_fundamentals: list[str] | None = None,
     selected_technicals: list[str] | None = None,
     include_llm: bool = True,
+    narrator: Literal["llm", "template"] = "llm",
     thread_id: str | None = None,
-    db: Session = Depends(get_db),
+    fundamental_basis: Literal["annual", "ttm"] = "annual",
+    db: AsyncSession = Depends(get_async_db),
+    writer: AnalysisWriter = Depends(get_analysis_writer),
 ) -> dict:
-    logger.info("POST /analysis | symbol=%s", symbol)
+    logger.info("POST /analysis | symbol=%s | basis=%s | narrator=%s", symbol, fundamental_basis, narrator)
     api_key = os.getenv("ALPHA_VANTAGE_API_KEY", "")
     if not api_key:
         logger.error("ALPHA_VANTAGE_API_KEY not configured")
         raise HTTPException(status_code=500, detail="ALPHA_VANTAGE_API_KEY not configured")
 
     try:
-        thread = _get_or_create_thread(db, thread_id)
-        analysis_id = str(uuid4())
-
-        analysis = Analysis(
-            id=analysis_id,
-            thread_id=thread.id,
-            symbol=symbol.upper(),
-            selected_fundamentals=selected_fundamentals,
-            selected_technicals=selected_technicals,
-            created_at=datetime.now(UTC),
-        )
-        db.add(analysis)
-        db.commit()
-
         alpha = AlphaVantageService(api_key=api_key)
         orchestrator = AnalysisOrchestrator(alpha_service=alpha)
 
-        result = orchestrator.analyze(
+        # The engines make blocking Alpha Vantage calls; keep them off the event loop.
+        result = await run_in_threadpool(
+            orchestrator.analyze,
             symbol=symbol,
             selected_fundamentals=selected_fundamentals,
             selected_technicals=selected_technicals,
             include_llm=False,
+            fundamental_basis=fundamental_basis,
         )
 
-        analysis_result = AnalysisResult(
-            id=str(uuid4()),
-            analysis_id=analysis_id,
-            fundamental_json=result.get("fundamental_analysis"),
-            technical_json=result.get("technical_analysis"),
-            combined_json=result.get("combined_analysis"),
-            llm_status="pending" if include_llm else None,
-        )
-
-        db.add(analysis_result)
-        db.commit()
-
+        llm_payload = None
         if include_llm:
-            logger.info("Queueing LLM from route | analysis_id=%s", analysis_id)
             llm_payload = orchestrator._build_llm_payload(
                 symbol,
                 result.get("fundamental_analysis"),
                 result.get("technical_analysis"),
                 result.get("combined_analysis"),
             )
-            generate_llm_analysis.delay(analysis_result.id, llm_payload)
+
+        # Nothing is written until the engines succeed; then everything lands in one transaction.
+        resolved_thread_id, new_thread = await db.run_sync(writer.resolve_thread, thread_id)
+        record = writer.build_record(
+            resolved_thread_id,
+            new_thread,
+            symbol,
+            selected_fundamentals,
+            selected_technicals,
+            result,
+            llm_payload,
+            template_only=narrator == "template",
+        )
+        # The writer also updates the screener and leaderboards, once the snapshot is committed.
+        await writer.save(db, record)
+        mark_write(response)
     except Exception:
         logger.exception("POST /analysis failed | symbol=%s", symbol)
         raise
 
     return {
-        "analysis_id": analysis_id,
-        "thread_id": thread.id,
+        "analysis_id": record["analysis_id"],
+        "thread_id": resolved_thread_id,
         "status": "processing",
     }
 
 
-@router.get("/{analysis_id}")
-def get_analysis(analysis_id: str, db: Session = Depends(get_db)) -> dict:
-    logger.info("GET /analysis/%s", analysis_id)
-    result = (
-        db.query(AnalysisResult)
-        .filter(AnalysisResult.analysis_id == analysis_id)
-        .first()
+@router.post("/watchlist")
+async def create_watchlist_analysis(
+    request: WatchlistRequest,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    writer: AnalysisWriter = Depends(get_analysis_writer),
+) -> dict:
+    # Analyzes several symbols in one thread on a data worker; the narration then runs a few symbols per prompt.
+    symbols = list(dict.fromkeys(symbol.upper() for symbol in request.symbols))
+    logger.info("POST /analysis/watchlist | symbols=%s", len(symbols))
+    if not os.getenv("ALPHA_VANTAGE_API_KEY", ""):
+        logger.error("ALPHA_VANTAGE_API_KEY not configured")
+        raise HTTPException(status_code=500, detail="ALPHA_VANTAGE_API_KEY not configured")
+
+    resolved_thread_id, new_thread = await db.run_sync(writer.resolve_thread, request.thread_id)
+    if new_thread:
+        # The thread exists before the job runs, so the returned id can be reused straight away.
+        await run_write(db, lambda session: writer.stage_thread(session, resolved_thread_id))
+        mark_write(response)
+    job_id = await run_in_threadpool(
+        dispatch_watchlist_analysis,
+        resolved_thread_id,
+        symbols,
+        request.selected_fundamentals,
+        request.selected_technicals,
+        request.fundamental_basis,
     )
+    return {
+        "job_id": job_id,
+        "thread_id": resolved_thread_id,
+        "symbols": symbols,
+        "status": "queued",
+    }
 
-    if not result:
-        raise HTTPException(status_code=404, detail="Analysis not found")
 
+@router.get("/watchlist/{job_id}")
+async def get_watchlist_job(job_id: str) -> dict:
+    logger.info("GET /analysis/watchlist/%s", job_id)
+    return await run_in_threadpool(watchlist_job_status, job_id)
+
+
+def _history_periods(rows: list[FundamentalScorePeriod]) -> list[dict]:
+    return [
+        {
+            "fiscal_year": row.fiscal_year,
+            "overall_score": row.overall_score,
+            "category_scores": row.category_scores,
+            "risk_level": row.risk_level,
+            "risk_score": row.risk_score,
+        }
+        for row in sorted(rows, key=lambda r: r.fiscal_year)
+    ]
+
+
+@router.get("/threads/{thread_id}")
+async def list_thread_analyses(
+    thread_id: str,
+    cursor: str | None = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_read_db),
+) -> dict:
+    logger.info("GET /analysis/threads/%s | cursor=%s", thread_id, cursor)
+    return await _list_analyses(db, "thread_id", thread_id, cursor, limit)
+
+
+@router.get("/symbols/{symbol}")
+async def list_symbol_analyses(
+    symbol: str,
+    cursor: str | None = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_read_db),
+) -> dict:
+    logger.info("GET /analysis/symbols/%s | cursor=%s", symbol, cursor)
+    return await _list_analyses(db, "symbol", symbol.upper(), cursor, limit)
+
+
+@router.get("/scores/{symbol}")
+async def get_score_history(
+    symbol: str,
+    start: date | None = None,
+    end: date | None = None,
+    days: int = Query(90, ge=1, le=3650),
+    interval: Literal["auto", "day", "week", "month"] = "auto",
+    include_categories: bool = False,
+    db: AsyncSession = Depends(get_async_read_db),
+) -> dict:
+    logger.info("GET /analysis/scores/%s | start=%s | end=%s | interval=%s", symbol, start, end, interval)
+    symbol = symbol.upper()
+    end = end or datetime.now(UTC).date()
+    start = start or end - timedelta(days=days)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if interval == "auto":
+        interval = choose_interval(start, end)
+
+    # Only the narrow score columns unless categories are asked for, so the key index covers the scan.
+    columns = [
+        ScoreHistory.as_of_date,
+        ScoreHistory.overall_score,
+        ScoreHistory.fundamental_score,
+        ScoreHistory.technical_score,
+        ScoreHistory.investment_bias,
+    ]
+    if include_categories:
+        columns += [ScoreHistory.fundamental_category_scores, ScoreHistory.technical_category_scores]
+    rows = await db.execute(
+        select(*columns)
+        .where(ScoreHistory.symbol == symbol, ScoreHistory.as_of_date.between(start, end))
+        .order_by(ScoreHistory.as_of_date)
+    )
     return {
-        "fundamental": result.fundamental_json,
-        "technical": result.technical_json,
-        "combined": result.combined_json,
-        "llm_status": result.llm_status,
-        "llm_summary": result.llm_summary,
-        "llm_bull_case": result.llm_bull_case,
-        "llm_bear_case": result.llm_bear_case,
-        "llm_risk_assessment": result.llm_risk_assessment,
-        "llm_confidence": result.llm_confidence,
-        "llm_ready": result.llm_summary is not None,
+        "symbol": symbol,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "interval": interval,
+        "points": downsample([dict(row._mapping) for row in rows], interval),
     }
 
 
-@router.get("/")
-def get_analysis_by_query(analysis_id: str, db: Session = Depends(get_db)) -> dict:
-    logger.info("GET /analysis?analysis_id=%s", analysis_id)
-    result = (
-        db.query(AnalysisResult)
-        .filter(AnalysisResult.analysis_id == analysis_id)
-        .first()
+@router.get("/narration/stats")
+async def get_narration_stats(cache: NarrationCache = Depends(get_narration_cache)) -> dict:
+    return await run_in_threadpool(cache.stats)
+
+
+@router.get("/history/{symbol}")
+async def get_fundamental_history(
+    symbol: str,
+    fundamental_basis: Literal["annual", "ttm"] = "annual",
+    refresh: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+) -> dict:
+    logger.info("GET /analysis/history/%s | basis=%s | refresh=%s", symbol, fundamental_basis, refresh)
+    symbol = symbol.upper()
+    criteria = (
+        FundamentalScorePeriod.symbol == symbol,
+        FundamentalScorePeriod.basis == fundamental_basis,
     )
+    rows = list((await db.scalars(select(FundamentalScorePeriod).where(*criteria))).all())
 
-    if not result:
-        raise HTTPException(status_code=404, detail="Analysis not found")
+    if not rows or refresh:
+        api_key = os.getenv("ALPHA_VANTAGE_API_KEY", "")
+        if not api_key:
+            logger.error("ALPHA_VANTAGE_API_KEY not configured")
+            raise HTTPException(status_code=500, detail="ALPHA_VANTAGE_API_KEY not configured")
+
+        alpha = AlphaVantageService(api_key=api_key)
+        orchestrator = AnalysisOrchestrator(alpha_service=alpha)
+        periods = await run_in_threadpool(orchestrator.fundamental_history, symbol, fundamental_basis=fundamental_basis)
+
+        values = [fundamental_period_values(symbol, fundamental_basis, period) for period in periods]
+        rows = [FundamentalScorePeriod(**row) for row in values]
+        await run_write(db, lambda session: upsert_fundamental_periods(session, symbol, fundamental_basis, values))
 
     return {
-        "fundamental": result.fundamental_json,
-        "technical": result.technical_json,
-        "combined": result.combined_json,
-        "llm_status": result.llm_status,
-        "llm_summary": result.llm_summary,
-        "llm_bull_case": result.llm_bull_case,
-        "llm_bear_case": result.llm_bear_case,
-        "llm_risk_assessment": result.llm_risk_assessment,
-        "llm_confidence": result.llm_confidence,
-        "llm_ready": result.llm_summary is not None,
+        "symbol": symbol,
+        "basis": fundamental_basis,
+        "periods": _history_periods(rows),
     }
+
+
+@router.post("/{analysis_id}/reweight")
+async def reweight_analysis(
+    analysis_id: str,
+    request: ReweightRequest,
+    db: AsyncSession = Depends(get_async_read_db),
+) -> Response:
+    logger.info("POST /analysis/%s/reweight", analysis_id)
+    result = await _load_result(db, analysis_id)
+
+    vectors = request.grid if request.grid else [request.weights or WeightVector()]
+    grid = [vector.model_dump(exclude_none=True) for vector in vectors]
+    try:
+        reweighter = ScoreReweighter(result.fundamental, result.technical)
+        results = await run_in_threadpool(reweighter.evaluate, grid)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    # Large grids skip jsonable_encoder; the results are already plain JSON types.
+    return ORJSONResponse({"analysis_id": analysis_id, "results": results})
+
+
+async def _analysis_response(
+    analysis_id: str,
+    fields: str | None,
+    if_none_match: str | None,
+    db: AsyncSession,
+    cache: RedisCache,
+) -> Response:
+    include, exclude = _parse_fields(fields)
+    key = _response_cache_key(analysis_id, include, exclude)
+    cached = await _cache_get(cache, key)
+    if cached is not None:
+        etag, _, body = cached.partition(b"\n")
+        return _conditional_response(body, etag.decode("ascii"), IMMUTABLE_CACHE_CONTROL, if_none_match)
+
+    result = await _load_result(db, analysis_id)
+    payload = _project(_serialize_result(result), include, exclude)
+    body = fast_json.dumps(payload)
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    if result.llm_status in FINAL_LLM_STATUSES:
+        # Nothing about a finished snapshot changes again, so clients and Redis may keep it.
+        await _cache_set(cache, key, etag.encode("ascii") + b"\n" + body)
+        cache_control = IMMUTABLE_CACHE_CONTROL
+    else:
+        cache_control = "no-cache"
+    return _conditional_response(body, etag, cache_control, if_none_match)
+
+
+def _sse(message: dict) -> bytes:
+    return b"data: " + fast_json.dumps(message) + b"\n\n"
+
+
+def _narration_message(status: str | None, columns: dict) -> dict:
+    return {"status": status, "fields": columns, "final": status in FINAL_LLM_STATUSES}
+
+
+async def _narration_state(analysis_result_id: str) -> dict | None:
+    # A fresh session on the primary, so each check sees what the worker last committed.
+    columns = [getattr(AnalysisResult, column) for column in NARRATION_COLUMNS.values()]
+    async with AsyncSessionLocal() as session:
+        row = (
+            await session.execute(
+                select(AnalysisResult.llm_status, *columns).where(AnalysisResult.id == analysis_result_id)
+            )
+        ).one_or_none()
+    if row is None:
+        return None
+    return _narration_message(row.llm_status, {column: getattr(row, column) for column in NARRATION_COLUMNS.values()})
+
+
+@router.get("/{analysis_id}/stream")
+async def stream_analysis_narration(
+    analysis_id: str,
+    db: AsyncSession = Depends(get_async_read_db),
+    broker: NarrationBroker = Depends(get_narration_broker),
+) -> StreamingResponse:
+    logger.info("GET /analysis/%s/stream", analysis_id)
+    result = await _load_result(db, analysis_id)
+    initial = _narration_message(
+        result.llm_status,
+        {column: getattr(result, column) for column in NARRATION_COLUMNS.values()},
+    )
+
+    async def events():
+        if initial["final"]:
+            yield _sse(initial)
+            return
+        deadline = time.monotonic() + NARRATION_STREAM_TIMEOUT_SECONDS
+        last = None
+        # listen() yields None right after subscribing and on quiet heartbeats; re-reading the row then
+        # covers anything published before the subscription existed.
+        async for message in broker.listen(result.id):
+            if time.monotonic() > deadline:
+                # Checked before keepalives too, so a row that never changes cannot hold the connection open.
+                yield _sse({"status": "timeout", "fields": (last or initial)["fields"], "final": True})
+                return
+            if message is None:
+                message = await _narration_state(result.id) or initial
+                if message == last:
+                    yield b": keepalive\n\n"
+                    continue
+            last = message
+            yield _sse(message)
+            if message["final"]:
+                return
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/{analysis_id}")
+async def get_analysis(
+    analysis_id: str,
+    fields: str | None = None,
+    if_none_match: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_async_read_db),
+    cache: RedisCache = Depends(get_redis_cache),
+) -> Response:
+    logger.info("GET /analysis/%s | fields=%s", analysis_id, fields)
+    return await _analysis_response(analysis_id, fields, if_none_match, db, cache)
+
+
+@router.get("/")
+async def get_analysis_by_query(
+    analysis_id: str,
+    fields: str | None = None,
+    if_none_match: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_async_read_db),
+    cache: RedisCache = Depends(get_redis_cache),
+) -> Response:
+    logger.info("GET /analysis?analysis_id=%s | fields=%s", analysis_id, fields)
+    return await _analysis_response(analysis_id, fields, if_none_match, db, cache)
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from redis.exceptions import RedisError
+
+from app.services.leaderboard import ScoreLeaderboard, get_leaderboard
+from app.utils.logger import get_logger
+
+
+router = APIRouter(prefix="/leaderboard", tags=["leaderboard"])
+logger = get_logger(__name__)
+
+
+def _check_score_type(score_type: str) -> None:
+    if score_type not in ScoreLeaderboard.SCORE_TYPES:
+        raise HTTPException(status_code=404, detail=f"Unknown score type: {score_type}")
+
+
+@router.get("/{score_type}")
+def get_leaderboard_range(
+    score_type: str,
+    order: Literal["top", "bottom"] = "top",
+    limit: int = Query(50, ge=1, le=500),
+    symbols: list[str] | None = Query(None),
+    leaderboard: ScoreLeaderboard = Depends(get_leaderboard),
+) -> dict:
+    logger.info("GET /leaderboard/%s | order=%s | limit=%s", score_type, order, limit)
+    _check_score_type(score_type)
+    try:
+        if order == "top":
+            entries = leaderboard.top(score_type, limit=limit, symbols=symbols)
+        else:
+            entries = leaderboard.bottom(score_type, limit=limit, symbols=symbols)
+    except RedisError as exc:
+        logger.exception("Leaderboard unavailable | score_type=%s", score_type)
+        raise HTTPException(status_code=503, detail="Leaderboard unavailable") from exc
+    return {"score_type": score_type, "order": order, "entries": entries}
+
+
+@router.get("/{score_type}/{symbol}")
+def get_leaderboard_rank(
+    score_type: str,
+    symbol: str,
+    leaderboard: ScoreLeaderboard = Depends(get_leaderboard),
+) -> dict:
+    logger.info("GET /leaderboard/%s/%s", score_type, symbol)
+    _check_score_type(score_type)
+    try:
+        rank = leaderboard.rank(score_type, symbol)
+    except RedisError as exc:
+        logger.exception("Leaderboard unavailable | score_type=%s", score_type)
+        raise HTTPException(status_code=503, detail="Leaderboard unavailable") from exc
+    if rank is None:
+        raise HTTPException(status_code=404, detail="Symbol not ranked")
+    return {"score_type": score_type, **rank}
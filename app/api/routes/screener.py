@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.services.metric_store import MetricStore, get_metric_store
+from app.utils.logger import get_logger
+
+
+router = APIRouter(prefix="/screener", tags=["screener"])
+logger = get_logger(__name__)
+
+
+@router.get("/")
+def screen(
+    filter: str | None = None,
+    sort: str | None = None,
+    limit: int = Query(50, ge=1, le=1000),
+    columns: list[str] | None = Query(None),
+    store: MetricStore = Depends(get_metric_store),
+) -> dict:
+    logger.info("GET /screener | filter=%s | sort=%s | limit=%s", filter, sort, limit)
+    try:
+        return store.query(filter_expr=filter, sort=sort, limit=limit, columns=columns)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
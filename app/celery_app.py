@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import os
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown, worker_ready, worker_shutdown
+from kombu import Queue
 from app.utils.env import load_env_file
 
 
@@ -13,15 +15,82 @@ celery_app = Celery(
     "financial_ai",
     broker=broker_url,
     backend=backend_url,
+    # Not imported by app.tasks: it needs services that themselves import app.tasks.llm_tasks.
+    include=["app.tasks.analysis_tasks"],
 )
 
+# One queue per kind of work, so each gets its own workers: a slow generation never holds up data
+# jobs, and a watchlist batch never sits in front of a user waiting on a single narration.
+INTERACTIVE_LLM_QUEUE = "interactive-llm"
+BATCH_LLM_QUEUE = "batch-llm"
+MARKET_REFRESH_QUEUE = "market-refresh"
+ANALYSIS_QUEUE = "analysis"
+QUEUES = (INTERACTIVE_LLM_QUEUE, BATCH_LLM_QUEUE, MARKET_REFRESH_QUEUE, ANALYSIS_QUEUE)
+
+# With the Redis broker a lower number is served first, within a queue.
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 3
+PRIORITY_LOW = 6
+
 celery_app.conf.update(
     task_serializer="json",
     result_serializer="json",
     accept_content=["json"],
     timezone="UTC",
     enable_utc=True,
+    task_queues=[Queue(name) for name in QUEUES],
+    task_default_queue=ANALYSIS_QUEUE,
+    task_default_priority=PRIORITY_NORMAL,
+    task_routes={
+        "generate_llm_analysis": {"queue": INTERACTIVE_LLM_QUEUE},
+        "generate_llm_watchlist": {"queue": BATCH_LLM_QUEUE},
+        "archive_expired_snapshots": {"queue": ANALYSIS_QUEUE},
+        "analyze_watchlist": {"queue": ANALYSIS_QUEUE},
+    },
+    # Workers override this per profile; LLM workers run with --prefetch-multiplier 1.
+    worker_prefetch_multiplier=int(os.getenv("CELERY_PREFETCH_MULTIPLIER", "4")),
+    broker_transport_options={
+        "priority_steps": list(range(10)),
+        "sep": ":",
+        "queue_order_strategy": "priority",
+        # Unacked (acks_late) messages are redelivered after this; it must outlast the slowest generation.
+        "visibility_timeout": int(os.getenv("CELERY_VISIBILITY_TIMEOUT", "3600")),
+    },
 )
 
 # Ensure tasks are registered
 celery_app.autodiscover_tasks(["app.tasks"])
+
+
+@worker_process_init.connect
+@worker_ready.connect
+def start_ollama_pool(**kwargs) -> None:
+    # Prefork children need their own refresher thread; thread/solo pools get one via worker_ready.
+    from app.services.ollama_pool import get_ollama_pool
+
+    get_ollama_pool().start()
+
+
+@worker_ready.connect
+def replay_narration_journal(**kwargs) -> None:
+    # Narrations a crashed worker buffered but never wrote are journaled in Redis; write them now.
+    from app.tasks.llm_tasks import get_narration_sink
+
+    get_narration_sink().recover()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def flush_narration_sink(**kwargs) -> None:
+    from app.tasks.llm_tasks import get_narration_sink
+
+    get_narration_sink().flush()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def save_metric_store(**kwargs) -> None:
+    # Watchlist analyses record their scores from the data worker.
+    from app.services.metric_store import get_metric_store
+
+    get_metric_store().save()
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import argparse
+
+from sqlalchemy import inspect, null, select, text, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import joinedload, sessionmaker
+
+from app.models import Base
+from app.models.analysis import Analysis
+from app.models.analysis_result import AnalysisResult
+from app.services.score_history import score_history_values, upsert_score_history
+from app.services.snapshot_store import store_snapshot_blob
+from app.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+def upgrade_schema(engine: Engine) -> None:
+    # create_all() only creates missing tables; add new nullable columns and indexes to existing ones.
+    Base.metadata.create_all(bind=engine)
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable:
+                    raise RuntimeError(f"Cannot add non-nullable column {table.name}.{column.name} automatically")
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}"
+                foreign_keys = list(column.foreign_keys)
+                if len(foreign_keys) == 1:
+                    target = foreign_keys[0].column
+                    ddl += f" REFERENCES {target.table.name}({target.name})"
+                logger.info("Adding column | %s.%s", table.name, column.name)
+                conn.execute(text(ddl))
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+
+
+def migrate_snapshot_blobs(engine: Engine, batch_size: int = 500) -> int:
+    upgrade_schema(engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+    converted = 0
+    last_id = ""
+    while True:
+        with session_factory() as db:
+            rows = (
+                db.query(AnalysisResult)
+                .filter(AnalysisResult.id > last_id)
+                .order_by(AnalysisResult.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+            for row in rows:
+                changed = False
+                if row.fundamental_blob_hash is None and row.fundamental_json is not None:
+                    row.fundamental_blob_hash = store_snapshot_blob(db, row.fundamental_json)
+                    row.fundamental_json = null()
+                    changed = True
+                if row.technical_blob_hash is None and row.technical_json is not None:
+                    row.technical_blob_hash = store_snapshot_blob(db, row.technical_json)
+                    row.technical_json = null()
+                    changed = True
+                converted += int(changed)
+            last_id = rows[-1].id
+            db.commit()
+        logger.info("Snapshot blob migration progress | converted=%s", converted)
+    return converted
+
+
+def backfill_score_history(engine: Engine, batch_size: int = 500) -> int:
+    # Replays live snapshots oldest first; the upsert keeps the newest one per symbol and day.
+    upgrade_schema(engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+    backfilled = 0
+    last_key = None
+    while True:
+        with session_factory() as db:
+            query = (
+                select(Analysis)
+                .options(
+                    joinedload(Analysis.result).options(
+                        joinedload(AnalysisResult.fundamental_blob),
+                        joinedload(AnalysisResult.technical_blob),
+                    )
+                )
+                .order_by(Analysis.created_at, Analysis.id)
+                .limit(batch_size)
+            )
+            if last_key is not None:
+                query = query.where(tuple_(Analysis.created_at, Analysis.id) > last_key)
+            analyses = db.scalars(query).unique().all()
+            if not analyses:
+                break
+            upsert_score_history(
+                db,
+                [
+                    score_history_values(
+                        analysis.symbol,
+                        analysis.id,
+                        analysis.created_at,
+                        {
+                            "combined_analysis": analysis.result.combined_json,
+                            "fundamental_analysis": analysis.result.fundamental,
+                            "technical_analysis": analysis.result.technical,
+                        },
+                    )
+                    for analysis in analyses
+                    if analysis.result is not None
+                ],
+            )
+            db.commit()
+            backfilled += len(analyses)
+            last_key = (analyses[-1].created_at, analyses[-1].id)
+        logger.info("Score history backfill progress | analyses=%s", backfilled)
+    return backfilled
+
+
+if __name__ == "__main__":
+    from app.db.session import engine
+
+    parser = argparse.ArgumentParser(description="Move inline snapshot JSON into deduplicated blobs.")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--score-history", action="store_true", help="Backfill score_history from live analyses.")
+    args = parser.parse_args()
+    if args.score_history:
+        total = backfill_score_history(engine, batch_size=args.batch_size)
+        print(f"Backfilled score history from {total} analyses")
+    else:
+        total = migrate_snapshot_blobs(engine, batch_size=args.batch_size)
+        print(f"Converted {total} analysis results")
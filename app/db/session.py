@@ -1,11 +1,25 @@
 from __future__ import annotations
 
+import asyncio
+import itertools
 import os
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
 from app.utils.env import load_env_file
 
 from sqlalchemy import create_engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
+from app.db.sqlite import SQLiteWriter, WriteJob, configure_sqlite, is_file_database
+from app.db.threaded import threaded_sessionmaker
+from app.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
 
 def _sqlite_connect_args(database_url: str) -> dict:
     if database_url.startswith("sqlite"):
@@ -13,16 +27,153 @@ def _sqlite_connect_args(database_url: str) -> dict:
     return {}
 
 
+def _pool_options(database_url: str) -> dict:
+    # SQLite picks its own pool; sizing only applies to server databases.
+    if database_url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": True,
+    }
+
+
+def _async_database_url(database_url: str) -> str:
+    scheme, _, rest = database_url.partition("://")
+    driver = scheme.split("+", 1)[0]
+    if driver == "sqlite":
+        return f"sqlite+aiosqlite://{rest}"
+    if driver in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg://{rest}"
+    return database_url
+
+
+def _replica_urls(value: str) -> list[str]:
+    return [url.strip() for url in value.split(",") if url.strip()]
+
+
 load_env_file()
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app.db")
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_database_url(DATABASE_URL)
+# Optional read replicas; the API decides per request whether a read may use one.
+DATABASE_REPLICA_URLS = _replica_urls(os.getenv("DATABASE_REPLICA_URLS", ""))
+# DB_ASYNC_ENGINE=1 serves the routes from an async driver (aiosqlite / asyncpg). It is off by default:
+# on SQLite the load test measured it slower than the sync engine, and no gain on Postgres has been measured.
+ASYNC_ENGINE_ENABLED = os.getenv("DB_ASYNC_ENGINE", "").lower() in ("1", "true", "yes")
+# SQLITE_PROFILE=production: WAL + pragmas on every connection and one writer thread for all writes.
+SQLITE_PRODUCTION = os.getenv("SQLITE_PROFILE", "").lower() == "production" and is_file_database(DATABASE_URL)
 
-engine = create_engine(DATABASE_URL, connect_args=_sqlite_connect_args(DATABASE_URL))
+engine = create_engine(DATABASE_URL, connect_args=_sqlite_connect_args(DATABASE_URL), **_pool_options(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# The routes always await an AsyncSession-shaped object; by default it is a sync Session run in worker threads.
+async_engine: Optional[AsyncEngine] = None
+if ASYNC_ENGINE_ENABLED:
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        connect_args=_sqlite_connect_args(ASYNC_DATABASE_URL),
+        **_pool_options(ASYNC_DATABASE_URL),
+    )
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    replica_engines = [
+        create_async_engine(
+            _async_database_url(url),
+            connect_args=_sqlite_connect_args(url),
+            **_pool_options(url),
+        )
+        for url in DATABASE_REPLICA_URLS
+    ]
+    AsyncReplicaSessions = [
+        async_sessionmaker(e, autoflush=False, expire_on_commit=False) for e in replica_engines
+    ]
+else:
+    AsyncSessionLocal = threaded_sessionmaker(sessionmaker(bind=engine, autoflush=False, expire_on_commit=False))
+    replica_engines = [
+        create_engine(url, connect_args=_sqlite_connect_args(url), **_pool_options(url))
+        for url in DATABASE_REPLICA_URLS
+    ]
+    AsyncReplicaSessions = [
+        threaded_sessionmaker(sessionmaker(bind=e, autoflush=False, expire_on_commit=False)) for e in replica_engines
+    ]
+_replica_cycle = itertools.cycle(range(len(DATABASE_REPLICA_URLS)))
 
-def get_db():
-    db = SessionLocal()
-    try:
+if SQLITE_PRODUCTION:
+    configure_sqlite(engine)
+    if async_engine is not None:
+        configure_sqlite(async_engine.sync_engine)
+
+_sqlite_writer: Optional[SQLiteWriter] = None
+_sqlite_writer_lock = threading.Lock()
+
+
+def _pick_replica(primary: bool) -> Optional[int]:
+    if primary or not DATABASE_REPLICA_URLS:
+        return None
+    return next(_replica_cycle)
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+@asynccontextmanager
+async def async_read_session(primary: bool = False) -> AsyncIterator[AsyncSession]:
+    replica = _pick_replica(primary)
+    if replica is not None:
+        async with AsyncReplicaSessions[replica]() as db:
+            try:
+                await db.connection()
+            except DBAPIError:
+                # An unreachable replica degrades to the primary instead of failing the read.
+                logger.warning("Read replica unavailable | replica=%s", replica, exc_info=True)
+            else:
+                yield db
+                return
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_sqlite_writer() -> Optional[SQLiteWriter]:
+    global _sqlite_writer
+    if _sqlite_writer is None and SQLITE_PRODUCTION:
+        # Threadpool requests can arrive together; only one of them may start the writer thread.
+        with _sqlite_writer_lock:
+            if _sqlite_writer is None:
+                writer_engine = create_engine(
+                    DATABASE_URL,
+                    connect_args=_sqlite_connect_args(DATABASE_URL),
+                    pool_size=1,
+                    max_overflow=0,
+                )
+                configure_sqlite(writer_engine, begin_immediate=True)
+                _sqlite_writer = SQLiteWriter(writer_engine, max_batch=int(os.getenv("SQLITE_WRITER_BATCH", "100")))
+    return _sqlite_writer
+
+
+async def run_write(db: AsyncSession, job: WriteJob) -> Any:
+    # job(session) stages changes without committing; the commit happens here or on the writer thread.
+    writer = get_sqlite_writer()
+    if writer is not None:
+        return await asyncio.wrap_future(writer.submit(job))
+    try:
+        result = await db.run_sync(job)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return result
+
+
+async def dispose_engines() -> None:
+    if async_engine is not None:
+        await async_engine.dispose()
+    else:
+        engine.dispose()
+    for replica in replica_engines:
+        if isinstance(replica, AsyncEngine):
+            await replica.dispose()
+        else:
+            replica.dispose()
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+WriteJob = Callable[[Session], Any]
+
+
+def is_file_database(database_url: str) -> bool:
+    return database_url.startswith("sqlite") and ":memory:" not in database_url and not database_url.endswith("://")
+
+
+def sqlite_pragmas() -> List[str]:
+    return [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))}",
+        f"PRAGMA busy_timeout={int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))}",
+    ]
+
+
+def configure_sqlite(engine: Engine, begin_immediate: bool = False) -> None:
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        for pragma in sqlite_pragmas():
+            cursor.execute(pragma)
+        cursor.close()
+        if begin_immediate:
+            # Let SQLAlchemy issue BEGIN itself so SAVEPOINTs behave and the write lock is taken up front.
+            dbapi_connection.isolation_level = None
+
+    if begin_immediate:
+
+        @event.listens_for(engine, "begin")
+        def _begin_immediate(conn) -> None:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+class SQLiteWriter:
+    def __init__(self, engine: Engine, max_batch: int = 100) -> None:
+        self.engine = engine
+        self.max_batch = max_batch
+        self.session_factory = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+        self._queue: "queue.Queue[Optional[Tuple[WriteJob, Future]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, job: WriteJob) -> Future:
+        future: Future = Future()
+        self._ensure_started()
+        self._queue.put((job, future))
+        return future
+
+    def run(self, job: WriteJob) -> Any:
+        return self.submit(job).result()
+
+    def stop(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._thread = None
+
+    def _ensure_started(self) -> None:
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="sqlite-writer", daemon=True)
+                self._thread.start()
+
+    def _loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            # Drain whatever queued up behind the first job so it shares one commit.
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            jobs = [item for item in batch if item is not None]
+            if jobs:
+                self._process(jobs)
+            if stop:
+                return
+
+    def _process(self, jobs: List[Tuple[WriteJob, Future]]) -> None:
+        outcomes = []
+        with self.session_factory() as db:
+            for job, future in jobs:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    # Each job gets a savepoint so one failure does not roll back its neighbours.
+                    with db.begin_nested():
+                        outcomes.append((future, job(db), None))
+                except Exception as exc:
+                    outcomes.append((future, None, exc))
+            try:
+                db.commit()
+            except Exception as exc:
+                logger.exception("SQLite writer commit failed | jobs=%s", len(jobs))
+                db.rollback()
+                for future, _, _ in outcomes:
+                    future.set_exception(exc)
+                return
+
+        for future, value, exc in outcomes:
+            if exc is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result(value)
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, TypeVar
+
+from sqlalchemy.engine import Result
+from sqlalchemy.orm import Session, sessionmaker
+
+
+T = TypeVar("T")
+
+
+class ThreadedSession:
+    # The part of AsyncSession the routes use, over a sync Session. Each call runs whole in a worker
+    # thread and buffers its rows there, so no driver I/O happens on the event loop and there is one
+    # thread hop per query instead of the async driver's own thread and queue.
+    # Every session gets its own thread: the Session keeps its pooled connection between calls, and on a
+    # shared executor the sessions waiting for a connection could take every worker the holders need to
+    # finish and give theirs back.
+    def __init__(self, session: Session) -> None:
+        self.sync_session = session
+        self._executor: ThreadPoolExecutor | None = None
+
+    async def _run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-session")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+
+    async def __aenter__(self) -> "ThreadedSession":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def execute(self, statement: Any, *args: Any, **kwargs: Any) -> Result:
+        def run() -> Result:
+            return self.sync_session.execute(statement, *args, **kwargs).freeze()()
+
+        return await self._run(run)
+
+    async def scalars(self, statement: Any, *args: Any, **kwargs: Any) -> Any:
+        return (await self.execute(statement, *args, **kwargs)).scalars()
+
+    async def scalar(self, statement: Any, *args: Any, **kwargs: Any) -> Any:
+        return (await self.execute(statement, *args, **kwargs)).scalar()
+
+    async def get(self, entity: Any, ident: Any, **kwargs: Any) -> Any:
+        return await self._run(self.sync_session.get, entity, ident, **kwargs)
+
+    async def run_sync(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await self._run(fn, self.sync_session, *args, **kwargs)
+
+    async def connection(self) -> Any:
+        return await self._run(self.sync_session.connection)
+
+    async def commit(self) -> None:
+        await self._run(self.sync_session.commit)
+
+    async def rollback(self) -> None:
+        await self._run(self.sync_session.rollback)
+
+    async def close(self) -> None:
+        if self._executor is None:
+            return
+        try:
+            await self._run(self.sync_session.close)
+        finally:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def threaded_sessionmaker(factory: sessionmaker) -> Callable[[], ThreadedSession]:
+    def make() -> ThreadedSession:
+        return ThreadedSession(factory())
+
+    return make
@@ -1,20 +1,29 @@
 from __future__ import annotations
 
+import os
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 import uvicorn
 
 from app.api.routes.analysis import router as analysis_router
+from app.api.routes.leaderboard import router as leaderboard_router
+from app.api.routes.screener import router as screener_router
 from app.utils.env import load_env_file
 from app.utils.logger import setup_logger, get_logger
-from app.db.session import engine
-from app.models import Base
+from app.db.migrations import upgrade_schema
+from app.db.session import dispose_engines, engine, get_sqlite_writer
+from app.services.analysis_writer import get_analysis_writer
+from app.services.metric_store import get_metric_store
 
 
 load_env_file()
 setup_logger()
 app = FastAPI()
 app.include_router(analysis_router)
+app.include_router(screener_router)
+app.include_router(leaderboard_router)
 logger = get_logger("request")
 
 app.add_middleware(
@@ -24,11 +33,39 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Snapshot JSON is repetitive and compresses well; tiny bodies are not worth the CPU.
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=int(os.getenv("GZIP_MINIMUM_SIZE", "1024")),
+    compresslevel=int(os.getenv("GZIP_COMPRESS_LEVEL", "5")),
+)
 
 
 @app.on_event("startup")
 def create_tables() -> None:
-    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+
+
+@app.on_event("shutdown")
+def save_metric_store() -> None:
+    get_metric_store().save()
+
+
+@app.on_event("shutdown")
+def flush_analysis_writer() -> None:
+    get_analysis_writer().flush()
+
+
+@app.on_event("shutdown")
+def stop_sqlite_writer() -> None:
+    writer = get_sqlite_writer()
+    if writer is not None:
+        writer.stop()
+
+
+@app.on_event("shutdown")
+async def close_engines() -> None:
+    await dispose_engines()
 
 
 @app.middleware("http")
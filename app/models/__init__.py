@@ -3,6 +3,10 @@ from app.models.user import User
 from app.models.thread import Thread
 from app.models.analysis import Analysis
 from app.models.analysis_result import AnalysisResult
+from app.models.fundamental_score_period import FundamentalScorePeriod
+from app.models.snapshot_blob import SnapshotBlob
+from app.models.archived_analysis import ArchivedAnalysis
+from app.models.score_history import ScoreHistory
 
 __all__ = [
     "Base",
@@ -10,4 +14,8 @@ __all__ = [
     "Thread",
     "Analysis",
     "AnalysisResult",
+    "FundamentalScorePeriod",
+    "SnapshotBlob",
+    "ArchivedAnalysis",
+    "ScoreHistory",
 ]
@@ -3,7 +3,7 @@ from __future__ import annotations
 import uuid
 from datetime import UTC, datetime
 
-from sqlalchemy import DateTime, Float, ForeignKey, JSON, String
+from sqlalchemy import DateTime, Float, ForeignKey, Index, JSON, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base
@@ -11,6 +11,11 @@ from app.models.base import Base
 
 class Analysis(Base):
     __tablename__ = "analyses"
+    # Keyset pagination orders by (created_at, id) within a symbol or a thread.
+    __table_args__ = (
+        Index("ix_analyses_symbol_created_at", "symbol", "created_at", "id"),
+        Index("ix_analyses_thread_id_created_at", "thread_id", "created_at", "id"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     thread_id: Mapped[str] = mapped_column(String(36), ForeignKey("threads.id"), nullable=False)
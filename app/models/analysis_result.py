@@ -13,9 +13,16 @@ class AnalysisResult(Base):
     __tablename__ = "analysis_results"
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    analysis_id: Mapped[str] = mapped_column(String(36), ForeignKey("analyses.id"), nullable=False)
+    analysis_id: Mapped[str] = mapped_column(String(36), ForeignKey("analyses.id"), nullable=False, index=True)
+    # Legacy inline bodies; new snapshots reference deduplicated blobs instead.
     fundamental_json: Mapped[dict | None] = mapped_column(JSON, nullable=True)
     technical_json: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    fundamental_blob_hash: Mapped[str | None] = mapped_column(
+        String(64), ForeignKey("snapshot_blobs.hash"), nullable=True
+    )
+    technical_blob_hash: Mapped[str | None] = mapped_column(
+        String(64), ForeignKey("snapshot_blobs.hash"), nullable=True
+    )
     combined_json: Mapped[dict | None] = mapped_column(JSON, nullable=True)
     llm_model: Mapped[str | None] = mapped_column(String(100), nullable=True)
     llm_status: Mapped[str | None] = mapped_column(String(20), nullable=True)
@@ -28,3 +35,17 @@ class AnalysisResult(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(UTC), nullable=False)
 
     analysis = relationship("Analysis", back_populates="result")
+    fundamental_blob = relationship("SnapshotBlob", foreign_keys=[fundamental_blob_hash])
+    technical_blob = relationship("SnapshotBlob", foreign_keys=[technical_blob_hash])
+
+    @property
+    def fundamental(self) -> dict | None:
+        if self.fundamental_blob is not None:
+            return self.fundamental_blob.payload
+        return self.fundamental_json
+
+    @property
+    def technical(self) -> dict | None:
+        if self.technical_blob is not None:
+            return self.technical_blob.payload
+        return self.technical_json
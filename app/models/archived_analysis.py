@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime
+
+from sqlalchemy import DateTime, Float, ForeignKey, Index, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class ArchivedAnalysis(Base):
+    # Pointer left behind when an analysis moves to the Parquet archive; enough to list it and find it.
+    __tablename__ = "archived_analyses"
+    __table_args__ = (
+        Index("ix_archived_analyses_symbol_created_at", "symbol", "created_at", "id"),
+        Index("ix_archived_analyses_thread_id_created_at", "thread_id", "created_at", "id"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    thread_id: Mapped[str] = mapped_column(String(36), ForeignKey("threads.id"), nullable=False)
+    symbol: Mapped[str] = mapped_column(String(12), nullable=False)
+    overall_score: Mapped[float | None] = mapped_column(Float, nullable=True)
+    investment_bias: Mapped[str | None] = mapped_column(String(30), nullable=True)
+    llm_status: Mapped[str | None] = mapped_column(String(20), nullable=True)
+    archive_path: Mapped[str] = mapped_column(String(500), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(UTC), nullable=False)
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import uuid
+from datetime import UTC, datetime
+
+from sqlalchemy import DateTime, Float, Integer, JSON, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class FundamentalScorePeriod(Base):
+    __tablename__ = "fundamental_score_history"
+    __table_args__ = (UniqueConstraint("symbol", "basis", "fiscal_year", name="uq_fundamental_score_period"),)
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    symbol: Mapped[str] = mapped_column(String(12), nullable=False)
+    basis: Mapped[str] = mapped_column(String(10), nullable=False, default="annual")
+    fiscal_year: Mapped[int] = mapped_column(Integer, nullable=False)
+    overall_score: Mapped[float | None] = mapped_column(Float, nullable=True)
+    category_scores: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    risk_level: Mapped[str | None] = mapped_column(String(20), nullable=True)
+    risk_score: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    computed_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(UTC), nullable=False)
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from datetime import UTC, date, datetime
+
+from sqlalchemy import Date, DateTime, Float, Index, JSON, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class ScoreHistory(Base):
+    # One row per symbol per day. On SQLite the table is clustered on the key (WITHOUT ROWID);
+    # on Postgres the covering index serves range scans without heap lookups.
+    __tablename__ = "score_history"
+    __table_args__ = (
+        Index(
+            "ix_score_history_symbol_date_scores",
+            "symbol",
+            "as_of_date",
+            postgresql_include=["overall_score", "fundamental_score", "technical_score", "investment_bias"],
+        ).ddl_if(dialect="postgresql"),
+        {"sqlite_with_rowid": False},
+    )
+
+    symbol: Mapped[str] = mapped_column(String(12), primary_key=True)
+    as_of_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    overall_score: Mapped[float | None] = mapped_column(Float, nullable=True)
+    fundamental_score: Mapped[float | None] = mapped_column(Float, nullable=True)
+    technical_score: Mapped[float | None] = mapped_column(Float, nullable=True)
+    investment_bias: Mapped[str | None] = mapped_column(String(30), nullable=True)
+    fundamental_category_scores: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    technical_category_scores: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    # The snapshot that produced this row; a later snapshot on the same day replaces it.
+    analysis_id: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    snapshot_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(UTC), nullable=False)
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import zlib
+from datetime import UTC, datetime
+from typing import Any, Optional
+
+from sqlalchemy import DateTime, Integer, LargeBinary, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class SnapshotBlob(Base):
+    __tablename__ = "snapshot_blobs"
+
+    hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    size_bytes: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(UTC), nullable=False)
+    # Touched by every write that references the blob; the archive's orphan sweep skips recently used blobs.
+    last_used_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True, index=True)
+
+    @staticmethod
+    def canonical_bytes(payload: Any) -> bytes:
+        return json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=True).encode("utf-8")
+
+    @classmethod
+    def content_hash(cls, payload: Any) -> str:
+        return hashlib.sha256(cls.canonical_bytes(payload)).hexdigest()
+
+    @classmethod
+    def from_payload(cls, payload: Any) -> "SnapshotBlob":
+        raw = cls.canonical_bytes(payload)
+        return cls(
+            hash=hashlib.sha256(raw).hexdigest(),
+            data=zlib.compress(raw, 6),
+            size_bytes=len(raw),
+            last_used_at=datetime.now(UTC),
+        )
+
+    @property
+    def payload(self) -> Any:
+        return json.loads(zlib.decompress(self.data))
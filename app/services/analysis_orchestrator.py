@@ -3,11 +3,12 @@ from __future__ import annotations
 import hashlib
 import json
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from app.services.fundamental_engine import FundamentalEngine
+from app.services.narration_cache import bucket_score, canonicalize_payload, narration_key
 from app.services.technical_engine import TechnicalEngine
-from app.tasks.llm_tasks import generate_llm_analysis
+from app.tasks.llm_tasks import dispatch_narration
 from app.utils.cache import RedisCache
 from app.utils.logger import get_logger
 
@@ -61,6 +62,11 @@ class AnalysisOrchestrator:
         },
     }
 
+    BLEND_WEIGHTS: Dict[str, float] = {"fundamental": 0.6, "technical": 0.4}
+
+    # Lower bounds of each bias band, highest first; anything below the last band is Bearish.
+    BIAS_THRESHOLDS: List[Tuple[float, str]] = [(7.5, "Strong Bullish"), (6.0, "Bullish"), (4.0, "Neutral")]
+
     TTL_DAILY = 3600
     TTL_TECHNICAL = 3600
     TTL_FUNDAMENTAL = 3600
@@ -93,8 +99,17 @@ class AnalysisOrchestrator:
         params_hash = hashlib.sha256(params_payload.encode("utf-8")).hexdigest()[:12]
         return f"market:{symbol}:{function_name}:{params_hash}"
 
-    def _analysis_key(self, symbol: str, fundamentals: Optional[List[str]], technicals: Optional[List[str]]) -> str:
-        return f"analysis:{symbol}:{self._hash_selection(fundamentals)}:{self._hash_selection(technicals)}"
+    def _analysis_key(
+        self,
+        symbol: str,
+        fundamentals: Optional[List[str]],
+        technicals: Optional[List[str]],
+        fundamental_basis: str = "annual",
+    ) -> str:
+        return (
+            f"analysis:{symbol}:{fundamental_basis}:"
+            f"{self._hash_selection(fundamentals)}:{self._hash_selection(technicals)}"
+        )
 
     def _cached_or_fetch(self, cache_key: str, ttl_seconds: int, fetch_fn: Any) -> Dict[str, Any]:
         if self.cache:
@@ -110,6 +125,51 @@ class AnalysisOrchestrator:
             time.sleep(self.request_delay_seconds)
         return result
 
+    def _fetch_fundamentals(self, symbol: str) -> Tuple[Dict[str, Any], ...]:
+        overview = self._cached_or_fetch(
+            self._market_key(symbol, "OVERVIEW", {}),
+            self.TTL_FUNDAMENTAL,
+            lambda: self.alpha_service.get_overview(symbol),
+        )
+        income = self._cached_or_fetch(
+            self._market_key(symbol, "INCOME_STATEMENT", {}),
+            self.TTL_FUNDAMENTAL,
+            lambda: self.alpha_service.get_income_statement(symbol),
+        )
+        balance = self._cached_or_fetch(
+            self._market_key(symbol, "BALANCE_SHEET", {}),
+            self.TTL_FUNDAMENTAL,
+            lambda: self.alpha_service.get_balance_sheet(symbol),
+        )
+        cash_flow = self._cached_or_fetch(
+            self._market_key(symbol, "CASH_FLOW", {}),
+            self.TTL_FUNDAMENTAL,
+            lambda: self.alpha_service.get_cash_flow(symbol),
+        )
+        earnings = self._cached_or_fetch(
+            self._market_key(symbol, "EARNINGS", {}),
+            self.TTL_FUNDAMENTAL,
+            lambda: self.alpha_service.get_earnings(symbol),
+        )
+        return overview, income, balance, cash_flow, earnings
+
+    def fundamental_history(self, symbol: str, fundamental_basis: str = "annual") -> List[Dict[str, Any]]:
+        self._validate_symbol(symbol)
+        if fundamental_basis not in FundamentalEngine.BASES:
+            raise ValueError(f"Invalid fundamental basis: {fundamental_basis}")
+        self.logger.info("Computing fundamental history | symbol=%s | basis=%s", symbol, fundamental_basis)
+
+        overview, income, balance, cash_flow, earnings = self._fetch_fundamentals(symbol)
+        engine = FundamentalEngine(
+            overview=overview,
+            income_statement=income,
+            balance_sheet=balance,
+            cash_flow=cash_flow,
+            earnings=earnings,
+            basis=fundamental_basis,
+        )
+        return engine.analyze_history()
+
     def analyze(
         self,
         symbol: str,
@@ -117,8 +177,11 @@ class AnalysisOrchestrator:
         selected_technicals: Optional[List[str]] = None,
         include_llm: bool = False,
         analysis_result_id: Optional[str] = None,
+        fundamental_basis: str = "annual",
     ) -> Dict[str, Any]:
         self._validate_symbol(symbol)
+        if fundamental_basis not in FundamentalEngine.BASES:
+            raise ValueError(f"Invalid fundamental basis: {fundamental_basis}")
         start_time = time.time()
         self.logger.info("Starting analysis | symbol=%s", symbol)
 
@@ -126,7 +189,9 @@ class AnalysisOrchestrator:
         technicals_requested = selected_technicals is None or bool(selected_technicals)
 
         if self.cache and (fundamentals_requested or technicals_requested):
-            combined_key = self._analysis_key(symbol, selected_fundamentals, selected_technicals)
+            combined_key = self._analysis_key(
+                symbol, selected_fundamentals, selected_technicals, fundamental_basis
+            )
             cached_combined = self.cache.get_json(combined_key)
             if cached_combined is not None:
                 self.logger.info("Cache hit | symbol=%s", symbol)
@@ -143,31 +208,7 @@ class AnalysisOrchestrator:
         technical_payloads: Dict[str, Dict[str, Any]] = {}
 
         if fundamentals_requested:
-            overview = self._cached_or_fetch(
-                self._market_key(symbol, "OVERVIEW", {}),
-                self.TTL_FUNDAMENTAL,
-                lambda: self.alpha_service.get_overview(symbol),
-            )
-            income = self._cached_or_fetch(
-                self._market_key(symbol, "INCOME_STATEMENT", {}),
-                self.TTL_FUNDAMENTAL,
-                lambda: self.alpha_service.get_income_statement(symbol),
-            )
-            balance = self._cached_or_fetch(
-                self._market_key(symbol, "BALANCE_SHEET", {}),
-                self.TTL_FUNDAMENTAL,
-                lambda: self.alpha_service.get_balance_sheet(symbol),
-            )
-            cash_flow = self._cached_or_fetch(
-                self._market_key(symbol, "CASH_FLOW", {}),
-                self.TTL_FUNDAMENTAL,
-                lambda: self.alpha_service.get_cash_flow(symbol),
-            )
-            earnings = self._cached_or_fetch(
-                self._market_key(symbol, "EARNINGS", {}),
-                self.TTL_FUNDAMENTAL,
-                lambda: self.alpha_service.get_earnings(symbol),
-            )
+            overview, income, balance, cash_flow, earnings = self._fetch_fundamentals(symbol)
 
         technical_keys: List[str] = []
         if technicals_requested:
@@ -210,6 +251,7 @@ class AnalysisOrchestrator:
                 balance_sheet=balance,
                 cash_flow=cash_flow,
                 earnings=earnings,
+                basis=fundamental_basis,
             )
             fundamental_result = fundamental_engine.analyze(selected_metrics=selected_fundamentals)
 
@@ -240,7 +282,7 @@ class AnalysisOrchestrator:
         llm_output = None
         if include_llm:
             llm_payload = self._build_llm_payload(symbol, fundamental_result, technical_result, combined)
-            llm_key = self._llm_key(symbol, llm_payload)
+            llm_key = self._llm_key(llm_payload)
             if self.cache:
                 cached_llm = self.cache.get_json(llm_key)
                 if cached_llm is not None:
@@ -248,7 +290,7 @@ class AnalysisOrchestrator:
             if llm_output is None:
                 if analysis_result_id:
                     self.logger.info("Queueing LLM task | analysis_result_id=%s", analysis_result_id)
-                    generate_llm_analysis.delay(analysis_result_id, llm_payload)
+                    dispatch_narration(analysis_result_id, llm_payload)
                     llm_output = {"status": "queued"}
                 else:
                     self.logger.info("LLM skipped | analysis_result_id missing")
@@ -270,6 +312,15 @@ class AnalysisOrchestrator:
         )
         return result
 
+    @classmethod
+    def investment_bias(cls, overall: Optional[float]) -> str:
+        if overall is None:
+            return "Neutral"
+        for threshold, label in cls.BIAS_THRESHOLDS:
+            if overall >= threshold:
+                return label
+        return "Bearish"
+
     def _combine_scores(
         self,
         fundamental_result: Optional[Dict[str, Any]],
@@ -290,18 +341,11 @@ class AnalysisOrchestrator:
         elif technical_score is None:
             overall = fundamental_score
         else:
-            overall = (0.6 * fundamental_score) + (0.4 * technical_score)
+            overall = (self.BLEND_WEIGHTS["fundamental"] * fundamental_score) + (
+                self.BLEND_WEIGHTS["technical"] * technical_score
+            )
 
-        if overall is None:
-            bias = "Neutral"
-        elif overall >= 7.5:
-            bias = "Strong Bullish"
-        elif overall >= 6.0:
-            bias = "Bullish"
-        elif overall >= 4.0:
-            bias = "Neutral"
-        else:
-            bias = "Bearish"
+        bias = self.investment_bias(overall)
 
         if fundamental_score is not None and technical_score is not None:
             confidence = "High"
@@ -333,8 +377,10 @@ class AnalysisOrchestrator:
             for key, val in scores.items():
                 if val is None:
                     continue
-                items.append((key, val))
-            items.sort(key=lambda x: x[1], reverse=reverse)
+                # Ranked on the bucketed score the narration key sees, so near-equal categories cannot
+                # swap places between runs; ties break on the name.
+                items.append((key, bucket_score(val)))
+            items.sort(key=lambda x: (-x[1], x[0]) if reverse else (x[1], x[0]))
             return [k for k, _ in items[:top_n]]
 
         category_scores = fundamentals.get("category_scores", {}) if fundamentals else {}
@@ -363,7 +409,6 @@ class AnalysisOrchestrator:
             },
         }
 
-    def _llm_key(self, symbol: str, payload: Dict[str, Any]) -> str:
-        payload_str = json.dumps(payload, separators=(",", ":"), ensure_ascii=True)
-        payload_hash = hashlib.sha256(payload_str.encode("utf-8")).hexdigest()[:12]
-        return f"llm:{symbol}:{payload_hash}"
+    def _llm_key(self, payload: Dict[str, Any]) -> str:
+        # Shared with the Celery task, which fills the cache this lookup reads.
+        return narration_key(canonicalize_payload(payload))
@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+import weakref
+from datetime import UTC, datetime
+from typing import Any, Callable, Dict, List, Optional, Set
+from uuid import uuid4
+
+from redis.exceptions import RedisError
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal, get_sqlite_writer, run_write
+from app.models.analysis import Analysis
+from app.models.analysis_result import AnalysisResult
+from app.models.thread import Thread
+from app.models.user import User
+from app.services.leaderboard import ScoreLeaderboard, get_leaderboard
+from app.services.llm_stream import narration_columns
+from app.services.metric_store import MetricStore, get_metric_store
+from app.services.score_history import score_history_values, upsert_score_history
+from app.services.snapshot_store import store_snapshot_blob
+from app.services.template_narrator import TEMPLATE_MODEL, narrate, template_fast_path
+from app.tasks.llm_tasks import dispatch_narration
+from app.utils.logger import get_logger
+
+
+SYSTEM_EMAIL = "system@local"
+
+logger = get_logger(__name__)
+
+# The system user never changes once committed, so look it up once per engine.
+_system_user_ids: "weakref.WeakKeyDictionary[Engine, str]" = weakref.WeakKeyDictionary()
+
+
+def _system_user_id(db: Session) -> str:
+    bind = db.get_bind()
+    cached = _system_user_ids.get(bind)
+    if cached is not None:
+        return cached
+    user_id = db.query(User.id).filter(User.email == SYSTEM_EMAIL).scalar()
+    if user_id is not None:
+        _system_user_ids[bind] = user_id
+        return user_id
+    user = User(id=str(uuid4()), email=SYSTEM_EMAIL, hashed_password="", is_active=True)
+    db.add(user)
+    # Not cached yet: the insert may still roll back. The next lookup finds and caches it.
+    return user.id
+
+
+def _initial_narration(record: Dict[str, Any]) -> Dict[str, Any]:
+    # The template narration is readable at once; llm_status="template" marks it as waiting for the model.
+    payload = record["llm_payload"]
+    if payload is None:
+        return {"llm_status": None}
+    template_only = record.get("template_only", False)
+    if not template_only and not template_fast_path():
+        return {"llm_status": "pending"}
+    return {
+        "llm_status": "completed" if template_only else "template",
+        "llm_model": TEMPLATE_MODEL if template_only else None,
+        "llm_created_at": record["created_at"] if template_only else None,
+        **narration_columns(narrate(payload)),
+    }
+
+
+def _dispatch_llm(analysis_result_id: str, payload: Dict[str, Any]) -> None:
+    dispatch_narration(analysis_result_id, payload)
+
+
+def record_scores(
+    metric_store: MetricStore,
+    leaderboard: ScoreLeaderboard,
+    symbol: str,
+    result: Dict[str, Any],
+) -> None:
+    metric_store.record(
+        symbol,
+        result.get("fundamental_analysis"),
+        result.get("technical_analysis"),
+        result.get("combined_analysis"),
+    )
+    try:
+        leaderboard.record(
+            symbol,
+            result.get("fundamental_analysis"),
+            result.get("technical_analysis"),
+            result.get("combined_analysis"),
+        )
+    except RedisError:
+        logger.warning("Leaderboard update failed | symbol=%s", symbol, exc_info=True)
+
+
+def _publish_scores(records: List[Dict[str, Any]]) -> None:
+    metric_store, leaderboard = get_metric_store(), get_leaderboard()
+    for record in records:
+        record_scores(metric_store, leaderboard, record["symbol"], record["result"])
+
+
+class AnalysisWriter:
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        buffer_size: int = 0,
+        flush_interval_seconds: float = 1.0,
+        dispatch: Callable[[str, Dict[str, Any]], None] = _dispatch_llm,
+        publish_scores: Callable[[List[Dict[str, Any]]], None] = _publish_scores,
+    ) -> None:
+        self.session_factory = session_factory
+        self.buffer_size = buffer_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.dispatch = dispatch
+        self.publish_scores = publish_scores
+        self._buffer: List[Dict[str, Any]] = []
+        # Threads created by buffered records that have not been committed yet.
+        self._pending_threads: Set[str] = set()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    @property
+    def write_behind(self) -> bool:
+        return self.buffer_size > 0 and self.session_factory is not None
+
+    def resolve_thread(self, db: Session, thread_id: Optional[str]) -> tuple[str, bool]:
+        # Returns (thread_id, is_new); new threads are inserted together with their analysis.
+        if not thread_id:
+            return str(uuid4()), True
+        with self._lock:
+            # A write-behind thread exists for the client as soon as its id was returned.
+            if thread_id in self._pending_threads:
+                return thread_id, False
+        if db.query(Thread.id).filter(Thread.id == thread_id).scalar() is not None:
+            return thread_id, False
+        return str(uuid4()), True
+
+    def stage_thread(self, db: Session, thread_id: str) -> None:
+        # For callers that hand out a thread id before any analysis in it is written.
+        created_at = datetime.now(UTC)
+        db.add(
+            Thread(
+                id=thread_id,
+                user_id=_system_user_id(db),
+                title=None,
+                created_at=created_at,
+                updated_at=created_at,
+            )
+        )
+
+    def build_record(
+        self,
+        thread_id: str,
+        new_thread: bool,
+        symbol: str,
+        selected_fundamentals: Optional[List[str]],
+        selected_technicals: Optional[List[str]],
+        result: Dict[str, Any],
+        llm_payload: Optional[Dict[str, Any]] = None,
+        template_only: bool = False,
+        batch_narration: bool = False,
+    ) -> Dict[str, Any]:
+        return {
+            "analysis_id": str(uuid4()),
+            "analysis_result_id": str(uuid4()),
+            "thread_id": thread_id,
+            "new_thread": new_thread,
+            "symbol": symbol.upper(),
+            "selected_fundamentals": selected_fundamentals,
+            "selected_technicals": selected_technicals,
+            "created_at": datetime.now(UTC),
+            "result": result,
+            "llm_payload": llm_payload,
+            # No model call: the template narration is the final one (batch runs without an LLM).
+            "template_only": template_only,
+            # Narrated with other symbols by one watchlist task, which the caller dispatches.
+            "batch_narration": batch_narration,
+        }
+
+    def stage(self, db: Session, records: List[Dict[str, Any]]) -> None:
+        # Adds thread, analysis, snapshot blobs and result rows without committing.
+        user_id = None
+        if any(record["new_thread"] for record in records):
+            user_id = _system_user_id(db)
+
+        for record in records:
+            created_at = record["created_at"]
+            if record["new_thread"]:
+                db.add(
+                    Thread(
+                        id=record["thread_id"],
+                        user_id=user_id,
+                        title=None,
+                        created_at=created_at,
+                        updated_at=created_at,
+                    )
+                )
+            result = record["result"]
+            combined = result.get("combined_analysis")
+            db.add(
+                Analysis(
+                    id=record["analysis_id"],
+                    thread_id=record["thread_id"],
+                    symbol=record["symbol"],
+                    selected_fundamentals=record["selected_fundamentals"],
+                    selected_technicals=record["selected_technicals"],
+                    overall_score=(combined or {}).get("overall_score"),
+                    created_at=created_at,
+                )
+            )
+            db.add(
+                AnalysisResult(
+                    id=record["analysis_result_id"],
+                    analysis_id=record["analysis_id"],
+                    fundamental_blob_hash=store_snapshot_blob(db, result.get("fundamental_analysis")),
+                    technical_blob_hash=store_snapshot_blob(db, result.get("technical_analysis")),
+                    combined_json=combined,
+                    **_initial_narration(record),
+                )
+            )
+        # The daily score row rides in the same transaction as the snapshot it summarises.
+        upsert_score_history(
+            db,
+            [
+                score_history_values(record["symbol"], record["analysis_id"], record["created_at"], record["result"])
+                for record in records
+            ],
+        )
+
+    def dispatch_pending(self, records: List[Dict[str, Any]]) -> None:
+        # Only queue LLM work and rank the scores once the rows they point at are committed.
+        for record in records:
+            if record["llm_payload"] is None or record.get("template_only") or record.get("batch_narration"):
+                continue
+            logger.info("Queueing LLM | analysis_id=%s", record["analysis_id"])
+            self.dispatch(record["analysis_result_id"], record["llm_payload"])
+        self.publish_scores(records)
+
+    def write(self, db: Session, records: List[Dict[str, Any]]) -> None:
+        if not records:
+            return
+        try:
+            self.stage(db, records)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        self.dispatch_pending(records)
+
+    async def save(self, db: AsyncSession, record: Dict[str, Any]) -> None:
+        if self.write_behind:
+            self._enqueue(record)
+            return
+        await run_write(db, lambda session: self.stage(session, [record]))
+        # The Celery publish is a blocking broker round trip; keep it off the event loop.
+        await asyncio.to_thread(self.dispatch_pending, [record])
+
+    def submit(self, db: Session, record: Dict[str, Any]) -> None:
+        if self.write_behind:
+            self._enqueue(record)
+        else:
+            self.write(db, [record])
+
+    def _enqueue(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._buffer.append(record)
+            if record["new_thread"]:
+                self._pending_threads.add(record["thread_id"])
+            self._start_flusher()
+            # A full batch is flushed by the background thread, never on the request path.
+            if len(self._buffer) >= self.buffer_size:
+                self._wake.set()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                records, self._buffer = self._buffer, []
+            if not records:
+                return 0
+            started = time.perf_counter()
+            try:
+                self.write_batch(records)
+            except Exception:
+                # One bad record must not sink the batch: fall back to per-record transactions.
+                logger.exception("Write-behind batch failed, retrying per record | records=%s", len(records))
+                for record in records:
+                    try:
+                        self.write_batch([record])
+                    except Exception:
+                        logger.exception("Write-behind record dropped | analysis_id=%s", record["analysis_id"])
+            finally:
+                # Committed threads are found by the query from here on; dropped ones are gone for good.
+                with self._lock:
+                    self._pending_threads.difference_update(
+                        record["thread_id"] for record in records if record["new_thread"]
+                    )
+            logger.info(
+                "Write-behind flush | records=%s | elapsed_ms=%.1f",
+                len(records),
+                (time.perf_counter() - started) * 1000,
+            )
+            return len(records)
+
+    def write_batch(self, records: List[Dict[str, Any]]) -> None:
+        sqlite_writer = get_sqlite_writer()
+        if sqlite_writer is not None:
+            sqlite_writer.run(lambda session: self.stage(session, records))
+            self.dispatch_pending(records)
+            return
+        with self.session_factory() as db:
+            self.write(db, records)
+
+    def _start_flusher(self) -> None:
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        self._flusher = threading.Thread(target=self._flush_periodically, name="analysis-writer", daemon=True)
+        self._flusher.start()
+
+    def _flush_periodically(self) -> None:
+        while True:
+            self._wake.wait(self.flush_interval_seconds)
+            self._wake.clear()
+            self.flush()
+
+
+_analysis_writer: Optional[AnalysisWriter] = None
+
+
+def get_analysis_writer() -> AnalysisWriter:
+    global _analysis_writer
+    if _analysis_writer is None:
+        _analysis_writer = AnalysisWriter(
+            session_factory=SessionLocal,
+            buffer_size=int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "0")),
+            flush_interval_seconds=float(os.getenv("WRITE_BEHIND_FLUSH_SECONDS", "1.0")),
+        )
+    return _analysis_writer
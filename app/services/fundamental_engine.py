@@ -1,9 +1,36 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 
 class FundamentalEngine:
+    BASES = ("annual", "ttm")
+    TTM_WINDOW = 4
+    # (series attribute, Alpha Vantage field) for each quarterly statement used on the TTM basis.
+    TTM_INCOME_FIELDS = (
+        ("revenue_series", "totalRevenue"),
+        ("net_income_series", "netIncome"),
+        ("operating_income_series", "operatingIncome"),
+        ("ebit_series", "ebit"),
+        ("interest_expense_series", "interestExpense"),
+    )
+    TTM_BALANCE_FIELDS = (
+        ("equity_series", "totalShareholderEquity"),
+        ("assets_series", "totalAssets"),
+        ("liabilities_series", "totalLiabilities"),
+        ("current_assets_series", "totalCurrentAssets"),
+        ("current_liabilities_series", "totalCurrentLiabilities"),
+        ("debt_series", "totalDebt"),
+    )
+    TTM_CASH_FLOW_FIELDS = (
+        ("operating_cashflow_series", "operatingCashflow"),
+        ("capex_series", "capitalExpenditures"),
+        ("fcf_series", "freeCashFlow"),
+    )
+    TTM_EARNINGS_FIELDS = (("eps_series", "reportedEPS"),)
+
     SCORING_RANGES: Dict[str, Dict[str, Any]] = {
         "roe": {"min": -0.1, "max": 0.4, "inverse": False},
         "roa": {"min": -0.1, "max": 0.2, "inverse": False},
@@ -82,6 +109,39 @@ class FundamentalEngine:
         },
     }
 
+    CATEGORY_METRICS: Dict[str, List[str]] = {
+        "profitability": ["roe", "roa", "net_margin", "operating_margin"],
+        "growth": ["revenue_cagr_3y", "eps_cagr_3y", "fcf_cagr_3y"],
+        "financial_strength": ["debt_to_equity", "current_ratio", "interest_coverage"],
+        "valuation": ["pe_ratio", "ev_to_ebitda"],
+    }
+
+    CATEGORY_WEIGHTS: Dict[str, float] = {
+        "profitability": 0.30,
+        "growth": 0.25,
+        "financial_strength": 0.25,
+        "valuation": 0.20,
+    }
+
+    SERIES_ATTRS: Tuple[str, ...] = (
+        "years",
+        "revenue_series",
+        "net_income_series",
+        "operating_income_series",
+        "ebit_series",
+        "interest_expense_series",
+        "equity_series",
+        "assets_series",
+        "liabilities_series",
+        "current_assets_series",
+        "current_liabilities_series",
+        "debt_series",
+        "operating_cashflow_series",
+        "capex_series",
+        "fcf_series",
+        "eps_series",
+    )
+
     def __init__(
         self,
         overview: Dict[str, Any],
@@ -89,7 +149,12 @@ class FundamentalEngine:
         balance_sheet: Dict[str, Any],
         cash_flow: Dict[str, Any],
         earnings: Dict[str, Any],
+        basis: str = "annual",
     ) -> None:
+        if basis not in self.BASES:
+            raise ValueError(f"Invalid fundamental basis: {basis}")
+        self.basis = basis
+        self.basis_used = basis
         self.overview = overview or {}
         self.income_statement = income_statement or {}
         self.balance_sheet = balance_sheet or {}
@@ -140,7 +205,7 @@ class FundamentalEngine:
         self,
         reports: List[Dict[str, Any]],
         field: str,
-        limit: int = 4,
+        limit: Optional[int] = 4,
     ) -> Tuple[List[int], List[Optional[float]]]:
         sorted_reports = self._sort_annual_reports(reports)
         years: List[int] = []
@@ -154,30 +219,52 @@ class FundamentalEngine:
 
         return years, values
 
-    def _extract_raw_data(self) -> None:
-        income_reports = self.income_statement.get("annualReports", []) or []
-        balance_reports = self.balance_sheet.get("annualReports", []) or []
-        cash_reports = self.cash_flow.get("annualReports", []) or []
-        earnings_reports = self.earnings.get("annualEarnings", []) or []
-
-        self.years, self.revenue_series = self._extract_series(income_reports, "totalRevenue")
-        _, self.net_income_series = self._extract_series(income_reports, "netIncome")
-        _, self.operating_income_series = self._extract_series(income_reports, "operatingIncome")
-        _, self.ebit_series = self._extract_series(income_reports, "ebit")
-        _, self.interest_expense_series = self._extract_series(income_reports, "interestExpense")
-
-        _, self.equity_series = self._extract_series(balance_reports, "totalShareholderEquity")
-        _, self.assets_series = self._extract_series(balance_reports, "totalAssets")
-        _, self.liabilities_series = self._extract_series(balance_reports, "totalLiabilities")
-        _, self.current_assets_series = self._extract_series(balance_reports, "totalCurrentAssets")
-        _, self.current_liabilities_series = self._extract_series(balance_reports, "totalCurrentLiabilities")
-        _, self.debt_series = self._extract_series(balance_reports, "totalDebt")
+    def _quarter_dates(self) -> List[str]:
+        # The income statement's quarters are the axis every other statement is aligned to.
+        reports = self._sort_annual_reports(self.income_statement.get("quarterlyReports", []) or [])
+        return [str(item.get("fiscalDateEnding", "0000-00-00")) for item in reports]
 
-        _, self.operating_cashflow_series = self._extract_series(cash_reports, "operatingCashflow")
-        _, self.capex_series = self._extract_series(cash_reports, "capitalExpenditures")
-        _, self.fcf_series = self._extract_series(cash_reports, "freeCashFlow")
-
-        _, self.eps_series = self._extract_series(earnings_reports, "reportedEPS")
+    def _aligned_quarters(
+        self,
+        reports: List[Dict[str, Any]],
+        fields: Sequence[str],
+        dates: List[str],
+    ) -> np.ndarray:
+        # One row per field and one column per date; a quarter the statement lacks stays NaN.
+        by_date = {str(item.get("fiscalDateEnding", "0000-00-00")): item for item in reports}
+        matrix = np.full((len(fields), len(dates)), np.nan)
+        for col, date in enumerate(dates):
+            item = by_date.get(date)
+            if item is None:
+                continue
+            for row, field in enumerate(fields):
+                value = self._to_float(item.get(field))
+                if value is not None:
+                    matrix[row, col] = value
+        return matrix
+
+    def _rolling_sum(self, matrix: np.ndarray, window: int) -> np.ndarray:
+        # Cumulative sums over values and missing counts give every window of every row at once.
+        # Columns run newest -> oldest, so result[:, i] covers matrix[:, i:i + window].
+        missing = np.isnan(matrix)
+        pad = np.zeros((matrix.shape[0], 1))
+        totals = np.hstack([pad, np.cumsum(np.where(missing, 0.0, matrix), axis=1)])
+        gaps = np.hstack([pad, np.cumsum(missing, axis=1)])
+        sums = totals[:, window:] - totals[:, :-window]
+        sums[gaps[:, window:] - gaps[:, :-window] > 0] = np.nan
+        return sums
+
+    def _has_quarterly_data(self) -> bool:
+        statements = (self.income_statement, self.balance_sheet, self.cash_flow)
+        return all(len(statement.get("quarterlyReports", []) or []) >= self.TTM_WINDOW for statement in statements)
+
+    def _extract_raw_data(self, limit: Optional[int] = 4) -> None:
+        if self.basis == "ttm" and self._has_quarterly_data():
+            self.basis_used = "ttm"
+            self._extract_ttm_data(limit=limit)
+        else:
+            self.basis_used = "annual"
+            self._extract_annual_data(limit=limit)
 
         if not any(self.fcf_series):
             self.fcf_series = []
@@ -187,6 +274,64 @@ class FundamentalEngine:
                 else:
                     self.fcf_series.append(ocf - capex)
 
+    def _extract_annual_data(self, limit: Optional[int] = 4) -> None:
+        income_reports = self.income_statement.get("annualReports", []) or []
+        balance_reports = self.balance_sheet.get("annualReports", []) or []
+        cash_reports = self.cash_flow.get("annualReports", []) or []
+        earnings_reports = self.earnings.get("annualEarnings", []) or []
+
+        self.years, self.revenue_series = self._extract_series(income_reports, "totalRevenue", limit=limit)
+        _, self.net_income_series = self._extract_series(income_reports, "netIncome", limit=limit)
+        _, self.operating_income_series = self._extract_series(income_reports, "operatingIncome", limit=limit)
+        _, self.ebit_series = self._extract_series(income_reports, "ebit", limit=limit)
+        _, self.interest_expense_series = self._extract_series(income_reports, "interestExpense", limit=limit)
+
+        _, self.equity_series = self._extract_series(balance_reports, "totalShareholderEquity", limit=limit)
+        _, self.assets_series = self._extract_series(balance_reports, "totalAssets", limit=limit)
+        _, self.liabilities_series = self._extract_series(balance_reports, "totalLiabilities", limit=limit)
+        _, self.current_assets_series = self._extract_series(balance_reports, "totalCurrentAssets", limit=limit)
+        _, self.current_liabilities_series = self._extract_series(
+            balance_reports, "totalCurrentLiabilities", limit=limit
+        )
+        _, self.debt_series = self._extract_series(balance_reports, "totalDebt", limit=limit)
+
+        _, self.operating_cashflow_series = self._extract_series(cash_reports, "operatingCashflow", limit=limit)
+        _, self.capex_series = self._extract_series(cash_reports, "capitalExpenditures", limit=limit)
+        _, self.fcf_series = self._extract_series(cash_reports, "freeCashFlow", limit=limit)
+
+        _, self.eps_series = self._extract_series(earnings_reports, "reportedEPS", limit=limit)
+
+    def _extract_ttm_data(self, limit: Optional[int] = 4) -> None:
+        dates = self._quarter_dates()
+        windows = len(dates) - self.TTM_WINDOW + 1
+        # Sample one TTM value per year so CAGR and trend logic keep their annual spacing.
+        columns = list(range(0, windows, self.TTM_WINDOW))[:limit]
+        self.years = [int(dates[col].split("-")[0]) for col in columns]
+
+        # Flow items (income, cash flow, EPS) are summed over the trailing four quarters;
+        # balance sheet items are point-in-time and use the quarter-end value directly.
+        self._set_ttm_series(self.income_statement.get("quarterlyReports"), self.TTM_INCOME_FIELDS, dates, columns)
+        self._set_ttm_series(
+            self.balance_sheet.get("quarterlyReports"), self.TTM_BALANCE_FIELDS, dates, columns, flow=False
+        )
+        self._set_ttm_series(self.cash_flow.get("quarterlyReports"), self.TTM_CASH_FLOW_FIELDS, dates, columns)
+        self._set_ttm_series(self.earnings.get("quarterlyEarnings"), self.TTM_EARNINGS_FIELDS, dates, columns)
+
+    def _set_ttm_series(
+        self,
+        reports: Optional[List[Dict[str, Any]]],
+        targets: Tuple[Tuple[str, str], ...],
+        dates: List[str],
+        columns: List[int],
+        flow: bool = True,
+    ) -> None:
+        matrix = self._aligned_quarters(reports or [], [field for _, field in targets], dates)
+        if flow:
+            matrix = self._rolling_sum(matrix, self.TTM_WINDOW)
+        sampled = matrix[:, columns]
+        for row, (attr, _) in enumerate(targets):
+            setattr(self, attr, [None if np.isnan(value) else float(value) for value in sampled[row]])
+
     def _safe_divide(self, numerator: Optional[float], denominator: Optional[float]) -> Optional[float]:
         if numerator is None or denominator is None:
             return None
@@ -455,36 +600,31 @@ class FundamentalEngine:
             "trend": metric.get("trend"),
         }
 
-    def analyze(self, selected_metrics: Optional[List[str]] = None) -> Dict[str, Any]:
-        self._extract_raw_data()
-        self._compute_metrics(selected_metrics)
-
-        category_scores = {
-            "profitability": self._avg_score(["roe", "roa", "net_margin", "operating_margin"]),
-            "growth": self._avg_score(["revenue_cagr_3y", "eps_cagr_3y", "fcf_cagr_3y"]),
-            "financial_strength": self._avg_score(["debt_to_equity", "current_ratio", "interest_coverage"]),
-            "valuation": self._avg_score(["pe_ratio", "ev_to_ebitda"]),
-        }
+    def _category_scores(self) -> Dict[str, Optional[float]]:
+        return {category: self._avg_score(keys) for category, keys in self.CATEGORY_METRICS.items()}
 
+    def _overall_score(self, category_scores: Dict[str, Optional[float]]) -> Optional[float]:
         weighted = 0.0
         weight_sum = 0.0
-        weights = {
-            "profitability": 0.30,
-            "growth": 0.25,
-            "financial_strength": 0.25,
-            "valuation": 0.20,
-        }
-        for key, weight in weights.items():
+        for key, weight in self.CATEGORY_WEIGHTS.items():
             if category_scores.get(key) is not None:
                 weighted += category_scores[key] * weight
                 weight_sum += weight
 
-        overall_score = (weighted / weight_sum) if weight_sum > 0 else None
+        return (weighted / weight_sum) if weight_sum > 0 else None
+
+    def analyze(self, selected_metrics: Optional[List[str]] = None) -> Dict[str, Any]:
+        self._extract_raw_data()
+        self._compute_metrics(selected_metrics)
+
+        category_scores = self._category_scores()
+        overall_score = self._overall_score(category_scores)
 
         explanations = {name: self.explain_metric(name) for name in self.metrics.keys()}
         business_quality_index = self._avg_score(["roe", "net_margin", "revenue_cagr_3y"])
 
         return {
+            "basis": self.basis_used,
             "raw_series": {
                 "years": self.years,
                 "revenue": self.revenue_series,
@@ -510,3 +650,33 @@ class FundamentalEngine:
             "business_quality_index": business_quality_index,
             "explanations": explanations,
         }
+
+    def analyze_history(self) -> List[Dict[str, Any]]:
+        # Scores every fiscal period (newest first) on the four-year window ending there.
+        # Valuation ratios only exist for the current price, so no period uses them: the newest
+        # point is scored like every earlier one and the charted trend has no step at the end.
+        self._extract_raw_data(limit=None)
+        full_series = {name: list(getattr(self, name)) for name in self.SERIES_ATTRS}
+        window = 4
+        historical_metrics = [
+            name for name in self.SCORING_RANGES if name not in self.CATEGORY_METRICS["valuation"]
+        ]
+
+        periods: List[Dict[str, Any]] = []
+        for offset, fiscal_year in enumerate(full_series["years"]):
+            for name, values in full_series.items():
+                setattr(self, name, values[offset : offset + window])
+            self.metrics = {}
+            self._compute_metrics(historical_metrics)
+
+            category_scores = self._category_scores()
+            periods.append(
+                {
+                    "fiscal_year": fiscal_year,
+                    "overall_score": self._overall_score(category_scores),
+                    "category_scores": category_scores,
+                    "risk": self._risk_rating(),
+                }
+            )
+
+        return periods
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import uuid
+from datetime import UTC, datetime
+from typing import Any, Dict, List
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.models.fundamental_score_period import FundamentalScorePeriod
+
+
+UPDATE_COLUMNS = ("overall_score", "category_scores", "risk_level", "risk_score", "computed_at")
+
+
+def fundamental_period_values(symbol: str, basis: str, period: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": str(uuid.uuid4()),
+        "symbol": symbol.upper(),
+        "basis": basis,
+        "fiscal_year": period["fiscal_year"],
+        "overall_score": period["overall_score"],
+        "category_scores": period["category_scores"],
+        "risk_level": period["risk"]["level"],
+        "risk_score": period["risk"]["score"],
+        "computed_at": datetime.now(UTC).replace(tzinfo=None),
+    }
+
+
+def upsert_fundamental_periods(db: Session, symbol: str, basis: str, rows: List[Dict[str, Any]]) -> None:
+    # Two requests recomputing the same symbol both land here; an upsert lets the later one win
+    # instead of failing on uq_fundamental_score_period.
+    criteria = (FundamentalScorePeriod.symbol == symbol.upper(), FundamentalScorePeriod.basis == basis)
+    years = [row["fiscal_year"] for row in rows]
+    # Periods that dropped out of the statements are removed; the rest are updated in place.
+    db.execute(delete(FundamentalScorePeriod).where(*criteria, FundamentalScorePeriod.fiscal_year.not_in(years)))
+    if not rows:
+        return
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        stored = db.scalars(
+            select(FundamentalScorePeriod).where(*criteria, FundamentalScorePeriod.fiscal_year.in_(years))
+        )
+        current = {period.fiscal_year: period for period in stored}
+        for row in rows:
+            existing = current.get(row["fiscal_year"])
+            if existing is None:
+                db.add(FundamentalScorePeriod(**row))
+            else:
+                for column in UPDATE_COLUMNS:
+                    setattr(existing, column, row[column])
+        return
+
+    statement = insert(FundamentalScorePeriod).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=[
+            FundamentalScorePeriod.symbol,
+            FundamentalScorePeriod.basis,
+            FundamentalScorePeriod.fiscal_year,
+        ],
+        set_={column: statement.excluded[column] for column in UPDATE_COLUMNS},
+    )
+    db.execute(statement)
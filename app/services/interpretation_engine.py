@@ -2,113 +2,255 @@ from __future__ import annotations
 
 import json
 import os
+import re
 import time
-from typing import Any, Dict
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-import requests
+from app.services.llm_stream import NARRATION_COLUMNS, partial_fields
+from app.services.narration_prompt import build_batch_prompt, build_prompt, estimate_tokens
+from app.services.ollama_pool import OllamaPool, get_ollama_pool
 from app.utils.logger import get_logger
 
 
+CONFIDENCE_LEVELS = ("Low", "Medium", "High")
+# Passed as Ollama's "format" so decoding is constrained to the narration object.
+NARRATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        **{name: {"type": "string"} for name in NARRATION_COLUMNS if name != "confidence"},
+        "confidence": {"type": "string", "enum": list(CONFIDENCE_LEVELS)},
+    },
+    "required": list(NARRATION_COLUMNS),
+}
+# The batch answer: one narration per symbol, tagged so items can be matched back to their payloads.
+NARRATION_LIST_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {"symbol": {"type": "string"}, **NARRATION_SCHEMA["properties"]},
+        "required": ["symbol", *NARRATION_SCHEMA["required"]],
+    },
+}
+
+
+class NarrationOutputError(ValueError):
+    def __init__(self, message: str, wasted: Dict[str, Any]) -> None:
+        super().__init__(message)
+        self.wasted = wasted
+
+
 class InterpretationEngine:
-    def __init__(self, model: str = "llama3:8b", base_url: str = "http://localhost:11434") -> None:
-        env_model = os.getenv("OLLAMA_MODEL")
-        env_base = os.getenv("OLLAMA_BASE_URL")
-        self.model = env_model or model
-        self.base_url = self._normalize_base_url(env_base or base_url)
+    def __init__(
+        self,
+        model: str = "llama3:8b",
+        base_url: str = "http://localhost:11434",
+        pool: Optional[OllamaPool] = None,
+    ) -> None:
+        self.model = os.getenv("OLLAMA_MODEL") or model
+        # OLLAMA_HOSTS (or OLLAMA_BASE_URL) overrides base_url, as before.
+        self.pool = pool or get_ollama_pool(base_url)
         self.logger = get_logger(self.__class__.__name__)
 
-    def _normalize_base_url(self, url: str) -> str:
-        if url.endswith("/api/generate"):
-            return url
-        return url.rstrip("/") + "/api/generate"
-
-    def _build_prompt(self, data: Dict[str, Any]) -> str:
-        return (
-            "You are a professional financial analyst.\n\n"
-            "Strict rules:\n"
-            "- Only use the provided data.\n"
-            "- Do NOT fabricate numbers.\n"
-            "- Do NOT give investment advice.\n"
-            "- Output must be valid JSON only.\n"
-            "- Do NOT include markdown, code fences, or extra text.\n\n"
-            "Return exactly this JSON structure:\n"
-            "{\n"
-            "  \"executive_summary\": \"...\",\n"
-            "  \"bull_case\": \"...\",\n"
-            "  \"bear_case\": \"...\",\n"
-            "  \"risk_assessment\": \"...\",\n"
-            "  \"confidence\": \"Low/Medium/High\"\n"
-            "}\n\n"
-            "Data:\n"
-            f"{data}\n"
+    def _options(self, schema: Dict[str, Any]) -> Dict[str, Any]:
+        # keep_alive keeps the model, and with it the evaluated system prefix, loaded between narrations.
+        options: Dict[str, Any] = {"keep_alive": os.getenv("OLLAMA_KEEP_ALIVE", "30m")}
+        output_format = os.getenv("LLM_OUTPUT_FORMAT", "schema").lower()
+        if output_format == "schema":
+            options["format"] = schema
+        elif output_format == "json":
+            options["format"] = "json"
+        return options
+
+    def generate(
+        self,
+        structured_data: Dict[str, Any],
+        on_partial: Optional[Callable[[Dict[str, str]], None]] = None,
+    ) -> Dict[str, Any]:
+        # One retry with a shorter prompt when the output cannot be parsed or repaired; wasted attempts are reported.
+        wasted = {"generations": 0, "tokens": 0, "seconds": 0.0}
+        total: Dict[str, Any] = {}
+        prompts = [build_prompt(structured_data), build_prompt(structured_data, retry=True)]
+        for attempt, prompt in enumerate(prompts, start=1):
+            output, model_used, usage = self._call(prompt, on_partial)
+            for name, value in usage.items():
+                total[name] = round(total.get(name, 0) + value, 3)
+            parsed, repaired = parse_narration(output)
+            if parsed is not None:
+                if repaired:
+                    self.logger.info("Repaired LLM JSON output | attempt=%s", attempt)
+                return {
+                    "model_used": model_used,
+                    "raw_output": output,
+                    "parsed": parsed,
+                    "attempts": attempt,
+                    "repaired": repaired,
+                    "usage": total,
+                    "wasted": wasted,
+                }
+            wasted["generations"] += 1
+            wasted["tokens"] += usage["prompt_tokens"] + usage["completion_tokens"]
+            wasted["seconds"] += usage["seconds"]
+            self.logger.warning(
+                "Unusable LLM output | attempt=%s | tokens=%s | seconds=%.2f | output=%.200s",
+                attempt,
+                usage["prompt_tokens"] + usage["completion_tokens"],
+                usage["seconds"],
+                output,
+            )
+        raise NarrationOutputError(f"LLM output was not valid narration JSON after {len(prompts)} attempts", wasted)
+
+    def generate_batch(self, payloads: List[Dict[str, Any]]) -> Dict[str, Any]:
+        # One prompt for several symbols. narrations lines up with payloads: a validated narration, or
+        # None for an item that is missing or unusable, which the caller narrates on its own instead.
+        # The answer grows with the symbol count, and so does the time it may take.
+        output, model_used, usage = self._call(
+            build_batch_prompt(payloads), None, NARRATION_LIST_SCHEMA, timeout=90 * len(payloads)
         )
+        narrations = match_narrations(payloads, parse_narration_list(output))
+        missing = sum(1 for narration in narrations if narration is None)
+        if missing:
+            self.logger.warning("Batch narration incomplete | symbols=%s | unusable=%s", len(payloads), missing)
+        return {"model_used": model_used, "raw_output": output, "narrations": narrations, "usage": usage}
 
-    def generate(self, structured_data: Dict[str, Any]) -> Dict[str, Any]:
-        prompt = self._build_prompt(structured_data)
+    def _call(
+        self,
+        prompt: Tuple[str, str],
+        on_partial: Optional[Callable[[Dict[str, str]], None]],
+        schema: Dict[str, Any] = NARRATION_SCHEMA,
+        timeout: float = 90,
+    ) -> Tuple[str, str, Dict[str, Any]]:
+        if on_partial is not None:
+            return self._call_streamed(prompt, on_partial)
         start_time = time.time()
         self.logger.info("Calling LLM | model=%s", self.model)
 
-        response = requests.post(
-            self.base_url,
-            json={
-                "model": self.model,
-                "prompt": prompt,
-                "stream": False,
-            },
-            timeout=90,
+        # The pool picks the least-loaded healthy host and falls back to a model that host has.
+        system, text = prompt
+        body, model_used = self.pool.generate(
+            self.model, {"system": system, "prompt": text, **self._options(schema)}, timeout=timeout
         )
-        if response.status_code == 404 and "not found" in response.text.lower():
-            self.logger.warning("Model not found. Attempting fallback.")
-            fallback = self._fallback_model()
-            if not fallback:
-                raise Exception("No available models found for fallback.")
-            if fallback != self.model:
-                self.logger.info("Retrying with fallback model=%s", fallback)
-            response = requests.post(
-                self.base_url,
-                json={
-                    "model": fallback,
-                    "prompt": prompt,
-                    "stream": False,
-                },
-                timeout=90,
-            )
-            self.model = fallback
-        elif response.status_code >= 400:
-            self.logger.error(
-                "LLM HTTP error | status=%s | body=%s",
-                response.status_code,
-                response.text,
-            )
-            response.raise_for_status()
+        if model_used != self.model:
+            self.logger.info("Used fallback model=%s", model_used)
+        output = body.get("response", "")
+        usage = _usage(body, prompt, output, time.time() - start_time)
+        self.logger.info("LLM response received | %s", _describe(usage))
+        return output, model_used, usage
+
+    def _call_streamed(
+        self,
+        prompt: Tuple[str, str],
+        on_partial: Callable[[Dict[str, str]], None],
+    ) -> Tuple[str, str, Dict[str, Any]]:
+        # Same prompt and final parsing as the blocking call; on_partial sees each field as it is written.
+        start_time = time.time()
+        self.logger.info("Calling LLM (streaming) | model=%s", self.model)
+
+        system, text = prompt
+        stream = self.pool.stream(
+            self.model, {"system": system, "prompt": text, **self._options(NARRATION_SCHEMA)}, timeout=90
+        )
+        output = ""
+        last: Dict[str, str] = {}
+        try:
+            for piece in stream:
+                output += piece
+                fields = partial_fields(output)
+                if fields != last:
+                    last = fields
+                    on_partial(fields)
+        finally:
+            stream.close()
+        usage = _usage(stream.stats, prompt, output, time.time() - start_time)
+        self.logger.info("LLM stream finished | %s", _describe(usage))
+        return output, stream.model, usage
 
-        response.raise_for_status()
-        output = response.json().get("response", "")
-        self.logger.info("LLM response received in %.2fs", time.time() - start_time)
 
-        parsed: Dict[str, Any]
+def _usage(stats: Dict[str, Any], prompt: Tuple[str, str], output: str, elapsed: float) -> Dict[str, Any]:
+    # Ollama reports token counts and nanosecond timings; the estimate stands in when it does not.
+    # prompt_eval_count only counts tokens evaluated, so a reused system prefix shows up as a drop here.
+    def seconds(name: str) -> float:
+        return round(stats.get(name, 0) / 1e9, 3)
+
+    return {
+        "prompt_tokens": int(stats.get("prompt_eval_count") or estimate_tokens("".join(prompt))),
+        "completion_tokens": int(stats.get("eval_count") or estimate_tokens(output)),
+        "seconds": seconds("total_duration") if stats.get("total_duration") else round(elapsed, 3),
+        "load_seconds": seconds("load_duration"),
+        "prompt_eval_seconds": seconds("prompt_eval_duration"),
+        "eval_seconds": seconds("eval_duration"),
+    }
+
+
+def _describe(usage: Dict[str, Any]) -> str:
+    return " | ".join(f"{name}={value}" for name, value in usage.items())
+
+
+def validate_narration(value: Any) -> Optional[Dict[str, str]]:
+    # The five narration fields as non-empty strings, or None; key spelling and confidence case are forgiven.
+    if not isinstance(value, dict):
+        return None
+    normalized = {
+        re.sub(r"[\s\-]+", "_", str(key).strip().lower()): item for key, item in value.items()
+    }
+    narration: Dict[str, str] = {}
+    for name in NARRATION_COLUMNS:
+        item = normalized.get(name)
+        if not isinstance(item, str) or not item.strip():
+            return None
+        narration[name] = item.strip()
+    confidence = narration["confidence"].capitalize()
+    if confidence not in CONFIDENCE_LEVELS:
+        return None
+    narration["confidence"] = confidence
+    return narration
+
+
+def repair_json(output: str, opening: str = "{", closing: str = "}") -> str:
+    # Cheap fixes for the usual slips: code fences, chatter around the value, trailing commas.
+    text = re.sub(r"^```[a-zA-Z]*\s*|\s*```$", "", output.strip())
+    start, end = text.find(opening), text.rfind(closing)
+    if start >= 0 and end > start:
+        text = text[start : end + 1]
+    return re.sub(r",\s*([}\]])", r"\1", text)
+
+
+def parse_narration(output: str) -> Tuple[Optional[Dict[str, str]], bool]:
+    # (narration, repaired); narration is None when neither the raw nor the repaired text validates.
+    for repaired, text in ((False, output), (True, repair_json(output))):
         try:
-            parsed = json.loads(output)
+            narration = validate_narration(json.loads(text))
         except json.JSONDecodeError:
-            self.logger.exception("Failed to parse LLM JSON output")
-            parsed = {}
+            continue
+        if narration is not None:
+            return narration, repaired
+    return None, False
 
-        return {
-            "model_used": self.model,
-            "raw_output": output,
-            "parsed": parsed,
-        }
 
-    def _fallback_model(self) -> str | None:
+def parse_narration_list(output: str) -> List[Any]:
+    # The items of a batch answer, raw or repaired; JSON mode tends to wrap the array in an object.
+    for text in (output, repair_json(output, "[", "]"), repair_json(output)):
         try:
-            tags_url = self.base_url.replace("/api/generate", "/api/tags")
-            resp = requests.get(tags_url, timeout=10)
-            resp.raise_for_status()
-            data = resp.json()
-            models = data.get("models", [])
-            if not models:
-                return None
-            return models[0].get("name")
-        except Exception:
-            self.logger.exception("Failed to fetch Ollama tags for fallback")
-            return None
+            value = json.loads(text)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(value, dict):
+            value = next((item for item in value.values() if isinstance(item, list)), [value])
+        if isinstance(value, list):
+            return value
+    return []
+
+
+def match_narrations(payloads: List[Dict[str, Any]], items: List[Any]) -> List[Optional[Dict[str, str]]]:
+    # Items are matched on their symbol; an untagged item falls back to its position when the counts agree.
+    by_symbol: Dict[str, Any] = {}
+    for item in items:
+        if isinstance(item, dict) and isinstance(item.get("symbol"), str):
+            by_symbol.setdefault(item["symbol"].strip().upper(), item)
+    positional = len(items) == len(payloads)
+    narrations = []
+    for index, payload in enumerate(payloads):
+        item = by_symbol.get(str(payload.get("symbol")).upper())
+        if item is None and positional and isinstance(items[index], dict) and "symbol" not in items[index]:
+            item = items[index]
+        narrations.append(validate_narration(item))
+    return narrations
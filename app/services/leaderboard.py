@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from app.services.fundamental_engine import FundamentalEngine
+from app.utils.cache import get_redis_client
+from app.utils.logger import get_logger
+
+
+class ScoreLeaderboard:
+    KEY_PREFIX = "leaderboard"
+    TECHNICAL_CATEGORIES = ("trend", "momentum", "volume", "volatility")
+    SCORE_TYPES = (
+        "overall",
+        "fundamental",
+        "technical",
+        *FundamentalEngine.CATEGORY_METRICS.keys(),
+        *TECHNICAL_CATEGORIES,
+    )
+
+    def __init__(self, client: Any) -> None:
+        self.client = client
+        self.logger = get_logger(self.__class__.__name__)
+
+    def _key(self, score_type: str) -> str:
+        if score_type not in self.SCORE_TYPES:
+            raise ValueError(f"Invalid score type: {score_type}")
+        return f"{self.KEY_PREFIX}:{score_type}"
+
+    def _decode(self, member: Any) -> str:
+        return member.decode("utf-8") if isinstance(member, bytes) else str(member)
+
+    def extract_scores(
+        self,
+        fundamental_result: Optional[Dict[str, Any]],
+        technical_result: Optional[Dict[str, Any]],
+        combined: Optional[Dict[str, Any]],
+    ) -> Dict[str, Optional[float]]:
+        fundamentals = fundamental_result or {}
+        technicals = technical_result or {}
+        fundamental_categories = fundamentals.get("category_scores", {}) or {}
+        technical_categories = technicals.get("category_scores", {}) or {}
+
+        scores: Dict[str, Optional[float]] = {
+            "overall": (combined or {}).get("overall_score"),
+            "fundamental": fundamentals.get("overall_score"),
+            "technical": technicals.get("overall_technical_score"),
+        }
+        for category in FundamentalEngine.CATEGORY_METRICS:
+            scores[category] = fundamental_categories.get(category)
+        for category in self.TECHNICAL_CATEGORIES:
+            scores[category] = technical_categories.get(f"{category}_score")
+        return scores
+
+    def record(
+        self,
+        symbol: str,
+        fundamental_result: Optional[Dict[str, Any]],
+        technical_result: Optional[Dict[str, Any]],
+        combined: Optional[Dict[str, Any]],
+    ) -> None:
+        if self.client is None:
+            return
+        symbol = symbol.upper()
+        scores = self.extract_scores(fundamental_result, technical_result, combined)
+        pipe = self.client.pipeline(transaction=False)
+        for score_type, score in scores.items():
+            # A score that is no longer available must not keep its old rank.
+            if score is None:
+                pipe.zrem(self._key(score_type), symbol)
+            else:
+                pipe.zadd(self._key(score_type), {symbol: float(score)})
+        pipe.execute()
+
+    def top(self, score_type: str, limit: int = 50, symbols: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        return self._range(score_type, limit, descending=True, symbols=symbols)
+
+    def bottom(self, score_type: str, limit: int = 50, symbols: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        return self._range(score_type, limit, descending=False, symbols=symbols)
+
+    def _range(
+        self,
+        score_type: str,
+        limit: int,
+        descending: bool,
+        symbols: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        key = self._key(score_type)
+        if self.client is None:
+            return []
+        if symbols:
+            # Watchlists are ranked from their own scores: one ZMSCORE, then a local sort of k items.
+            members = [s.upper() for s in symbols]
+            scores = self.client.zmscore(key, members)
+            entries = [(m, float(s)) for m, s in zip(members, scores) if s is not None]
+            entries.sort(key=lambda item: item[1], reverse=descending)
+            entries = entries[:limit]
+        elif descending:
+            entries = self.client.zrevrange(key, 0, limit - 1, withscores=True)
+        else:
+            entries = self.client.zrange(key, 0, limit - 1, withscores=True)
+        return [
+            {"rank": position + 1, "symbol": self._decode(member), "score": float(score)}
+            for position, (member, score) in enumerate(entries)
+        ]
+
+    def rank(self, score_type: str, symbol: str) -> Optional[Dict[str, Any]]:
+        key = self._key(score_type)
+        if self.client is None:
+            return None
+        symbol = symbol.upper()
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zrevrank(key, symbol)
+        pipe.zscore(key, symbol)
+        pipe.zcard(key)
+        position, score, total = pipe.execute()
+        if position is None:
+            return None
+        return {"symbol": symbol, "rank": position + 1, "score": float(score), "total": total}
+
+
+def get_leaderboard() -> ScoreLeaderboard:
+    return ScoreLeaderboard(get_redis_client())
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from redis.exceptions import RedisError
+
+from app.utils import fast_json
+from app.utils.cache import get_async_redis_client
+from app.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+# LLM JSON field -> AnalysisResult column (and API response key).
+NARRATION_COLUMNS = {
+    "executive_summary": "llm_summary",
+    "bull_case": "llm_bull_case",
+    "bear_case": "llm_bear_case",
+    "risk_assessment": "llm_risk_assessment",
+    "confidence": "llm_confidence",
+}
+WHITESPACE = " \t\r\n"
+ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+def _read_string(text: str, i: int) -> Tuple[str, int, bool]:
+    # Decodes a JSON string body starting after its opening quote; a cut-off string returns what arrived so far.
+    out = []
+    n = len(text)
+    while i < n:
+        char = text[i]
+        if char == '"':
+            return "".join(out), i + 1, True
+        if char != "\\":
+            out.append(char)
+            i += 1
+            continue
+        if i + 1 >= n:
+            break
+        escape = text[i + 1]
+        if escape != "u":
+            out.append(ESCAPES.get(escape, escape))
+            i += 2
+            continue
+        try:
+            code = int(text[i + 2 : i + 6], 16) if i + 6 <= n else None
+        except ValueError:
+            code = None
+        if code is None:
+            break
+        if 0xD800 <= code < 0xDC00:
+            # A surrogate pair needs both halves before it can be decoded.
+            if i + 12 > n or text[i + 6 : i + 8] != "\\u":
+                break
+            low = int(text[i + 8 : i + 12], 16)
+            code = 0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)
+            i += 12
+        else:
+            i += 6
+        out.append(chr(code))
+    return "".join(out), n, False
+
+
+def partial_fields(text: str) -> Dict[str, str]:
+    # String fields of a top-level JSON object that is still being generated, including the one in progress.
+    fields: Dict[str, str] = {}
+    i = text.find("{")
+    if i < 0:
+        return fields
+    i += 1
+    n = len(text)
+    while i < n:
+        while i < n and text[i] in WHITESPACE + ",":
+            i += 1
+        if i >= n or text[i] != '"':
+            break
+        key, i, closed = _read_string(text, i + 1)
+        if not closed:
+            break
+        while i < n and text[i] in WHITESPACE:
+            i += 1
+        if i >= n or text[i] != ":":
+            break
+        i += 1
+        while i < n and text[i] in WHITESPACE:
+            i += 1
+        if i >= n:
+            break
+        if text[i] == '"':
+            value, i, closed = _read_string(text, i + 1)
+            fields[key] = value
+            if not closed:
+                break
+            continue
+        # Skip a non-string value up to the next top-level comma.
+        depth = 0
+        while i < n:
+            char = text[i]
+            if char == '"':
+                _, i, _ = _read_string(text, i + 1)
+                continue
+            if char in "[{":
+                depth += 1
+            elif char in "]}":
+                if depth == 0:
+                    break
+                depth -= 1
+            elif char == "," and depth == 0:
+                break
+            i += 1
+    return fields
+
+
+def narration_columns(fields: Dict[str, Any]) -> Dict[str, Any]:
+    return {column: fields.get(name) for name, column in NARRATION_COLUMNS.items()}
+
+
+def stream_channel(analysis_result_id: str) -> str:
+    return f"llm:stream:{analysis_result_id}"
+
+
+def publish_narration(
+    client: Any,
+    analysis_result_id: str,
+    status: str,
+    fields: Dict[str, Any],
+    final: bool = False,
+) -> None:
+    if client is None:
+        return
+    message = fast_json.dumps({"status": status, "fields": fields, "final": final})
+    try:
+        client.publish(stream_channel(analysis_result_id), message)
+    except RedisError:
+        logger.warning("Narration publish failed | analysis_result_id=%s", analysis_result_id, exc_info=True)
+
+
+class NarrationBroker:
+    def __init__(self, client: Any, heartbeat_seconds: float = 15.0) -> None:
+        self.client = client
+        self.heartbeat_seconds = heartbeat_seconds
+
+    async def listen(self, analysis_result_id: str) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        # Yields None once subscribed and then on every quiet heartbeat, so callers can re-check the row.
+        pubsub = None
+        if self.client is not None:
+            try:
+                pubsub = self.client.pubsub()
+                await pubsub.subscribe(stream_channel(analysis_result_id))
+            except RedisError:
+                logger.warning("Narration subscribe failed; polling instead", exc_info=True)
+                pubsub = None
+        if pubsub is None:
+            while True:
+                yield None
+                await asyncio.sleep(self.heartbeat_seconds)
+        try:
+            yield None
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=self.heartbeat_seconds)
+                yield fast_json.loads(message["data"]) if message else None
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+
+
+def get_narration_broker() -> NarrationBroker:
+    return NarrationBroker(
+        get_async_redis_client(),
+        heartbeat_seconds=float(os.getenv("LLM_STREAM_HEARTBEAT_SECONDS", "15")),
+    )
@@ -0,0 +1,413 @@
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves from several processes are not serialized.
+    fcntl = None
+
+from app.services.fundamental_engine import FundamentalEngine
+from app.utils.logger import get_logger
+
+
+class MetricStore:
+    # Indicator columns: (column, indicator key, sub-field of a dict value or None for scalar values)
+    TECHNICAL_VALUE_COLUMNS: Tuple[Tuple[str, str, Optional[str]], ...] = (
+        ("rsi", "rsi", None),
+        ("macd", "macd", "macd"),
+        ("macd_signal", "macd", "signal"),
+        ("macd_hist", "macd", "hist"),
+        ("stoch_k", "stoch", "slow_k"),
+        ("stoch_d", "stoch", "slow_d"),
+        ("sma_50", "sma_50", None),
+        ("sma_200", "sma_200", None),
+        ("ema_20", "ema_20", None),
+        ("obv", "obv", None),
+        ("volume_spike", "volume_spike", None),
+        ("atr", "atr", None),
+        ("bbands_bandwidth", "bbands", "bandwidth"),
+    )
+    TECHNICAL_INDICATORS: Tuple[str, ...] = (
+        "rsi",
+        "macd",
+        "stoch",
+        "sma_50",
+        "sma_200",
+        "ema_20",
+        "obv",
+        "volume_spike",
+        "atr",
+        "bbands",
+    )
+    TECHNICAL_CATEGORIES: Tuple[str, ...] = ("trend_score", "momentum_score", "volume_score", "volatility_score")
+
+    NUMERIC_COLUMNS: Tuple[str, ...] = (
+        *FundamentalEngine.SCORING_RANGES.keys(),
+        *(f"{name}_score" for name in FundamentalEngine.SCORING_RANGES),
+        *(f"{category}_score" for category in FundamentalEngine.CATEGORY_METRICS),
+        "fundamental_score",
+        "business_quality_index",
+        "risk_score",
+        "latest_price",
+        "trend_slope",
+        *(column for column, _, _ in TECHNICAL_VALUE_COLUMNS),
+        *(f"{name}_score" for name in TECHNICAL_INDICATORS),
+        *TECHNICAL_CATEGORIES,
+        "technical_score",
+        "overall_score",
+        "updated_at",
+    )
+    TEXT_COLUMNS: Tuple[str, ...] = (
+        "basis",
+        "risk_level",
+        "trend_direction",
+        "momentum_strength",
+        "volatility_level",
+        "entry_signal",
+        "exit_signal",
+        "investment_bias",
+    )
+    TEXT_WIDTH = 32
+    INITIAL_CAPACITY = 1024
+
+    _CLAUSE_RE = re.compile(r"^\s*([a-z_0-9]+)\s*(>=|<=|==|!=|>|<|=)\s*(.+?)\s*$", re.IGNORECASE)
+    _AND_RE = re.compile(r"\s+and\s+", re.IGNORECASE)
+
+    def __init__(self, path: Optional[str] = None, save_interval_seconds: float = 30.0) -> None:
+        self.path = path
+        self.save_interval_seconds = save_interval_seconds
+        self.logger = get_logger(self.__class__.__name__)
+        self._lock = threading.Lock()
+        self._last_merged = 0.0
+        self._merged_mtime = 0.0
+        self._changed = threading.Event()
+        self._saver: Optional[threading.Thread] = None
+        self._allocate(self.INITIAL_CAPACITY)
+        if path and os.path.exists(path):
+            self.load()
+
+    def _allocate(self, capacity: int) -> None:
+        self.size = 0
+        self.capacity = capacity
+        self.symbols = np.empty(capacity, dtype=f"U{self.TEXT_WIDTH}")
+        self.numeric = {name: np.full(capacity, np.nan) for name in self.NUMERIC_COLUMNS}
+        self.text = {name: np.empty(capacity, dtype=f"U{self.TEXT_WIDTH}") for name in self.TEXT_COLUMNS}
+        self._index: Dict[str, int] = {}
+
+    def _grow(self) -> None:
+        capacity = self.capacity * 2
+        self.symbols = np.resize(self.symbols, capacity)
+        for name, column in self.numeric.items():
+            grown = np.full(capacity, np.nan)
+            grown[: self.capacity] = column
+            self.numeric[name] = grown
+        for name, column in self.text.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[: self.capacity] = column
+            self.text[name] = grown
+        self.capacity = capacity
+
+    def _to_float(self, value: Any) -> float:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+        return np.nan
+
+    def flatten(
+        self,
+        fundamental_result: Optional[Dict[str, Any]],
+        technical_result: Optional[Dict[str, Any]],
+        combined: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        fundamentals = fundamental_result or {}
+        technicals = technical_result or {}
+        combined = combined or {}
+        row: Dict[str, Any] = {}
+
+        metrics = fundamentals.get("metrics", {}) or {}
+        for name in FundamentalEngine.SCORING_RANGES:
+            metric = metrics.get(name, {}) or {}
+            row[name] = metric.get("value")
+            row[f"{name}_score"] = metric.get("score")
+        category_scores = fundamentals.get("category_scores", {}) or {}
+        for category in FundamentalEngine.CATEGORY_METRICS:
+            row[f"{category}_score"] = category_scores.get(category)
+        risk = fundamentals.get("risk", {}) or {}
+        row["fundamental_score"] = fundamentals.get("overall_score")
+        row["business_quality_index"] = fundamentals.get("business_quality_index")
+        row["risk_score"] = risk.get("score")
+        row["risk_level"] = risk.get("level")
+        row["basis"] = fundamentals.get("basis")
+
+        indicators = technicals.get("indicators", {}) or {}
+        for column, key, field in self.TECHNICAL_VALUE_COLUMNS:
+            value = (indicators.get(key, {}) or {}).get("value")
+            if field is not None:
+                value = value.get(field) if isinstance(value, dict) else None
+            row[column] = value
+        for key in self.TECHNICAL_INDICATORS:
+            row[f"{key}_score"] = (indicators.get(key, {}) or {}).get("score")
+        technical_categories = technicals.get("category_scores", {}) or {}
+        for category in self.TECHNICAL_CATEGORIES:
+            row[category] = technical_categories.get(category)
+        row["technical_score"] = technicals.get("overall_technical_score")
+        row["latest_price"] = technicals.get("latest_price")
+        row["trend_slope"] = technicals.get("trend_slope")
+        for column in ("trend_direction", "momentum_strength", "volatility_level", "entry_signal", "exit_signal"):
+            row[column] = technicals.get(column)
+
+        row["overall_score"] = combined.get("overall_score")
+        row["investment_bias"] = combined.get("investment_bias")
+        return row
+
+    def record(
+        self,
+        symbol: str,
+        fundamental_result: Optional[Dict[str, Any]],
+        technical_result: Optional[Dict[str, Any]],
+        combined: Optional[Dict[str, Any]],
+    ) -> None:
+        row = self.flatten(fundamental_result, technical_result, combined)
+        row["updated_at"] = time.time()
+        symbol = symbol.upper()
+        with self._lock:
+            position = self._index.get(symbol)
+            if position is None:
+                if self.size == self.capacity:
+                    self._grow()
+                position = self.size
+                self._index[symbol] = position
+                self.symbols[position] = symbol
+                self.size += 1
+            for name in self.NUMERIC_COLUMNS:
+                self.numeric[name][position] = self._to_float(row.get(name))
+            for name in self.TEXT_COLUMNS:
+                value = row.get(name)
+                self.text[name][position] = "" if value is None else str(value)
+            if self.path:
+                self._start_saver()
+                self._changed.set()
+
+    def _parse_value(self, raw: str) -> str:
+        if len(raw) >= 2 and raw[0] == raw[-1] and raw[0] in {"'", '"'}:
+            return raw[1:-1]
+        return raw
+
+    def _clause_mask(self, clause: str) -> np.ndarray:
+        match = self._CLAUSE_RE.match(clause)
+        if not match:
+            raise ValueError(f"Invalid filter clause: {clause!r}")
+        column, op, raw_value = match.groups()
+        column = column.lower()
+        value = self._parse_value(raw_value)
+        if op == "=":
+            op = "=="
+
+        if column in self.numeric:
+            data = self.numeric[column][: self.size]
+            try:
+                operand: Any = float(value)
+            except ValueError:
+                raise ValueError(f"Column {column!r} expects a number, got {value!r}") from None
+        elif column in self.text:
+            if op not in {"==", "!="}:
+                raise ValueError(f"Column {column!r} only supports == and !=")
+            data = np.char.lower(self.text[column][: self.size])
+            operand = value.lower()
+        elif column == "symbol":
+            if op not in {"==", "!="}:
+                raise ValueError("Column 'symbol' only supports == and !=")
+            data = self.symbols[: self.size]
+            operand = value.upper()
+        else:
+            raise ValueError(f"Unknown column: {column!r}")
+
+        if op == ">":
+            return data > operand
+        if op == ">=":
+            return data >= operand
+        if op == "<":
+            return data < operand
+        if op == "<=":
+            return data <= operand
+        if op == "==":
+            return data == operand
+        return data != operand
+
+    def _sort_order(self, sort: str, rows: np.ndarray) -> np.ndarray:
+        keys = []
+        for term in reversed([t.strip() for t in sort.split(",") if t.strip()]):
+            descending = term.startswith("-")
+            column = term.lstrip("+-")
+            if column in self.numeric:
+                values = self.numeric[column][rows]
+                # Missing values always sort last, whichever direction is requested.
+                values = np.where(np.isnan(values), np.inf, -values if descending else values)
+            elif column in self.text:
+                values = self.text[column][rows]
+                if descending:
+                    raise ValueError(f"Descending sort is only supported on numeric columns, not {column!r}")
+            elif column == "symbol":
+                values = self.symbols[rows]
+            else:
+                raise ValueError(f"Unknown sort column: {column!r}")
+            keys.append(values)
+        if not keys:
+            return rows
+        return rows[np.lexsort(keys)]
+
+    def query(
+        self,
+        filter_expr: Optional[str] = None,
+        sort: Optional[str] = None,
+        limit: int = 50,
+        columns: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        if columns:
+            unknown = [c for c in columns if c not in self.numeric and c not in self.text]
+            if unknown:
+                raise ValueError(f"Unknown columns: {unknown}")
+        self.maybe_merge()
+        with self._lock:
+            mask = np.ones(self.size, dtype=bool)
+            if filter_expr and filter_expr.strip():
+                for clause in self._AND_RE.split(filter_expr.strip()):
+                    mask &= self._clause_mask(clause)
+            rows = np.flatnonzero(mask)
+            if sort:
+                rows = self._sort_order(sort, rows)
+            total = int(rows.size)
+            rows = rows[:limit]
+
+            selected = columns or list(self.NUMERIC_COLUMNS) + list(self.TEXT_COLUMNS)
+            results = []
+            for position in rows:
+                item: Dict[str, Any] = {"symbol": str(self.symbols[position])}
+                for name in selected:
+                    if name in self.numeric:
+                        value = self.numeric[name][position]
+                        item[name] = None if np.isnan(value) else float(value)
+                    else:
+                        value = str(self.text[name][position])
+                        item[name] = value or None
+                results.append(item)
+        return {"total": total, "results": results}
+
+    def _start_saver(self) -> None:
+        if self._saver is not None and self._saver.is_alive():
+            return
+        self._saver = threading.Thread(target=self._save_periodically, name="metric-store-saver", daemon=True)
+        self._saver.start()
+
+    def _save_periodically(self) -> None:
+        # Saving locks and rewrites the whole file, so it runs here rather than in the request that recorded.
+        while True:
+            self._changed.wait()
+            # Every change made during the interval goes out in one save.
+            time.sleep(self.save_interval_seconds)
+            self._changed.clear()
+            try:
+                self.save()
+            except Exception:
+                self.logger.exception("Metric store save failed | path=%s", self.path)
+
+    def maybe_merge(self) -> None:
+        # Picks up rows other processes saved, at most once per save interval.
+        if not self.path or time.time() - self._last_merged < self.save_interval_seconds:
+            return
+        self._last_merged = time.time()
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime == self._merged_mtime:
+            return
+        with self._file_lock():
+            self._merge_file()
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        # Every API and worker process keeps its own store and saves to the same file; the lock makes
+        # each read-merge-write atomic so no process drops the symbols another one saved.
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", "w") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._file_lock():
+            # Merge first: rows another process saved more recently win, ours fill in the rest.
+            self._merge_file()
+            with self._lock:
+                arrays = {"symbols": self.symbols[: self.size]}
+                arrays.update({f"n__{name}": column[: self.size] for name, column in self.numeric.items()})
+                arrays.update({f"t__{name}": column[: self.size] for name, column in self.text.items()})
+                tmp_path = f"{self.path}.{os.getpid()}.tmp.npz"
+                np.savez(tmp_path, **arrays)
+                os.replace(tmp_path, self.path)
+                self._merged_mtime = os.path.getmtime(self.path)
+        self.logger.info("Metric store saved | path=%s | symbols=%s", self.path, self.size)
+
+    def load(self) -> None:
+        with self._lock:
+            self._allocate(self.INITIAL_CAPACITY)
+        with self._file_lock():
+            self._merge_file()
+        self.logger.info("Metric store loaded | path=%s | symbols=%s", self.path, self.size)
+
+    def _merge_file(self) -> None:
+        # Adopts every row in the file that is newer than ours (by updated_at) or that we lack.
+        if not os.path.exists(self.path):
+            return
+        mtime = os.path.getmtime(self.path)
+        with np.load(self.path, allow_pickle=False) as data:
+            symbols = data["symbols"]
+            # Columns added after the file was written stay NaN / empty.
+            numeric = {name: data[f"n__{name}"] for name in self.NUMERIC_COLUMNS if f"n__{name}" in data}
+            text = {name: data[f"t__{name}"] for name in self.TEXT_COLUMNS if f"t__{name}" in data}
+        updated_at = numeric.get("updated_at")
+        with self._lock:
+            for row, symbol in enumerate(symbols):
+                symbol = str(symbol)
+                position = self._index.get(symbol)
+                if position is not None:
+                    theirs = updated_at[row] if updated_at is not None else np.nan
+                    ours = self.numeric["updated_at"][position]
+                    if np.isnan(theirs) or (not np.isnan(ours) and theirs <= ours):
+                        continue
+                else:
+                    if self.size == self.capacity:
+                        self._grow()
+                    position = self.size
+                    self._index[symbol] = position
+                    self.symbols[position] = symbol
+                    self.size += 1
+                for name in self.NUMERIC_COLUMNS:
+                    self.numeric[name][position] = numeric[name][row] if name in numeric else np.nan
+                for name in self.TEXT_COLUMNS:
+                    self.text[name][position] = text[name][row] if name in text else ""
+            self._merged_mtime = mtime
+
+
+_metric_store: Optional[MetricStore] = None
+
+
+def get_metric_store() -> MetricStore:
+    global _metric_store
+    if _metric_store is None:
+        _metric_store = MetricStore(path=os.getenv("METRIC_STORE_PATH") or None)
+    return _metric_store
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+import orjson
+from redis.exceptions import RedisError
+
+from app.utils import fast_json
+from app.utils.cache import get_redis_client
+from app.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+METRICS_KEY = "llm:metrics"
+METRIC_FIELDS = (
+    "requests",
+    "cache_hits",
+    "coalesced",
+    "generations",
+    "exact_repeats",
+    "repaired",
+    "retries",
+    "invalid_outputs",
+    "wasted_generations",
+    "wasted_tokens",
+    "wasted_ms",
+    "prompt_tokens",
+    "completion_tokens",
+    "prompt_eval_ms",
+    "eval_ms",
+    "batch_prompts",
+    "batch_symbols",
+    "batch_fallbacks",
+)
+
+
+def score_bucket() -> float:
+    return float(os.getenv("LLM_SCORE_BUCKET", "0.5"))
+
+
+def bucket_score(value: float, step: Optional[float] = None) -> float:
+    step = score_bucket() if step is None else step
+    if step <= 0:
+        return value
+    return round(round(value / step) * step, 4)
+
+
+def canonicalize_payload(payload: Dict[str, Any], step: Optional[float] = None) -> Dict[str, Any]:
+    # Snaps scores to a grid and sorts dict keys so near-identical analyses hash and prompt identically.
+    # List order is kept: top_strengths and weaknesses are ranked strongest first, and the prompt says so.
+    step = score_bucket() if step is None else step
+
+    def canonical(value: Any) -> Any:
+        if isinstance(value, bool) or value is None:
+            return value
+        if isinstance(value, (int, float)):
+            return bucket_score(value, step)
+        if isinstance(value, dict):
+            return {key: canonical(value[key]) for key in sorted(value)}
+        if isinstance(value, (list, tuple)):
+            return [canonical(item) for item in value]
+        return value
+
+    return canonical(payload)
+
+
+def narration_key(payload: Dict[str, Any]) -> str:
+    payload_str = json.dumps(payload, separators=(",", ":"), ensure_ascii=True, sort_keys=True)
+    payload_hash = hashlib.sha256(payload_str.encode("utf-8")).hexdigest()[:12]
+    return f"llm:{payload.get('symbol')}:{payload_hash}"
+
+
+class NarrationCache:
+    # Redis-backed narration cache plus an in-flight marker per payload, so identical payloads
+    # queued close together cost one generation. Without Redis every task generates on its own.
+    def __init__(self, client: Any, ttl_seconds: int = 86400, lock_seconds: int = 300) -> None:
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.lock_seconds = lock_seconds
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.client is None:
+            return None
+        try:
+            value = self.client.get(key)
+        except RedisError:
+            logger.warning("Narration cache read failed | key=%s", key, exc_info=True)
+            return None
+        if value is None:
+            return None
+        try:
+            return fast_json.loads(value)
+        except orjson.JSONDecodeError:
+            return None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        if self.client is None:
+            return
+        try:
+            self.client.setex(key, self.ttl_seconds, fast_json.dumps(value))
+        except RedisError:
+            logger.warning("Narration cache write failed | key=%s", key, exc_info=True)
+
+    def claim(self, key: str) -> bool:
+        # True when this task should generate; False when another worker already is.
+        if self.client is None:
+            return True
+        try:
+            return bool(self.client.set(f"{key}:inflight", "1", nx=True, ex=self.lock_seconds))
+        except RedisError:
+            logger.warning("Narration claim failed | key=%s", key, exc_info=True)
+            return True
+
+    def claim_recheck(self, key: str) -> bool:
+        # One delayed re-check per in-flight key covers every waiter, since it drains the waiter list.
+        if self.client is None:
+            return True
+        try:
+            return bool(self.client.set(f"{key}:recheck", "1", nx=True, ex=self.lock_seconds))
+        except RedisError:
+            logger.warning("Narration recheck claim failed | key=%s", key, exc_info=True)
+            return True
+
+    def release(self, key: str) -> None:
+        if self.client is None:
+            return
+        try:
+            self.client.delete(f"{key}:inflight")
+        except RedisError:
+            logger.warning("Narration release failed | key=%s", key, exc_info=True)
+
+    def wait(self, key: str, analysis_result_id: str) -> None:
+        if self.client is None:
+            return
+        pipe = self.client.pipeline()
+        pipe.rpush(f"{key}:waiters", analysis_result_id)
+        pipe.expire(f"{key}:waiters", self.lock_seconds * 2)
+        try:
+            pipe.execute()
+        except RedisError:
+            logger.warning("Narration wait failed | key=%s", key, exc_info=True)
+
+    def seen_exact(self, raw_key: str) -> bool:
+        # Shadow marker for the unbucketed payload, used to measure what bucketing adds.
+        if self.client is None:
+            return False
+        try:
+            return not self.client.set(f"{raw_key}:exact", "1", nx=True, ex=self.ttl_seconds)
+        except RedisError:
+            return False
+
+    def record(self, **counts: int) -> None:
+        if self.client is None:
+            return
+        pipe = self.client.pipeline()
+        for field, amount in counts.items():
+            if amount:
+                pipe.hincrby(METRICS_KEY, field, amount)
+        try:
+            pipe.execute()
+        except RedisError:
+            logger.warning("Narration metrics update failed", exc_info=True)
+
+    def stats(self) -> Dict[str, Any]:
+        raw: Dict[Any, Any] = {}
+        if self.client is not None:
+            try:
+                raw = self.client.hgetall(METRICS_KEY) or {}
+            except RedisError:
+                logger.warning("Narration metrics read failed", exc_info=True)
+        counts = {field: 0 for field in METRIC_FIELDS}
+        for field, value in raw.items():
+            name = field.decode("utf-8") if isinstance(field, bytes) else str(field)
+            if name in counts:
+                counts[name] = int(value)
+        requests = counts["requests"]
+        hit_rate = (counts["cache_hits"] + counts["coalesced"]) / requests if requests else 0.0
+        exact_hit_rate = counts["exact_repeats"] / requests if requests else 0.0
+        generations = counts["generations"]
+        return {
+            **counts,
+            "score_bucket": score_bucket(),
+            "hit_rate": round(hit_rate, 4),
+            "exact_hit_rate": round(exact_hit_rate, 4),
+            "hit_rate_gained": round(hit_rate - exact_hit_rate, 4),
+            # Model calls whose output had to be thrown away, per narration asked of the model.
+            "waste_rate": round(counts["wasted_generations"] / generations, 4) if generations else 0.0,
+            "avg_prompt_tokens": round(counts["prompt_tokens"] / generations, 1) if generations else 0.0,
+            "avg_completion_tokens": round(counts["completion_tokens"] / generations, 1) if generations else 0.0,
+            "avg_batch_symbols": (
+                round(counts["batch_symbols"] / counts["batch_prompts"], 2) if counts["batch_prompts"] else 0.0
+            ),
+        }
+
+    def drain(self, key: str) -> List[str]:
+        if self.client is None:
+            return []
+        pipe = self.client.pipeline()
+        pipe.lrange(f"{key}:waiters", 0, -1)
+        pipe.delete(f"{key}:waiters")
+        try:
+            waiters, _ = pipe.execute()
+        except RedisError:
+            logger.warning("Narration drain failed | key=%s", key, exc_info=True)
+            return []
+        return [w.decode("utf-8") if isinstance(w, bytes) else str(w) for w in waiters]
+
+
+def get_narration_cache() -> NarrationCache:
+    return NarrationCache(
+        get_redis_client(),
+        ttl_seconds=int(os.getenv("LLM_CACHE_TTL_SECONDS", "86400")),
+        lock_seconds=int(os.getenv("LLM_INFLIGHT_TTL_SECONDS", "300")),
+    )
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import math
+import os
+from typing import Any, Dict, List, Tuple
+
+
+# Static instructions sent as Ollama's system prompt. It never changes between calls, so a warm
+# model reuses its evaluated prefix and only the data lines below it cost prompt evaluation.
+SYSTEM_PROMPT = (
+    "You are a professional financial analyst.\n\n"
+    "Strict rules:\n"
+    "- Only use the provided data.\n"
+    "- Do NOT fabricate numbers.\n"
+    "- Do NOT give investment advice.\n"
+    "- Output must be valid JSON only.\n"
+    "- Do NOT include markdown, code fences, or extra text.\n\n"
+    "Return exactly this JSON structure:\n"
+    "{\n"
+    "  \"executive_summary\": \"...\",\n"
+    "  \"bull_case\": \"...\",\n"
+    "  \"bear_case\": \"...\",\n"
+    "  \"risk_assessment\": \"...\",\n"
+    "  \"confidence\": \"Low/Medium/High\"\n"
+    "}\n\n"
+    "The data lists key=value pairs separated by semicolons, one section per line; lists are comma separated."
+)
+RETRY_SYSTEM_PROMPT = (
+    "Describe the data as one JSON object with exactly these string keys: "
+    "executive_summary, bull_case, bear_case, risk_assessment, confidence (Low, Medium or High). "
+    "Use only the data and output nothing but the JSON."
+)
+# The same rules for several symbols at once; the answer is one array item per data block.
+BATCH_SYSTEM_PROMPT = (
+    "You are a professional financial analyst.\n\n"
+    "Strict rules:\n"
+    "- Only use the provided data.\n"
+    "- Do NOT fabricate numbers.\n"
+    "- Do NOT give investment advice.\n"
+    "- Output must be valid JSON only.\n"
+    "- Do NOT include markdown, code fences, or extra text.\n\n"
+    "The data has one block per symbol, headed [SYMBOL]. Return a JSON array with one object per block, "
+    "in the same order:\n"
+    "[\n"
+    "  {\n"
+    "    \"symbol\": \"...\",\n"
+    "    \"executive_summary\": \"...\",\n"
+    "    \"bull_case\": \"...\",\n"
+    "    \"bear_case\": \"...\",\n"
+    "    \"risk_assessment\": \"...\",\n"
+    "    \"confidence\": \"Low/Medium/High\"\n"
+    "  }\n"
+    "]\n\n"
+    "Each block lists key=value pairs separated by semicolons, one section per line; lists are comma separated."
+)
+# Values kept first when the budget is tight; anything unlisted goes before the lists of names.
+FIELD_PRIORITY = (
+    "symbol",
+    "overall_score",
+    "fundamental_score",
+    "technical_score",
+    "fundamental.risk_level",
+    "technical.trend_direction",
+    "technical.entry_signal",
+    "fundamental.profitability",
+    "fundamental.growth",
+    "fundamental.financial_strength",
+    "fundamental.valuation",
+    "technical.momentum_strength",
+    "technical.volatility",
+)
+LIST_PRIORITY = len(FIELD_PRIORITY) + 1
+
+
+def prompt_token_budget() -> int:
+    return int(os.getenv("LLM_PROMPT_TOKEN_BUDGET", "384"))
+
+
+def estimate_tokens(text: str) -> int:
+    # Close enough for English and key=value data on llama-family tokenizers; no tokenizer is shipped.
+    return (len(text) + 3) // 4
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float):
+        if math.isnan(value):
+            return "nan"
+        return f"{value:.2f}".rstrip("0").rstrip(".")
+    if isinstance(value, (list, tuple)):
+        return ",".join(_format_value(item) for item in value)
+    return str(value)
+
+
+def compact_items(data: Dict[str, Any], prefix: str = "") -> List[Tuple[str, str]]:
+    # (dotted key, "name=value") pairs in sorted key order; None and empty values carry nothing and are dropped.
+    items: List[Tuple[str, str]] = []
+    for key in sorted(data):
+        value = data[key]
+        if isinstance(value, dict):
+            items.extend(compact_items(value, f"{prefix}{key}."))
+            continue
+        if value is None or value == [] or value == "":
+            continue
+        items.append((f"{prefix}{key}", f"{key}={_format_value(value)}"))
+    return items
+
+
+def _render(items: List[Tuple[str, str]]) -> str:
+    # Top-level values share the first line; each nested section gets one "section: a=1; b=2" line.
+    sections: Dict[str, List[str]] = {}
+    for key, item in items:
+        section, _, _ = key.rpartition(".")
+        sections.setdefault(section, []).append(item)
+    lines = ["; ".join(sections.pop(""))] if "" in sections else []
+    lines += [f"{section}: " + "; ".join(values) for section, values in sections.items()]
+    return "\n".join(lines)
+
+
+def compact_data(data: Dict[str, Any], token_budget: int) -> str:
+    # Drops the least important values until the data fits; the symbol is always kept.
+    items = compact_items(data)
+    ranked = sorted(
+        items,
+        key=lambda item: (
+            FIELD_PRIORITY.index(item[0])
+            if item[0] in FIELD_PRIORITY
+            else LIST_PRIORITY if "," in item[1] else LIST_PRIORITY - 1
+        ),
+    )
+    kept = set()
+    sections = set()
+    used = 0
+    for key, item in ranked:
+        section = key.rpartition(".")[0]
+        cost = estimate_tokens(item) + 1
+        if section not in sections:
+            cost += estimate_tokens(f"{section}: ")
+        if used + cost > token_budget and key != "symbol":
+            break
+        kept.add(key)
+        sections.add(section)
+        used += cost
+    return _render([(key, item) for key, item in items if key in kept])
+
+
+def build_prompt(data: Dict[str, Any], retry: bool = False) -> Tuple[str, str]:
+    # (system, prompt). The retry gets the short instructions and half the data budget.
+    budget = prompt_token_budget()
+    if retry:
+        return RETRY_SYSTEM_PROMPT, "Data:\n" + compact_data(data, budget // 2)
+    budget -= estimate_tokens(SYSTEM_PROMPT)
+    return SYSTEM_PROMPT, "Data:\n" + compact_data(data, budget)
+
+
+def build_batch_prompt(payloads: List[Dict[str, Any]]) -> Tuple[str, str]:
+    # (system, prompt) for several symbols; each block gets the data budget a single prompt would.
+    budget = prompt_token_budget() - estimate_tokens(SYSTEM_PROMPT)
+    blocks = [f"[{payload.get('symbol')}]\n" + compact_data(payload, budget) for payload in payloads]
+    return BATCH_SYSTEM_PROMPT, "Data:\n" + "\n\n".join(blocks)
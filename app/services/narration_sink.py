@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import os
+import socket
+import threading
+import time
+from datetime import UTC, datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from redis.exceptions import RedisError
+from sqlalchemy import and_, bindparam, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models.analysis_result import AnalysisResult
+from app.services.llm_stream import NARRATION_COLUMNS, publish_narration
+from app.utils import fast_json
+from app.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+FINAL_STATUSES = ("completed", "failed")
+# Each sink journals into its own list and registers it in JOURNALS_KEY; a journal whose owner's
+# heartbeat has expired is claimed by the next sink to recover.
+JOURNAL_PREFIX = "llm:sink:journal"
+JOURNALS_KEY = "llm:sink:journals"
+HEARTBEAT_PREFIX = "llm:sink:alive"
+RESULT_TABLE = AnalysisResult.__table__
+# Spelled out rather than NOT IN, whose expanding parameter cannot run as executemany.
+NOT_FINAL = or_(
+    RESULT_TABLE.c.llm_status.is_(None),
+    and_(*(RESULT_TABLE.c.llm_status != status for status in FINAL_STATUSES)),
+)
+# One statement for every buffered row; rows that are already final are left alone, so a replayed
+# journal entry is a no-op.
+BULK_UPDATE = (
+    update(RESULT_TABLE)
+    .where(RESULT_TABLE.c.id == bindparam("target_id"), NOT_FINAL)
+    .values(
+        llm_status=bindparam("llm_status"),
+        llm_model=bindparam("llm_model"),
+        llm_created_at=bindparam("llm_created_at"),
+        **{column: bindparam(column) for column in NARRATION_COLUMNS.values()},
+    )
+)
+
+
+def narration_entry(
+    analysis_result_id: str, status: str, model_used: Optional[str], columns: Dict[str, Any]
+) -> Dict[str, Any]:
+    return {
+        "id": analysis_result_id,
+        "status": status,
+        "model": model_used,
+        "columns": columns,
+        "created_at": datetime.now(UTC).isoformat(),
+    }
+
+
+def journal_key(worker_id: str) -> str:
+    return f"{JOURNAL_PREFIX}:{worker_id}"
+
+
+class NarrationSink:
+    # Buffers finished narrations and writes them with one bulk UPDATE per flush. Each entry is
+    # journaled in Redis before the task returns and removed only after its flush commits, so a
+    # crashed worker's entries are replayed by the next worker to start (at least once).
+    def __init__(
+        self,
+        write: Callable[[Callable[[Session], Any]], Any],
+        client: Any,
+        batch_size: int = 0,
+        flush_interval_seconds: float = 1.0,
+        worker_id: Optional[str] = None,
+        heartbeat_seconds: float = 30.0,
+    ) -> None:
+        self.write = write
+        self.client = client
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self.journal_key = journal_key(self.worker_id)
+        # The heartbeat outlives several flush intervals, so only a dead worker's journal is claimed.
+        self.heartbeat_seconds = max(heartbeat_seconds, flush_interval_seconds * 10)
+        self._buffer: List[Tuple[bytes, Dict[str, Any]]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    @property
+    def buffering(self) -> bool:
+        # Without Redis there is no journal, and buffering would lose narrations on a crash.
+        return self.batch_size > 0 and self.client is not None
+
+    def submit(self, entries: List[Dict[str, Any]]) -> Optional[int]:
+        # Rows updated when written straight away; None once the entries are journaled and buffered.
+        if not entries:
+            return 0
+        if not self.buffering:
+            return self._apply(entries)
+        raws = [fast_json.dumps(entry) for entry in entries]
+        try:
+            self._heartbeat()
+            self.client.rpush(self.journal_key, *raws)
+        except RedisError:
+            logger.warning("Narration journal write failed; writing directly", exc_info=True)
+            return self._apply(entries)
+        self._enqueue(list(zip(raws, entries)))
+        return None
+
+    def recover(self) -> int:
+        # Re-buffers entries that workers which are no longer alive journaled but never flushed.
+        if self.client is None:
+            return 0
+        try:
+            self._heartbeat()
+            claimed = []
+            for member in self.client.smembers(JOURNALS_KEY):
+                worker_id = member.decode("utf-8") if isinstance(member, bytes) else member
+                if worker_id == self.worker_id or self.client.exists(f"{HEARTBEAT_PREFIX}:{worker_id}"):
+                    continue
+                claimed += self._claim(worker_id)
+        except RedisError:
+            logger.warning("Narration journal recovery failed", exc_info=True)
+            return 0
+        if claimed:
+            logger.info("Replaying narration journal | entries=%s", len(claimed))
+            self._enqueue([(raw, fast_json.loads(raw)) for raw in claimed])
+        return len(claimed)
+
+    def _claim(self, worker_id: str) -> List[bytes]:
+        # Each entry moves atomically into our own journal, so two recovering sinks never share one.
+        claimed = []
+        source = journal_key(worker_id)
+        while True:
+            raw = self.client.lmove(source, self.journal_key, "LEFT", "RIGHT")
+            if raw is None:
+                break
+            claimed.append(raw)
+        self.client.srem(JOURNALS_KEY, worker_id)
+        return claimed
+
+    def _heartbeat(self) -> None:
+        self.client.set(f"{HEARTBEAT_PREFIX}:{self.worker_id}", 1, ex=int(self.heartbeat_seconds))
+        self.client.sadd(JOURNALS_KEY, self.worker_id)
+
+    def _enqueue(self, items: List[Tuple[bytes, Dict[str, Any]]]) -> None:
+        with self._lock:
+            self._buffer.extend(items)
+            self._start_flusher()
+            if len(self._buffer) >= self.batch_size:
+                self._wake.set()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                items, self._buffer = self._buffer, []
+            if not items:
+                return 0
+            started = time.perf_counter()
+            try:
+                rows = self._apply([entry for _, entry in items])
+                self._forget([raw for raw, _ in items])
+            except Exception:
+                # One bad entry must not sink the batch; a failing entry stays journaled for the next replay.
+                logger.exception("Narration flush failed, retrying per entry | entries=%s", len(items))
+                rows = 0
+                for raw, entry in items:
+                    try:
+                        rows += self._apply([entry])
+                        self._forget([raw])
+                    except Exception:
+                        logger.exception("Narration entry not written | analysis_result_id=%s", entry["id"])
+            logger.info(
+                "Narration flush | entries=%s | rows=%s | elapsed_ms=%.1f",
+                len(items),
+                rows,
+                (time.perf_counter() - started) * 1000,
+            )
+            return len(items)
+
+    def _apply(self, entries: List[Dict[str, Any]]) -> int:
+        def apply(db: Session) -> List[Dict[str, Any]]:
+            # Lock the rows that are still open; only they are updated, and only they are announced.
+            open_ids = set(
+                db.scalars(
+                    select(RESULT_TABLE.c.id)
+                    .where(RESULT_TABLE.c.id.in_({entry["id"] for entry in entries}), NOT_FINAL)
+                    .with_for_update()
+                )
+            )
+            applied: Dict[str, Dict[str, Any]] = {}
+            for entry in entries:
+                # The first entry for a row makes it final; the guarded UPDATE would skip any later one.
+                if entry["id"] in open_ids and entry["id"] not in applied:
+                    applied[entry["id"]] = entry
+            if applied:
+                db.execute(
+                    BULK_UPDATE,
+                    [
+                        {
+                            "target_id": entry["id"],
+                            "llm_status": entry["status"],
+                            "llm_model": entry["model"],
+                            "llm_created_at": datetime.fromisoformat(entry["created_at"]),
+                            **{column: entry["columns"].get(column) for column in NARRATION_COLUMNS.values()},
+                        }
+                        for entry in applied.values()
+                    ],
+                )
+            return list(applied.values())
+
+        applied = self.write(apply)
+        # Subscribers hear about a row only once it is committed, and never about a replay of a final one.
+        for entry in applied:
+            publish_narration(self.client, entry["id"], entry["status"], entry["columns"], final=True)
+        return len(applied)
+
+    def _forget(self, raws: List[bytes]) -> None:
+        if not raws or self.client is None:
+            return
+        pipe = self.client.pipeline()
+        for raw in raws:
+            pipe.lrem(self.journal_key, 1, raw)
+        try:
+            pipe.execute()
+        except RedisError:
+            # Left-over entries replay as no-ops: their rows are already final.
+            logger.warning("Narration journal cleanup failed", exc_info=True)
+
+    def _start_flusher(self) -> None:
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        self._flusher = threading.Thread(target=self._flush_periodically, name="narration-sink", daemon=True)
+        self._flusher.start()
+
+    def _flush_periodically(self) -> None:
+        while True:
+            self._wake.wait(self.flush_interval_seconds)
+            self._wake.clear()
+            try:
+                self._heartbeat()
+            except RedisError:
+                logger.warning("Narration sink heartbeat failed", exc_info=True)
+            self.flush()
+
@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import requests
+
+from app.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class NoOllamaHostAvailable(RuntimeError):
+    pass
+
+
+class OllamaHost:
+    def __init__(self, url: str, max_concurrency: int = 1) -> None:
+        root = url.rstrip("/")
+        if root.endswith("/api/generate"):
+            root = root[: -len("/api/generate")]
+        self.url = root
+        self.max_concurrency = max(1, max_concurrency)
+        self.in_flight = 0
+        self.failures = 0
+        # Two separate ejections: failed generations, and a failed /api/tags check. A good tags answer
+        # only lifts the second, since it says nothing about whether /api/generate works.
+        self.ejected_until = 0.0
+        self.unhealthy_until = 0.0
+        # None until the first /api/tags answer; an unknown inventory is tried with the requested model.
+        self.models: Optional[List[str]] = None
+
+    @property
+    def generate_url(self) -> str:
+        return f"{self.url}/api/generate"
+
+    @property
+    def tags_url(self) -> str:
+        return f"{self.url}/api/tags"
+
+    def available(self, now: float) -> bool:
+        return self.ejected_until <= now and self.unhealthy_until <= now
+
+    def model_for(self, model: str) -> Optional[str]:
+        # The requested model when this host has it (or might), else the host's first model.
+        if self.models is None or model in self.models:
+            return model
+        return self.models[0] if self.models else None
+
+
+def parse_hosts(spec: str) -> List[OllamaHost]:
+    # "http://gpu1:11434=4,http://cpu1:11434=1": the number is how many generations the host runs at once.
+    hosts = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        url, _, limit = item.rpartition("=") if "=" in item else (item, "", "")
+        hosts.append(OllamaHost(url, int(limit) if limit else 1))
+    return hosts
+
+
+class OllamaPool:
+    def __init__(
+        self,
+        hosts: List[OllamaHost],
+        refresh_seconds: float = 30.0,
+        eject_seconds: float = 30.0,
+        failure_threshold: int = 2,
+        acquire_timeout: float = 300.0,
+    ) -> None:
+        if not hosts:
+            raise ValueError("OllamaPool needs at least one host")
+        self.hosts = hosts
+        self.refresh_seconds = refresh_seconds
+        self.eject_seconds = eject_seconds
+        self.failure_threshold = failure_threshold
+        self.acquire_timeout = acquire_timeout
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._refresh_loop, name="ollama-pool", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+
+    def _refresh_loop(self) -> None:
+        while True:
+            self.refresh()
+            if self._stop.wait(self.refresh_seconds):
+                return
+
+    def refresh(self) -> None:
+        for host in self.hosts:
+            self.refresh_host(host)
+
+    def refresh_host(self, host: OllamaHost) -> None:
+        try:
+            response = requests.get(host.tags_url, timeout=5)
+            response.raise_for_status()
+            models = [m.get("name") for m in response.json().get("models", []) if m.get("name")]
+        except Exception:
+            logger.warning("Ollama host unhealthy | host=%s", host.url, exc_info=True)
+            with self._condition:
+                host.unhealthy_until = time.monotonic() + self.eject_seconds
+            return
+        with self._condition:
+            host.models = models
+            host.unhealthy_until = 0.0
+            self._condition.notify_all()
+
+    def _record_failure(self, host: OllamaHost) -> None:
+        # The ejection runs its course; after it one trial request either resets failures or ejects again.
+        host.failures += 1
+        if host.failures >= self.failure_threshold:
+            host.ejected_until = time.monotonic() + self.eject_seconds
+            logger.warning("Ejecting Ollama host | host=%s | seconds=%s", host.url, self.eject_seconds)
+
+    def _acquire(self, model: str, tried: Set[Tuple[str, str]]) -> Tuple[OllamaHost, str]:
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                eligible = []
+                for host in self.hosts:
+                    chosen = host.model_for(model)
+                    if chosen is None or not host.available(now) or (host.url, chosen) in tried:
+                        continue
+                    eligible.append((host, chosen))
+                if not eligible:
+                    raise NoOllamaHostAvailable(f"No healthy Ollama host can serve {model}")
+
+                free = [(h, m) for h, m in eligible if h.in_flight < h.max_concurrency]
+                if free:
+                    # Hosts with the requested model first, then the lowest share of capacity in use.
+                    host, chosen = min(
+                        free,
+                        key=lambda item: (item[1] != model, item[0].in_flight / item[0].max_concurrency),
+                    )
+                    host.in_flight += 1
+                    return host, chosen
+
+                remaining = deadline - now
+                if remaining <= 0:
+                    raise NoOllamaHostAvailable(f"Timed out waiting for an Ollama slot for {model}")
+                self._condition.wait(remaining)
+
+    def _release(self, host: OllamaHost, ok: bool) -> None:
+        with self._condition:
+            host.in_flight -= 1
+            if ok:
+                host.failures = 0
+            else:
+                self._record_failure(host)
+            self._condition.notify_all()
+
+    def _send(
+        self, model: str, body: Dict[str, Any], timeout: float, stream: bool = False
+    ) -> Tuple[requests.Response, OllamaHost, str]:
+        # Returns with the host's slot still held; the caller releases it once the body is read.
+        tried: Set[Tuple[str, str]] = set()
+        while True:
+            host, chosen = self._acquire(model, tried)
+            tried.add((host.url, chosen))
+            try:
+                response = requests.post(
+                    host.generate_url, json={**body, "model": chosen}, timeout=timeout, stream=stream
+                )
+            except requests.RequestException:
+                logger.warning("Ollama request failed | host=%s", host.url, exc_info=True)
+                self._release(host, ok=False)
+                continue
+
+            if response.status_code == 404 and "not found" in response.text.lower():
+                # The inventory was stale; refresh it so the next pick can fall back on this host too.
+                logger.warning("Model not found | host=%s | model=%s", host.url, chosen)
+                self._release(host, ok=True)
+                self.refresh_host(host)
+                continue
+            if response.status_code >= 500:
+                logger.error("Ollama HTTP error | host=%s | status=%s", host.url, response.status_code)
+                self._release(host, ok=False)
+                continue
+            if response.status_code >= 400:
+                logger.error("LLM HTTP error | status=%s | body=%s", response.status_code, response.text)
+                self._release(host, ok=True)
+                response.raise_for_status()
+            return response, host, chosen
+
+    def generate(self, model: str, body: Dict[str, Any], timeout: float = 90) -> Tuple[Dict[str, Any], str]:
+        response, host, chosen = self._send(model, {**body, "stream": False}, timeout)
+        self._release(host, ok=True)
+        return response.json(), chosen
+
+    def stream(self, model: str, body: Dict[str, Any], timeout: float = 90) -> "OllamaStream":
+        # timeout bounds the wait between chunks rather than the whole generation.
+        response, host, chosen = self._send(model, {**body, "stream": True}, timeout, stream=True)
+        return OllamaStream(self, host, chosen, response)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._condition:
+            return [
+                {
+                    "url": host.url,
+                    "max_concurrency": host.max_concurrency,
+                    "in_flight": host.in_flight,
+                    "healthy": host.available(now),
+                    "models": host.models,
+                }
+                for host in self.hosts
+            ]
+
+
+class OllamaStream:
+    def __init__(self, pool: OllamaPool, host: OllamaHost, model: str, response: requests.Response) -> None:
+        self.pool = pool
+        self.host = host
+        self.model = model
+        self.response = response
+        # The final chunk's counters (eval_count, total_duration, ...) once the stream is done.
+        self.stats: Dict[str, Any] = {}
+        self._closed = False
+
+    def __iter__(self) -> Iterator[str]:
+        # Only the host's own faults count against it: a dropped or malformed stream, or an error chunk.
+        # A consumer that raises or stops reading early hands the slot back as healthy.
+        ok = True
+        try:
+            for line in self.response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    ok = False
+                    raise RuntimeError(chunk["error"])
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    self.stats = chunk
+                    break
+        except (requests.RequestException, ValueError):
+            ok = False
+            raise
+        finally:
+            self.close(ok)
+
+    def close(self, ok: bool = True) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self.response.close()
+        self.pool._release(self.host, ok)
+
+
+_pools: Dict[str, OllamaPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_ollama_pool(default_url: str = "http://localhost:11434") -> OllamaPool:
+    spec = os.getenv("OLLAMA_HOSTS") or os.getenv("OLLAMA_BASE_URL") or default_url
+    with _pools_lock:
+        if spec not in _pools:
+            _pools[spec] = OllamaPool(
+                parse_hosts(spec),
+                refresh_seconds=float(os.getenv("OLLAMA_REFRESH_SECONDS", "30")),
+                eject_seconds=float(os.getenv("OLLAMA_EJECT_SECONDS", "30")),
+                failure_threshold=int(os.getenv("OLLAMA_FAILURE_THRESHOLD", "2")),
+                acquire_timeout=float(os.getenv("OLLAMA_ACQUIRE_TIMEOUT", "300")),
+            )
+        return _pools[spec]
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.services.analysis_orchestrator import AnalysisOrchestrator
+from app.services.fundamental_engine import FundamentalEngine
+from app.services.technical_engine import TechnicalEngine
+
+
+class ScoreReweighter:
+    WEIGHT_GROUPS = (
+        "blend",
+        "fundamental_categories",
+        "technical_categories",
+        "fundamental_metrics",
+        "technical_indicators",
+    )
+
+    def __init__(self, fundamental_json: Optional[Dict[str, Any]], technical_json: Optional[Dict[str, Any]]) -> None:
+        fundamentals = fundamental_json or {}
+        technicals = technical_json or {}
+
+        self.fundamental_categories = list(FundamentalEngine.CATEGORY_METRICS)
+        self.fundamental_metrics = [m for keys in FundamentalEngine.CATEGORY_METRICS.values() for m in keys]
+        self.technical_categories = list(TechnicalEngine.CATEGORY_INDICATORS)
+        self.technical_indicators = [i for keys in TechnicalEngine.CATEGORY_INDICATORS.values() for i in keys]
+
+        metrics = fundamentals.get("metrics", {}) or {}
+        indicators = technicals.get("indicators", {}) or {}
+        self.fundamental_scores = self._score_vector(metrics, self.fundamental_metrics)
+        self.technical_scores = self._score_vector(indicators, self.technical_indicators)
+        self.fundamental_membership = self._membership(FundamentalEngine.CATEGORY_METRICS, self.fundamental_metrics)
+        self.technical_membership = self._membership(TechnicalEngine.CATEGORY_INDICATORS, self.technical_indicators)
+
+    def _score_vector(self, items: Dict[str, Any], names: List[str]) -> np.ndarray:
+        scores = []
+        for name in names:
+            score = (items.get(name, {}) or {}).get("score")
+            scores.append(np.nan if score is None else float(score))
+        return np.array(scores, dtype=float)
+
+    def _membership(self, categories: Dict[str, List[str]], names: List[str]) -> np.ndarray:
+        membership = np.zeros((len(categories), len(names)))
+        for row, keys in enumerate(categories.values()):
+            for key in keys:
+                membership[row, names.index(key)] = 1.0
+        return membership
+
+    def _weight_matrix(
+        self,
+        grid: List[Dict[str, Dict[str, float]]],
+        group: str,
+        names: List[str],
+        defaults: Dict[str, float],
+    ) -> np.ndarray:
+        matrix = np.array([[defaults.get(name, 1.0) for name in names]] * len(grid), dtype=float)
+        for row, weights in enumerate(grid):
+            overrides = weights.get(group) or {}
+            unknown = set(overrides) - set(names)
+            if unknown:
+                raise ValueError(f"Unknown {group} keys: {sorted(unknown)}")
+            for name, value in overrides.items():
+                if value < 0:
+                    raise ValueError(f"Weights must be non-negative: {group}.{name}={value}")
+                matrix[row, names.index(name)] = value
+        return matrix
+
+    def _weighted_mean(self, values: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        # Missing values drop out of both numerator and denominator, like the engines' weight_sum logic.
+        valid = ~np.isnan(values)
+        effective = np.where(valid, weights, 0.0)
+        total = effective.sum(axis=-1)
+        weighted = (np.where(valid, values, 0.0) * effective).sum(axis=-1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(total > 0, weighted / np.where(total > 0, total, 1.0), np.nan)
+
+    def _side_scores(
+        self,
+        scores: np.ndarray,
+        membership: np.ndarray,
+        item_weights: np.ndarray,
+        category_weights: np.ndarray,
+    ) -> Dict[str, np.ndarray]:
+        # (grid, category, item) weights restricted to each category's members.
+        per_category = item_weights[:, None, :] * membership[None, :, :]
+        category_scores = self._weighted_mean(np.broadcast_to(scores, per_category.shape), per_category)
+        overall = self._weighted_mean(category_scores, category_weights)
+        return {"categories": category_scores, "overall": overall}
+
+    def evaluate(self, grid: List[Dict[str, Dict[str, float]]]) -> List[Dict[str, Any]]:
+        if not grid:
+            grid = [{}]
+
+        fundamental = self._side_scores(
+            self.fundamental_scores,
+            self.fundamental_membership,
+            self._weight_matrix(grid, "fundamental_metrics", self.fundamental_metrics, {}),
+            self._weight_matrix(
+                grid, "fundamental_categories", self.fundamental_categories, FundamentalEngine.CATEGORY_WEIGHTS
+            ),
+        )
+        technical = self._side_scores(
+            self.technical_scores,
+            self.technical_membership,
+            self._weight_matrix(grid, "technical_indicators", self.technical_indicators, {}),
+            self._weight_matrix(
+                grid, "technical_categories", self.technical_categories, TechnicalEngine.CATEGORY_WEIGHTS
+            ),
+        )
+        blend = self._weight_matrix(grid, "blend", ["fundamental", "technical"], AnalysisOrchestrator.BLEND_WEIGHTS)
+        sides = np.stack([fundamental["overall"], technical["overall"]], axis=-1)
+        overall = self._weighted_mean(sides, blend)
+
+        has_fundamental = ~np.isnan(fundamental["overall"])
+        has_technical = ~np.isnan(technical["overall"])
+        thresholds = AnalysisOrchestrator.BIAS_THRESHOLDS
+        bias = np.select(
+            [overall >= threshold for threshold, _ in thresholds] + [overall < thresholds[-1][0]],
+            [label for _, label in thresholds] + ["Bearish"],
+            default="Neutral",
+        )
+        confidence = np.where(
+            has_fundamental & has_technical, "High", np.where(has_fundamental | has_technical, "Medium", "Low")
+        )
+
+        def _value(array: np.ndarray, index: Any) -> Optional[float]:
+            value = array[index]
+            return None if np.isnan(value) else float(value)
+
+        results = []
+        for row, weights in enumerate(grid):
+            results.append(
+                {
+                    "weights": weights,
+                    "fundamental": {
+                        "category_scores": {
+                            name: _value(fundamental["categories"], (row, col))
+                            for col, name in enumerate(self.fundamental_categories)
+                        },
+                        "overall_score": _value(fundamental["overall"], row),
+                    },
+                    "technical": {
+                        "category_scores": {
+                            name: _value(technical["categories"], (row, col))
+                            for col, name in enumerate(self.technical_categories)
+                        },
+                        "overall_technical_score": _value(technical["overall"], row),
+                    },
+                    "combined": {
+                        "overall_score": _value(overall, row),
+                        "fundamental_score": _value(fundamental["overall"], row),
+                        "technical_score": _value(technical["overall"], row),
+                        "investment_bias": str(bias[row]),
+                        "confidence": str(confidence[row]),
+                    },
+                }
+            )
+        return results
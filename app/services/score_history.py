@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.score_history import ScoreHistory
+
+
+INTERVALS = ("day", "week", "month")
+SCORE_COLUMNS = ("overall_score", "fundamental_score", "technical_score")
+UPDATE_COLUMNS = (
+    *SCORE_COLUMNS,
+    "investment_bias",
+    "fundamental_category_scores",
+    "technical_category_scores",
+    "analysis_id",
+    "snapshot_at",
+)
+# Longest span served at each resolution when the caller asks for interval=auto.
+AUTO_INTERVAL_SPANS = ((timedelta(days=180), "day"), (timedelta(days=3 * 365), "week"))
+
+
+def score_history_values(
+    symbol: str,
+    analysis_id: Optional[str],
+    snapshot_at: datetime,
+    result: Dict[str, Any],
+) -> Dict[str, Any]:
+    combined = result.get("combined_analysis") or {}
+    fundamental = result.get("fundamental_analysis") or {}
+    technical = result.get("technical_analysis") or {}
+    return {
+        "symbol": symbol.upper(),
+        "as_of_date": snapshot_at.date(),
+        "overall_score": combined.get("overall_score"),
+        "fundamental_score": combined.get("fundamental_score", fundamental.get("overall_score")),
+        "technical_score": combined.get("technical_score", technical.get("overall_technical_score")),
+        "investment_bias": combined.get("investment_bias"),
+        "fundamental_category_scores": fundamental.get("category_scores"),
+        "technical_category_scores": technical.get("category_scores"),
+        "analysis_id": analysis_id,
+        "snapshot_at": snapshot_at.replace(tzinfo=None),
+    }
+
+
+def upsert_score_history(db: Session, rows: Iterable[Dict[str, Any]]) -> None:
+    # Keep only the newest snapshot per (symbol, day) so one statement never touches a key twice.
+    latest: Dict[tuple, Dict[str, Any]] = {}
+    for row in rows:
+        key = (row["symbol"], row["as_of_date"])
+        if key not in latest or row["snapshot_at"] >= latest[key]["snapshot_at"]:
+            latest[key] = row
+    if not latest:
+        return
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        for row in latest.values():
+            current = db.get(ScoreHistory, (row["symbol"], row["as_of_date"]))
+            if current is None or current.snapshot_at <= row["snapshot_at"]:
+                db.merge(ScoreHistory(**row))
+        return
+
+    statement = insert(ScoreHistory).values(list(latest.values()))
+    statement = statement.on_conflict_do_update(
+        index_elements=[ScoreHistory.symbol, ScoreHistory.as_of_date],
+        set_={column: statement.excluded[column] for column in UPDATE_COLUMNS},
+        # Out-of-order writes (backfills, write-behind retries) never replace a newer snapshot.
+        where=ScoreHistory.snapshot_at <= statement.excluded.snapshot_at,
+    )
+    db.execute(statement)
+
+
+def choose_interval(start: date, end: date) -> str:
+    for span, interval in AUTO_INTERVAL_SPANS:
+        if end - start <= span:
+            return interval
+    return "month"
+
+
+def _bucket(day: date, interval: str) -> date:
+    if interval == "week":
+        return day - timedelta(days=day.weekday())
+    if interval == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _mean(values: List[float]) -> Optional[float]:
+    return round(sum(values) / len(values), 4) if values else None
+
+
+def _mean_categories(items: List[Optional[Dict[str, Any]]]) -> Optional[Dict[str, Optional[float]]]:
+    collected: Dict[str, List[float]] = {}
+    for categories in items:
+        for name, value in (categories or {}).items():
+            bucket = collected.setdefault(name, [])
+            if value is not None:
+                bucket.append(value)
+    return {name: _mean(values) for name, values in collected.items()} or None
+
+
+def downsample(rows: List[Dict[str, Any]], interval: str) -> List[Dict[str, Any]]:
+    # rows are ordered by as_of_date; each bucket averages its scores and keeps the latest bias.
+    buckets: Dict[date, List[Dict[str, Any]]] = {}
+    for row in rows:
+        buckets.setdefault(_bucket(row["as_of_date"], interval), []).append(row)
+
+    points = []
+    for start, members in buckets.items():
+        point: Dict[str, Any] = {"date": start.isoformat(), "samples": len(members)}
+        for column in SCORE_COLUMNS:
+            point[column] = _mean([m[column] for m in members if m.get(column) is not None])
+        point["investment_bias"] = members[-1].get("investment_bias")
+        for column in ("fundamental_category_scores", "technical_category_scores"):
+            if column in members[0]:
+                point[column] = _mean_categories([m[column] for m in members])
+        points.append(point)
+    return points
@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import argparse
+import os
+from datetime import UTC, date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from uuid import uuid4
+
+from sqlalchemy import delete, exists, func, or_, select
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app.db.sqlite import SQLiteWriter, WriteJob
+from app.models.analysis import Analysis
+from app.models.analysis_result import AnalysisResult
+from app.models.archived_analysis import ArchivedAnalysis
+from app.models.snapshot_blob import SnapshotBlob
+from app.utils import fast_json
+from app.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+# Scores and labels are real columns so archive files can be scanned without decoding the JSON bodies.
+STRING_COLUMNS = (
+    "analysis_id",
+    "analysis_result_id",
+    "thread_id",
+    "symbol",
+    "investment_bias",
+    "confidence",
+    "llm_status",
+    "llm_model",
+    "llm_summary",
+    "llm_bull_case",
+    "llm_bear_case",
+    "llm_risk_assessment",
+    "llm_confidence",
+    "selected_fundamentals",
+    "selected_technicals",
+    "fundamental_json",
+    "technical_json",
+    "combined_json",
+)
+FLOAT_COLUMNS = ("overall_score", "fundamental_score", "technical_score")
+TIMESTAMP_COLUMNS = ("created_at", "llm_created_at")
+JSON_COLUMNS = ("selected_fundamentals", "selected_technicals", "fundamental_json", "technical_json", "combined_json")
+
+
+def _dumps(value: Any) -> Optional[str]:
+    return None if value is None else fast_json.dumps(value).decode("utf-8")
+
+
+def _loads(value: Optional[str]) -> Any:
+    return None if value is None else fast_json.loads(value)
+
+
+class SnapshotArchive:
+    def __init__(self, archive_dir: str) -> None:
+        self.archive_dir = Path(archive_dir)
+
+    def _schema(self):
+        import pyarrow as pa
+
+        fields = [(name, pa.string()) for name in STRING_COLUMNS]
+        fields += [(name, pa.float64()) for name in FLOAT_COLUMNS]
+        fields += [(name, pa.timestamp("us")) for name in TIMESTAMP_COLUMNS]
+        return pa.schema(fields)
+
+    def _record(self, analysis: Analysis) -> Dict[str, Any]:
+        result = analysis.result
+        combined = (result.combined_json if result else None) or {}
+        return {
+            "analysis_id": analysis.id,
+            "analysis_result_id": result.id if result else None,
+            "thread_id": analysis.thread_id,
+            "symbol": analysis.symbol,
+            "created_at": analysis.created_at,
+            "overall_score": analysis.overall_score,
+            "fundamental_score": combined.get("fundamental_score"),
+            "technical_score": combined.get("technical_score"),
+            "investment_bias": combined.get("investment_bias"),
+            "confidence": combined.get("confidence"),
+            "llm_status": result.llm_status if result else None,
+            "llm_model": result.llm_model if result else None,
+            "llm_summary": result.llm_summary if result else None,
+            "llm_bull_case": result.llm_bull_case if result else None,
+            "llm_bear_case": result.llm_bear_case if result else None,
+            "llm_risk_assessment": result.llm_risk_assessment if result else None,
+            "llm_confidence": result.llm_confidence if result else None,
+            "llm_created_at": result.llm_created_at if result else None,
+            "selected_fundamentals": _dumps(analysis.selected_fundamentals),
+            "selected_technicals": _dumps(analysis.selected_technicals),
+            "fundamental_json": _dumps(result.fundamental if result else None),
+            "technical_json": _dumps(result.technical if result else None),
+            "combined_json": _dumps(result.combined_json if result else None),
+        }
+
+    def write_partition(self, partition: date, records: List[Dict[str, Any]]) -> str:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        relative = Path(f"date={partition.isoformat()}") / f"part-{uuid4().hex}.parquet"
+        target = self.archive_dir / relative
+        target.parent.mkdir(parents=True, exist_ok=True)
+        table = pa.Table.from_pylist(records, schema=self._schema())
+        # Write under a temporary name so a crash never leaves a truncated file behind a pointer.
+        partial = target.with_suffix(".tmp")
+        pq.write_table(table, partial, compression="zstd")
+        partial.replace(target)
+        return relative.as_posix()
+
+    def read(self, pointer: ArchivedAnalysis) -> Optional[AnalysisResult]:
+        import pyarrow.parquet as pq
+
+        path = self.archive_dir / pointer.archive_path
+        if not path.exists():
+            logger.error("Archive file missing | analysis_id=%s | path=%s", pointer.id, path)
+            return None
+        rows = pq.read_table(path, filters=[("analysis_id", "=", pointer.id)]).to_pylist()
+        if not rows:
+            return None
+        row = rows[0]
+        # A detached AnalysisResult lets callers treat archived and live snapshots the same way.
+        return AnalysisResult(
+            id=row["analysis_result_id"] or pointer.id,
+            analysis_id=pointer.id,
+            fundamental_json=_loads(row["fundamental_json"]),
+            technical_json=_loads(row["technical_json"]),
+            combined_json=_loads(row["combined_json"]),
+            llm_model=row["llm_model"],
+            llm_status=row["llm_status"],
+            llm_summary=row["llm_summary"],
+            llm_bull_case=row["llm_bull_case"],
+            llm_bear_case=row["llm_bear_case"],
+            llm_risk_assessment=row["llm_risk_assessment"],
+            llm_confidence=row["llm_confidence"],
+            llm_created_at=row["llm_created_at"],
+            created_at=row["created_at"],
+        )
+
+    def archive_before(
+        self,
+        session_factory: Callable[[], Session],
+        cutoff: datetime,
+        batch_size: int = 1000,
+        writer: Optional[SQLiteWriter] = None,
+    ) -> Dict[str, int]:
+        stats = {"archived": 0, "files": 0, "blobs_deleted": 0}
+        while True:
+            with session_factory() as db:
+                analyses = (
+                    db.scalars(
+                        select(Analysis)
+                        .options(
+                            selectinload(Analysis.result).options(
+                                joinedload(AnalysisResult.fundamental_blob),
+                                joinedload(AnalysisResult.technical_blob),
+                            )
+                        )
+                        .where(Analysis.created_at < cutoff)
+                        .order_by(Analysis.created_at, Analysis.id)
+                        .limit(batch_size)
+                    )
+                    .unique()
+                    .all()
+                )
+                if not analyses:
+                    break
+
+                partitions: Dict[date, List[Analysis]] = {}
+                for analysis in analyses:
+                    partitions.setdefault(analysis.created_at.date(), []).append(analysis)
+
+                # Files land first; if the delete below fails the rows stay live and the next run rewrites them.
+                pointers = []
+                for partition, members in partitions.items():
+                    relative = self.write_partition(partition, [self._record(a) for a in members])
+                    stats["files"] += 1
+                    for analysis in members:
+                        combined = (analysis.result.combined_json if analysis.result else None) or {}
+                        pointers.append(
+                            ArchivedAnalysis(
+                                id=analysis.id,
+                                thread_id=analysis.thread_id,
+                                symbol=analysis.symbol,
+                                overall_score=analysis.overall_score,
+                                investment_bias=combined.get("investment_bias"),
+                                llm_status=analysis.result.llm_status if analysis.result else None,
+                                archive_path=relative,
+                                created_at=analysis.created_at,
+                            )
+                        )
+                ids = [analysis.id for analysis in analyses]
+
+            def replace_with_pointers(db: Session) -> None:
+                db.add_all(pointers)
+                db.execute(delete(AnalysisResult).where(AnalysisResult.analysis_id.in_(ids)))
+                db.execute(delete(Analysis).where(Analysis.id.in_(ids)))
+
+            _commit(session_factory, writer, replace_with_pointers)
+            stats["archived"] += len(ids)
+            logger.info("Snapshot archive progress | %s", stats)
+
+        stats["blobs_deleted"] = _commit(session_factory, writer, lambda db: self._delete_orphaned_blobs(db, cutoff))
+        return stats
+
+    def _delete_orphaned_blobs(self, db: Session, cutoff: datetime) -> int:
+        # Blobs are shared between snapshots; only drop the ones no live result points at. Writers touch
+        # last_used_at on every reuse, so a blob a pending write is about to reference is always recent.
+        referenced = exists().where(
+            or_(
+                AnalysisResult.fundamental_blob_hash == SnapshotBlob.hash,
+                AnalysisResult.technical_blob_hash == SnapshotBlob.hash,
+            )
+        )
+        last_used = func.coalesce(SnapshotBlob.last_used_at, SnapshotBlob.created_at)
+        outcome = db.execute(
+            delete(SnapshotBlob)
+            .where(last_used < cutoff, ~referenced)
+            .execution_options(synchronize_session=False)
+        )
+        return outcome.rowcount or 0
+
+
+def _commit(session_factory: Callable[[], Session], writer: Optional[SQLiteWriter], job: WriteJob) -> Any:
+    # With the production SQLite profile every write goes through its single writer thread.
+    if writer is not None:
+        return writer.run(job)
+    with session_factory() as db:
+        value = job(db)
+        db.commit()
+        return value
+
+
+_snapshot_archive: Optional[SnapshotArchive] = None
+
+
+def get_snapshot_archive() -> SnapshotArchive:
+    global _snapshot_archive
+    if _snapshot_archive is None:
+        _snapshot_archive = SnapshotArchive(os.getenv("SNAPSHOT_ARCHIVE_DIR", "./archive"))
+    return _snapshot_archive
+
+
+def archive_expired_snapshots(
+    session_factory: Callable[[], Session],
+    retention_days: Optional[int] = None,
+    batch_size: int = 1000,
+    now: Optional[datetime] = None,
+    writer: Optional[SQLiteWriter] = None,
+) -> Dict[str, int]:
+    if retention_days is None:
+        retention_days = int(os.getenv("SNAPSHOT_RETENTION_DAYS", "365"))
+    cutoff = (now or datetime.now(UTC)).replace(tzinfo=None) - timedelta(days=retention_days)
+    logger.info("Archiving snapshots | cutoff=%s", cutoff.isoformat())
+    return get_snapshot_archive().archive_before(session_factory, cutoff, batch_size=batch_size, writer=writer)
+
+
+if __name__ == "__main__":
+    from app.db.session import SessionLocal, get_sqlite_writer
+
+    parser = argparse.ArgumentParser(description="Move expired analyses into the Parquet archive.")
+    parser.add_argument("--retention-days", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    print(
+        archive_expired_snapshots(
+            SessionLocal,
+            retention_days=args.retention_days,
+            batch_size=args.batch_size,
+            writer=get_sqlite_writer(),
+        )
+    )
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.snapshot_blob import SnapshotBlob
+
+
+def store_snapshot_blob(db: Session, payload: Optional[Any]) -> Optional[str]:
+    if payload is None:
+        return None
+    blob = SnapshotBlob.from_payload(payload)
+    # Touching an existing blob locks it until this transaction commits, so the archive's orphan sweep
+    # cannot delete it underneath the result about to reference it. A blob the sweep already removed
+    # matches no row here and is inserted again below.
+    touched = db.execute(
+        update(SnapshotBlob)
+        .where(SnapshotBlob.hash == blob.hash)
+        .values(last_used_at=blob.last_used_at)
+        .execution_options(synchronize_session=False)
+    )
+    if touched.rowcount:
+        return blob.hash
+    try:
+        with db.begin_nested():
+            db.add(blob)
+    except IntegrityError:
+        # A concurrent writer stored the same body first; the hash still resolves.
+        pass
+    return blob.hash
@@ -4,6 +4,20 @@ from typing import Any, Dict, List, Optional, Tuple
 
 
 class TechnicalEngine:
+    CATEGORY_INDICATORS: Dict[str, List[str]] = {
+        "trend_score": ["sma_50", "sma_200", "ema_20"],
+        "momentum_score": ["rsi", "macd", "stoch"],
+        "volume_score": ["obv", "volume_spike"],
+        "volatility_score": ["atr", "bbands"],
+    }
+
+    CATEGORY_WEIGHTS: Dict[str, float] = {
+        "trend_score": 0.35,
+        "momentum_score": 0.30,
+        "volume_score": 0.20,
+        "volatility_score": 0.15,
+    }
+
     def __init__(
         self,
         daily_series: Dict[str, Any],
@@ -490,27 +504,15 @@ class TechnicalEngine:
         if include("bbands"):
             indicators["bbands"] = self._bbands_signal(latest_price)
 
-        trend_items = [indicators[k] for k in ["sma_50", "sma_200", "ema_20"] if k in indicators]
-        momentum_items = [indicators[k] for k in ["rsi", "macd", "stoch"] if k in indicators]
-        volume_items = [indicators[k] for k in ["obv", "volume_spike"] if k in indicators]
-        volatility_items = [indicators[k] for k in ["atr", "bbands"] if k in indicators]
-
-        trend_score = self._avg_score(trend_items)
-        momentum_score = self._avg_score(momentum_items)
-        volume_score = self._avg_score(volume_items)
-        volatility_score = self._avg_score(volatility_items)
-
         category_scores = {
-            "trend_score": trend_score,
-            "momentum_score": momentum_score,
-            "volume_score": volume_score,
-            "volatility_score": volatility_score,
+            category: self._avg_score([indicators[k] for k in keys if k in indicators])
+            for category, keys in self.CATEGORY_INDICATORS.items()
         }
+        momentum_score = category_scores["momentum_score"]
 
         overall = 0.0
         weight_sum = 0.0
-        weights = {"trend_score": 0.35, "momentum_score": 0.30, "volume_score": 0.20, "volatility_score": 0.15}
-        for key, weight in weights.items():
+        for key, weight in self.CATEGORY_WEIGHTS.items():
             score = category_scores.get(key)
             if score is not None:
                 overall += score * weight
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, List, Optional
+
+
+# llm_model for narrations written by this module rather than a model.
+TEMPLATE_MODEL = "template"
+CATEGORY_LABELS = {
+    "profitability": "profitability",
+    "growth": "growth",
+    "financial_strength": "financial strength",
+    "valuation": "valuation",
+}
+TREND_PHRASES = {"Uptrend": "in an uptrend", "Downtrend": "in a downtrend", "Sideways": "moving sideways"}
+BULLISH_TRENDS = ("Uptrend",)
+BEARISH_TRENDS = ("Downtrend",)
+HIGH_RISK_LEVELS = ("High", "Elevated")
+
+
+def template_fast_path() -> bool:
+    return os.getenv("LLM_TEMPLATE_FAST_PATH", "true").lower() != "false"
+
+
+def _score(value: Any) -> Optional[str]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return f"{value:.1f}"
+
+
+def _categories(names: List[str], scores: Dict[str, Any]) -> str:
+    parts = []
+    for name in names:
+        label = CATEGORY_LABELS.get(name, name.replace("_", " "))
+        score = _score(scores.get(name))
+        parts.append(f"{label} ({score})" if score else label)
+    return ", ".join(parts)
+
+
+def _sentence(*parts: Optional[str]) -> str:
+    return " ".join(part for part in parts if part)
+
+
+def narrate(payload: Dict[str, Any]) -> Dict[str, str]:
+    # Builds the five narration fields from the LLM payload with fixed sentences; no model involved.
+    symbol = payload.get("symbol") or "This symbol"
+    fundamental = payload.get("fundamental") or {}
+    technical = payload.get("technical") or {}
+    overall = _score(payload.get("overall_score"))
+    fundamental_score = _score(payload.get("fundamental_score"))
+    technical_score = _score(payload.get("technical_score"))
+    trend = technical.get("trend_direction")
+    momentum = technical.get("momentum_strength")
+    if momentum == "Insufficient data":
+        momentum = None
+    volatility = technical.get("volatility")
+    entry_signal = technical.get("entry_signal")
+    risk_level = fundamental.get("risk_level")
+    strengths = fundamental.get("top_strengths") or []
+    weaknesses = [name for name in fundamental.get("weaknesses") or [] if name not in strengths]
+
+    split = [
+        f"{fundamental_score} fundamental" if fundamental_score else None,
+        f"{technical_score} technical" if technical_score else None,
+    ]
+    split = [part for part in split if part]
+    summary = _sentence(
+        f"{symbol} scores {overall} out of 10 overall" + (f" ({', '.join(split)})." if split else ".")
+        if overall
+        else f"{symbol} has no overall score yet.",
+        f"The price is {TREND_PHRASES[trend]}" + (f" with {momentum.lower()} momentum." if momentum else ".")
+        if trend in TREND_PHRASES
+        else None,
+        f"Fundamental risk is {risk_level.lower()}." if risk_level else None,
+    )
+
+    bull_case = _sentence(
+        f"The strongest areas are {_categories(strengths, fundamental)}." if strengths else None,
+        "The trend is up." if trend in BULLISH_TRENDS else None,
+        f"The entry signal reads {entry_signal.lower()}." if entry_signal and "Bullish" in entry_signal else None,
+    ) or "No category or signal stands out on the upside."
+
+    bear_case = _sentence(
+        f"The weakest areas are {_categories(weaknesses, fundamental)}." if weaknesses else None,
+        "The trend is down." if trend in BEARISH_TRENDS else None,
+        f"Momentum is {momentum.lower()}." if momentum == "Weak" else None,
+    ) or "No category or signal stands out on the downside."
+
+    risk_assessment = _sentence(
+        f"Fundamental risk level: {risk_level}." if risk_level else "Fundamental risk level is not available.",
+        f"Volatility: {volatility}." if volatility else None,
+        "Scores are computed from reported financials and price history and may lag recent events.",
+    )
+
+    # Confidence tracks how much of the picture the scores cover, as in the combined analysis.
+    if fundamental_score and technical_score:
+        confidence = "High" if risk_level not in HIGH_RISK_LEVELS else "Medium"
+    elif fundamental_score or technical_score:
+        confidence = "Medium"
+    else:
+        confidence = "Low"
+
+    return {
+        "executive_summary": summary,
+        "bull_case": bull_case,
+        "bear_case": bear_case,
+        "risk_assessment": risk_assessment,
+        "confidence": confidence,
+    }
@@ -1,3 +1,4 @@
-from app.tasks.llm_tasks import generate_llm_analysis
+from app.tasks.llm_tasks import generate_llm_analysis, generate_llm_watchlist
+from app.tasks.retention_tasks import archive_expired_snapshots_task
 
-__all__ = ["generate_llm_analysis"]
+__all__ = ["generate_llm_analysis", "generate_llm_watchlist", "archive_expired_snapshots_task"]
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, List, Optional
+
+from celery.result import AsyncResult
+
+from app.celery_app import ANALYSIS_QUEUE, PRIORITY_NORMAL, celery_app
+from app.services.alpha_vantage_service import AlphaVantageService
+from app.services.analysis_orchestrator import AnalysisOrchestrator
+from app.services.analysis_writer import get_analysis_writer
+from app.tasks.llm_tasks import dispatch_watchlist_narration
+from app.utils.logger import get_logger
+
+
+def dispatch_watchlist_analysis(
+    thread_id: str,
+    symbols: List[str],
+    selected_fundamentals: Optional[List[str]],
+    selected_technicals: Optional[List[str]],
+    fundamental_basis: str,
+) -> str:
+    # The Alpha Vantage calls for a whole watchlist outlast any HTTP timeout; a data worker runs them.
+    job = analyze_watchlist.apply_async(
+        (thread_id, symbols, selected_fundamentals, selected_technicals, fundamental_basis),
+        queue=ANALYSIS_QUEUE,
+        priority=PRIORITY_NORMAL,
+    )
+    return job.id
+
+
+def watchlist_job_status(job_id: str) -> Dict[str, Any]:
+    job = AsyncResult(job_id, app=celery_app)
+    status: Dict[str, Any] = {"job_id": job_id, "state": job.state}
+    if job.successful():
+        status.update(job.result)
+    elif job.failed():
+        status["error"] = str(job.result)
+    return status
+
+
+# Not acks_late: a redelivered run would analyze and insert the whole watchlist a second time.
+@celery_app.task(name="analyze_watchlist")
+def analyze_watchlist(
+    thread_id: str,
+    symbols: List[str],
+    selected_fundamentals: Optional[List[str]],
+    selected_technicals: Optional[List[str]],
+    fundamental_basis: str = "annual",
+) -> Dict[str, Any]:
+    logger = get_logger(__name__)
+    writer = get_analysis_writer()
+    alpha = AlphaVantageService(api_key=os.getenv("ALPHA_VANTAGE_API_KEY", ""))
+    orchestrator = AnalysisOrchestrator(alpha_service=alpha)
+    records = []
+    failed = []
+    for symbol in symbols:
+        try:
+            result = orchestrator.analyze(
+                symbol=symbol,
+                selected_fundamentals=selected_fundamentals,
+                selected_technicals=selected_technicals,
+                include_llm=False,
+                fundamental_basis=fundamental_basis,
+            )
+        except Exception:
+            # One bad symbol must not cost the rest of the watchlist.
+            logger.exception("Watchlist analysis failed | symbol=%s", symbol)
+            failed.append(symbol)
+            continue
+        llm_payload = orchestrator._build_llm_payload(
+            symbol,
+            result.get("fundamental_analysis"),
+            result.get("technical_analysis"),
+            result.get("combined_analysis"),
+        )
+        records.append(
+            writer.build_record(
+                # The route has already committed the thread.
+                thread_id,
+                False,
+                symbol,
+                selected_fundamentals,
+                selected_technicals,
+                result,
+                llm_payload,
+                batch_narration=True,
+            )
+        )
+
+    if records:
+        # Every snapshot lands in one transaction (which also ranks the scores), then one task narrates the lot.
+        writer.write_batch(records)
+        dispatch_watchlist_narration([(record["analysis_result_id"], record["llm_payload"]) for record in records])
+
+    logger.info(
+        "Watchlist analysis finished | thread_id=%s | analyzed=%s | failed=%s",
+        thread_id,
+        len(records),
+        len(failed),
+    )
+    return {
+        "thread_id": thread_id,
+        "analyses": {record["symbol"]: record["analysis_id"] for record in records},
+        "failed": failed,
+        "status": "processing" if records else "failed",
+    }
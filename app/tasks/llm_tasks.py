@@ -1,50 +1,328 @@
 from __future__ import annotations
 
-from datetime import UTC, datetime
-from typing import Any, Dict
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
 
-from app.celery_app import celery_app
-from app.db.session import SessionLocal
+from sqlalchemy.orm import Session
+
+from app.celery_app import (
+    BATCH_LLM_QUEUE,
+    INTERACTIVE_LLM_QUEUE,
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    celery_app,
+)
+from app.db.session import SessionLocal, get_sqlite_writer
 from app.models.analysis_result import AnalysisResult
-from app.services.interpretation_engine import InterpretationEngine
+from app.services.interpretation_engine import InterpretationEngine, NarrationOutputError
+from app.services.llm_stream import narration_columns, publish_narration
+from app.services.narration_cache import canonicalize_payload, get_narration_cache, narration_key
+from app.services.narration_sink import FINAL_STATUSES, NarrationSink, narration_entry
+from app.services.template_narrator import TEMPLATE_MODEL, narrate
+from app.utils.cache import get_redis_client
 from app.utils.logger import get_logger
 
 
-@celery_app.task(name="generate_llm_analysis")
-def generate_llm_analysis(analysis_result_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+LLM_STREAMING = os.getenv("LLM_STREAMING", "true").lower() != "false"
+LLM_TEMPLATE_FALLBACK = os.getenv("LLM_TEMPLATE_FALLBACK", "true").lower() != "false"
+
+
+def _write(job) -> Any:
+    writer = get_sqlite_writer()
+    if writer is not None:
+        return writer.run(job)
+    db = SessionLocal()
+    try:
+        value = job(db)
+        db.commit()
+        return value
+    finally:
+        db.close()
+
+
+_narration_sink: Optional[NarrationSink] = None
+
+
+def get_narration_sink() -> NarrationSink:
+    global _narration_sink
+    if _narration_sink is None:
+        _narration_sink = NarrationSink(
+            _write,
+            get_redis_client(),
+            batch_size=int(os.getenv("LLM_SINK_BATCH_SIZE", "0")),
+            flush_interval_seconds=float(os.getenv("LLM_SINK_FLUSH_SECONDS", "1.0")),
+        )
+    return _narration_sink
+
+
+def _is_final(analysis_result_id: str) -> bool:
+    db = SessionLocal()
+    try:
+        status = db.query(AnalysisResult.llm_status).filter(AnalysisResult.id == analysis_result_id).scalar()
+    finally:
+        db.close()
+    return status in FINAL_STATUSES
+
+
+def _record_waste(cache: Any, wasted: Dict[str, Any], **counts: int) -> None:
+    generations = int(wasted.get("generations", 0))
+    cache.record(
+        retries=min(generations, 1),
+        wasted_generations=generations,
+        wasted_tokens=int(wasted.get("tokens", 0)),
+        wasted_ms=int(wasted.get("seconds", 0.0) * 1000),
+        **counts,
+    )
+
+
+def _usage_counts(usage: Dict[str, Any]) -> Dict[str, int]:
+    return {
+        "prompt_tokens": int(usage.get("prompt_tokens", 0)),
+        "completion_tokens": int(usage.get("completion_tokens", 0)),
+        "prompt_eval_ms": int(usage.get("prompt_eval_seconds", 0.0) * 1000),
+        "eval_ms": int(usage.get("eval_seconds", 0.0) * 1000),
+    }
+
+
+class _NarrationProgress:
+    # Partial text from a streaming generation: published often, written to the row every few seconds.
+    def __init__(self, analysis_result_id: str, client: Any) -> None:
+        self.analysis_result_id = analysis_result_id
+        self.client = client
+        self.publish_seconds = float(os.getenv("LLM_STREAM_PUBLISH_SECONDS", "0.25"))
+        self.persist_seconds = float(os.getenv("LLM_STREAM_PERSIST_SECONDS", "2"))
+        self._published = float("-inf")
+        self._persisted = float("-inf")
+
+    def update(self, fields: Dict[str, str]) -> None:
+        columns = narration_columns(fields)
+        now = time.monotonic()
+        if now - self._published >= self.publish_seconds:
+            publish_narration(self.client, self.analysis_result_id, "streaming", columns)
+            self._published = now
+        if now - self._persisted >= self.persist_seconds:
+            self._persist(columns)
+            self._persisted = now
+
+    def _persist(self, columns: Dict[str, Any]) -> None:
+        def apply(db: Session) -> None:
+            row = db.get(AnalysisResult, self.analysis_result_id)
+            if row is None or row.llm_status in FINAL_STATUSES:
+                return
+            row.llm_status = "streaming"
+            for column, value in columns.items():
+                setattr(row, column, value)
+
+        try:
+            _write(apply)
+        except Exception:
+            # Partial text is best effort; the final write below is what counts.
+            get_logger(__name__).warning("Partial narration write failed", exc_info=True)
+
+
+def dispatch_narration(
+    analysis_result_id: str,
+    payload: Dict[str, Any],
+    batch: bool = False,
+    countdown: Optional[float] = None,
+) -> None:
+    # Interactive requests go to their own queue at high priority; batch work waits on batch-llm.
+    generate_llm_analysis.apply_async(
+        (analysis_result_id, payload),
+        {"batch": True} if batch else None,
+        countdown=countdown,
+        queue=BATCH_LLM_QUEUE if batch else INTERACTIVE_LLM_QUEUE,
+        priority=PRIORITY_LOW if batch else PRIORITY_HIGH,
+    )
+
+
+# acks_late: a worker that dies mid-generation leaves the message to be redelivered. The task is
+# safe to repeat because it skips rows that are already final.
+@celery_app.task(name="generate_llm_analysis", acks_late=True, reject_on_worker_lost=True)
+def generate_llm_analysis(analysis_result_id: str, payload: Dict[str, Any], batch: bool = False) -> Dict[str, Any]:
     logger = get_logger(__name__)
     logger.info("LLM task started | analysis_result_id=%s", analysis_result_id)
-    engine = InterpretationEngine()
-    try:
-        result = engine.generate(payload)
-        status = "completed"
-    except Exception:
-        logger.exception("LLM task failed | analysis_result_id=%s", analysis_result_id)
-        result = {"parsed": {}, "model_used": None}
-        status = "failed"
+    if _is_final(analysis_result_id):
+        # A re-check scheduled for a coalesced task whose leader already filled the row.
+        return {"status": "skipped"}
+
+    cache = get_narration_cache()
+    # Hashing and prompting both see the bucketed payload, so tiny score drifts reuse a narration.
+    canonical = canonicalize_payload(payload)
+    key = narration_key(canonical)
+    targets: List[str] = [analysis_result_id]
+    result = cache.get(key)
+    source = "cache"
+    status = "completed"
+    cache.record(requests=1, exact_repeats=int(cache.seen_exact(narration_key(payload))), cache_hits=int(result is not None))
+
+    if result is None and not cache.claim(key):
+        # Another worker is generating this exact payload; it will fill our row when it finishes.
+        cache.wait(key, analysis_result_id)
+        result = cache.get(key)
+        if result is None:
+            cache.record(coalesced=1)
+            # Safety net if that worker dies: look again once its claim has expired. One re-check per
+            # key is enough, because whichever task generates drains every waiter on the key.
+            if cache.claim_recheck(key):
+                dispatch_narration(analysis_result_id, payload, batch=batch, countdown=cache.lock_seconds)
+            logger.info("LLM task coalesced | analysis_result_id=%s | key=%s", analysis_result_id, key)
+            return {"status": "coalesced"}
+
+    if result is None:
+        source = "model"
+        cache.record(generations=1)
+        progress = _NarrationProgress(analysis_result_id, get_redis_client()) if LLM_STREAMING else None
+        try:
+            engine = InterpretationEngine()
+            result = engine.generate(canonical, on_partial=progress.update if progress else None)
+            cache.set(key, result)
+            _record_waste(
+                cache,
+                result.get("wasted", {}),
+                repaired=int(bool(result.get("repaired"))),
+                **_usage_counts(result.get("usage", {})),
+            )
+        except NarrationOutputError as exc:
+            logger.error("LLM output unusable | analysis_result_id=%s | wasted=%s", analysis_result_id, exc.wasted)
+            _record_waste(cache, exc.wasted, invalid_outputs=1)
+            result = {"parsed": {}, "model_used": None}
+            status = "failed"
+        except Exception:
+            logger.exception("LLM task failed | analysis_result_id=%s", analysis_result_id)
+            result = {"parsed": {}, "model_used": None}
+            status = "failed"
+        finally:
+            # The cache is filled before waiters are drained, so a late waiter always sees the result.
+            targets += cache.drain(key)
+            cache.release(key)
+
+    if status == "failed" and LLM_TEMPLATE_FALLBACK:
+        # The row stays marked failed, but it keeps a readable narration built from the scores.
+        result = {"parsed": narrate(payload), "model_used": TEMPLATE_MODEL}
+    columns = narration_columns(result.get("parsed", {}))
+    model_used = result.get("model_used")
+    updated = get_narration_sink().submit(
+        [narration_entry(target, status, model_used, columns) for target in targets]
+    )
+    logger.info(
+        "LLM task completed | analysis_result_id=%s | source=%s | rows=%s",
+        analysis_result_id,
+        source,
+        "buffered" if updated is None else updated,
+    )
+    return {"status": status, "source": source, "rows": updated}
+
 
+def dispatch_watchlist_narration(items: Sequence[Tuple[str, Dict[str, Any]]]) -> None:
+    # (analysis_result_id, payload) pairs narrated a few symbols per prompt on the batch queue.
+    generate_llm_watchlist.apply_async(
+        ([[analysis_result_id, payload] for analysis_result_id, payload in items],),
+        queue=BATCH_LLM_QUEUE,
+        priority=PRIORITY_LOW,
+    )
+
+
+def _final_ids(analysis_result_ids: List[str]) -> Set[str]:
     db = SessionLocal()
     try:
-        row = (
-            db.query(AnalysisResult)
-            .filter(AnalysisResult.id == analysis_result_id)
-            .first()
+        rows = (
+            db.query(AnalysisResult.id)
+            .filter(AnalysisResult.id.in_(analysis_result_ids), AnalysisResult.llm_status.in_(FINAL_STATUSES))
+            .all()
         )
-
-        if row:
-            parsed = result.get("parsed", {})
-            row.llm_model = result.get("model_used")
-            row.llm_status = status
-            row.llm_summary = parsed.get("executive_summary")
-            row.llm_bull_case = parsed.get("bull_case")
-            row.llm_bear_case = parsed.get("bear_case")
-            row.llm_risk_assessment = parsed.get("risk_assessment")
-            row.llm_confidence = parsed.get("confidence")
-            row.llm_created_at = datetime.now(UTC)
-
-            db.commit()
-            logger.info("LLM task completed | analysis_result_id=%s", analysis_result_id)
     finally:
         db.close()
+    return {row.id for row in rows}
+
+
+def _watchlist_chunks(keys: List[str], payloads: Dict[str, Dict[str, Any]], size: int) -> List[List[str]]:
+    # Symbols are unique within a chunk, so every item of an answer maps back to exactly one payload.
+    chunks: List[List[str]] = []
+    for key in keys:
+        symbol = payloads[key].get("symbol")
+        for chunk in chunks:
+            if len(chunk) < size and all(payloads[other].get("symbol") != symbol for other in chunk):
+                chunk.append(key)
+                break
+        else:
+            chunks.append([key])
+    return chunks
+
+
+@celery_app.task(name="generate_llm_watchlist", acks_late=True, reject_on_worker_lost=True)
+def generate_llm_watchlist(items: List[List[Any]]) -> Dict[str, Any]:
+    logger = get_logger(__name__)
+    final = _final_ids([analysis_result_id for analysis_result_id, _ in items])
+    cache = get_narration_cache()
+
+    # One narration per distinct canonical payload; every row sharing it gets the same text.
+    canonical: Dict[str, Dict[str, Any]] = {}
+    pending: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
+    for analysis_result_id, payload in items:
+        if analysis_result_id in final:
+            continue
+        payload_canonical = canonicalize_payload(payload)
+        key = narration_key(payload_canonical)
+        canonical.setdefault(key, payload_canonical)
+        pending.setdefault(key, []).append((analysis_result_id, payload))
+
+    entries: List[Dict[str, Any]] = []
+    to_generate: List[str] = []
+    cache_hits = 0
+    for key, rows in pending.items():
+        cached = cache.get(key)
+        if cached is None:
+            to_generate.append(key)
+            continue
+        cache_hits += len(rows)
+        columns = narration_columns(cached.get("parsed", {}))
+        entries += [narration_entry(row_id, "completed", cached.get("model_used"), columns) for row_id, _ in rows]
+
+    chunks = _watchlist_chunks(to_generate, canonical, int(os.getenv("LLM_BATCH_SYMBOLS", "8")))
+    fallbacks: List[str] = []
+    engine = InterpretationEngine() if chunks else None
+    for chunk in chunks:
+        try:
+            batch = engine.generate_batch([canonical[key] for key in chunk])
+        except Exception:
+            logger.exception("Batch narration failed | symbols=%s", len(chunk))
+            batch = {"model_used": None, "narrations": [None] * len(chunk), "usage": {}}
+        cache.record(generations=1, batch_prompts=1, batch_symbols=len(chunk), **_usage_counts(batch["usage"]))
+        for key, narration in zip(chunk, batch["narrations"]):
+            if narration is None:
+                fallbacks.append(key)
+                continue
+            cache.set(key, {"model_used": batch["model_used"], "parsed": narration})
+            columns = narration_columns(narration)
+            entries += [
+                narration_entry(row_id, "completed", batch["model_used"], columns) for row_id, _ in pending[key]
+            ]
+
+    # Items the batch answer left out or got wrong are narrated one by one, on the batch queue.
+    fallback_rows = [row for key in fallbacks for row in pending[key]]
+    for analysis_result_id, payload in fallback_rows:
+        dispatch_narration(analysis_result_id, payload, batch=True)
 
-    return {"status": status}
+    cache.record(
+        requests=sum(len(rows) for rows in pending.values()),
+        cache_hits=cache_hits,
+        batch_fallbacks=len(fallback_rows),
+    )
+    updated = get_narration_sink().submit(entries)
+    logger.info(
+        "Watchlist narration | rows=%s | prompts=%s | cache_hits=%s | fallbacks=%s",
+        len(items),
+        len(chunks),
+        cache_hits,
+        len(fallback_rows),
+    )
+    return {
+        "status": "completed",
+        "prompts": len(chunks),
+        "cache_hits": cache_hits,
+        "fallbacks": len(fallback_rows),
+        "skipped": len(final),
+        "rows": updated,
+    }
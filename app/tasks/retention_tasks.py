@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from typing import Dict
+
+from app.celery_app import celery_app
+from app.db.session import SessionLocal, get_sqlite_writer
+from app.services.snapshot_archive import archive_expired_snapshots
+from app.utils.logger import get_logger
+
+
+@celery_app.task(name="archive_expired_snapshots")
+def archive_expired_snapshots_task() -> Dict[str, int]:
+    logger = get_logger(__name__)
+    stats = archive_expired_snapshots(SessionLocal, writer=get_sqlite_writer())
+    logger.info("Snapshot archive finished | %s", stats)
+    return stats
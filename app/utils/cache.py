@@ -1,8 +1,12 @@
 from __future__ import annotations
 
-import json
+import os
 from typing import Any, Optional
 
+import orjson
+
+from app.utils import fast_json
+
 
 class RedisCache:
     def __init__(self, client: Any) -> None:
@@ -14,15 +18,55 @@ class RedisCache:
         value = self.client.get(key)
         if value is None:
             return None
-        if isinstance(value, bytes):
-            value = value.decode("utf-8")
         try:
-            return json.loads(value)
-        except json.JSONDecodeError:
+            return fast_json.loads(value)
+        except orjson.JSONDecodeError:
             return None
 
     def set_json(self, key: str, value: Any, ttl_seconds: int) -> None:
         if self.client is None:
             return
-        payload = json.dumps(value, separators=(",", ":"), ensure_ascii=True)
-        self.client.setex(key, ttl_seconds, payload)
+        self.client.setex(key, ttl_seconds, fast_json.dumps(value))
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        if self.client is None:
+            return None
+        value = self.client.get(key)
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        return value
+
+    def set_bytes(self, key: str, value: bytes, ttl_seconds: int) -> None:
+        if self.client is None:
+            return
+        self.client.setex(key, ttl_seconds, value)
+
+
+_redis_client: Optional[Any] = None
+_async_redis_client: Optional[Any] = None
+
+
+def get_redis_client() -> Optional[Any]:
+    global _redis_client
+    if _redis_client is None:
+        try:
+            import redis
+        except ImportError:
+            return None
+        _redis_client = redis.Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    return _redis_client
+
+
+def get_async_redis_client() -> Optional[Any]:
+    global _async_redis_client
+    if _async_redis_client is None:
+        try:
+            from redis import asyncio as aioredis
+        except ImportError:
+            return None
+        _async_redis_client = aioredis.Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    return _async_redis_client
+
+
+def get_redis_cache() -> RedisCache:
+    return RedisCache(get_redis_client())
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from typing import Any
+
+import orjson
+
+
+DUMPS_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def dumps(value: Any) -> bytes:
+    # NaN/inf become null, numpy scalars and arrays serialize natively.
+    return orjson.dumps(value, option=DUMPS_OPTIONS)
+
+
+def loads(value: bytes | str) -> Any:
+    return orjson.loads(value)
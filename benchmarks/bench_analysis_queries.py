@@ -0,0 +1,154 @@
+"""Seed a database with synthetic analyses and time the history queries.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_analysis_queries.py --rows 10000000 --database-url sqlite:///./bench.db
+
+Seeding is skipped when the database already holds at least --rows analyses, so large
+runs can be repeated against the same file.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session, selectinload
+
+from app.api.routes.analysis import _list_analyses, _load_result
+from app.db.migrations import upgrade_schema
+from app.db.session import _async_database_url
+from app.models import Analysis, AnalysisResult, Thread, User
+
+
+SYMBOLS = [f"SYM{i:04d}" for i in range(2000)]
+HOT_SYMBOL = SYMBOLS[0]
+
+
+def seed(engine, rows: int, chunk: int = 50_000) -> None:
+    with Session(engine) as db:
+        existing = db.scalar(select(func.count()).select_from(Analysis))
+    if existing >= rows:
+        print(f"Reusing {existing} seeded analyses")
+        return
+
+    user_id = str(uuid.uuid4())
+    thread_ids = [str(uuid.uuid4()) for _ in range(max(1, rows // 50))]
+    start = datetime(2020, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": user_id, "email": f"bench-{user_id}@local", "hashed_password": ""}])
+        for offset in range(0, len(thread_ids), chunk):
+            conn.execute(
+                insert(Thread),
+                [{"id": t, "user_id": user_id, "created_at": start, "updated_at": start} for t in thread_ids[offset : offset + chunk]],
+            )
+
+    seeded = existing
+    while seeded < rows:
+        size = min(chunk, rows - seeded)
+        analyses = []
+        results = []
+        for i in range(size):
+            analysis_id = str(uuid.uuid4())
+            created_at = start + timedelta(seconds=(seeded + i) * 7)
+            score = round(random.uniform(1, 9), 2)
+            analyses.append(
+                {
+                    "id": analysis_id,
+                    "thread_id": random.choice(thread_ids),
+                    # One heavily analyzed symbol gives deep pages to paginate through.
+                    "symbol": HOT_SYMBOL if random.random() < 0.1 else random.choice(SYMBOLS),
+                    "overall_score": score,
+                    "created_at": created_at,
+                }
+            )
+            results.append(
+                {
+                    "id": str(uuid.uuid4()),
+                    "analysis_id": analysis_id,
+                    "combined_json": {"overall_score": score, "investment_bias": "Neutral"},
+                    "llm_status": "completed",
+                    "created_at": created_at,
+                }
+            )
+        with engine.begin() as conn:
+            conn.execute(insert(Analysis), analyses)
+            conn.execute(insert(AnalysisResult), results)
+        seeded += size
+        print(f"Seeded {seeded}/{rows}")
+
+
+async def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+async def measure(database_url: str, rows: int, repeat: int) -> dict:
+    async_engine = create_async_engine(_async_database_url(database_url))
+    try:
+        async with AsyncSession(async_engine) as db:
+            sample = (await db.execute(select(Analysis.id, Analysis.thread_id).limit(1))).one()
+            page_size = 20
+            deep_pages = min(500, rows // 10 // page_size - 1)
+            criterion = Analysis.symbol == HOT_SYMBOL
+
+            deep_cursor = None
+            for _ in range(deep_pages):
+                deep_cursor = (await _list_analyses(db, "symbol", HOT_SYMBOL, deep_cursor, page_size))["next_cursor"]
+
+            async def offset_deep_page():
+                query = (
+                    select(Analysis)
+                    .options(selectinload(Analysis.result))
+                    .where(criterion)
+                    .order_by(Analysis.created_at.desc(), Analysis.id.desc())
+                    .offset(deep_pages * page_size)
+                    .limit(page_size)
+                )
+                (await db.scalars(query)).all()
+
+            return {
+                "get result by analysis_id": await timed(lambda: _load_result(db, sample.id), repeat),
+                "symbol first page": await timed(
+                    lambda: _list_analyses(db, "symbol", HOT_SYMBOL, None, page_size), repeat
+                ),
+                "thread first page": await timed(
+                    lambda: _list_analyses(db, "thread_id", sample.thread_id, None, page_size), repeat
+                ),
+                f"symbol page {deep_pages + 1} via cursor": await timed(
+                    lambda: _list_analyses(db, "symbol", HOT_SYMBOL, deep_cursor, page_size), repeat
+                ),
+                f"symbol page {deep_pages + 1} via OFFSET": await timed(offset_deep_page, repeat),
+            }
+    finally:
+        await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--database-url", default="sqlite:///./bench_analysis.db")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    upgrade_schema(engine)
+    seed(engine, args.rows)
+    results = asyncio.run(measure(args.database_url, args.rows, args.repeat))
+
+    print(f"\n{args.rows} analyses on {engine.dialect.name}")
+    for name, ms in results.items():
+        print(f"  {name:<40} {ms:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Measure payload size and serialization cost of a full analysis response.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_serialization.py --repeat 200
+
+Builds one analysis with the real engines on the strong/bullish fixtures shared through tests/conftest.py and
+times stdlib json, FastAPI's jsonable_encoder + json, orjson and gzip on the response body.
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import statistics
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+from app.api.routes.analysis import _project
+from app.services.analysis_orchestrator import AnalysisOrchestrator
+from app.utils import fast_json
+from tests.conftest import FakeAlpha, _fundamental_strong, _technical_bullish
+
+
+def build_response() -> dict:
+    orchestrator = AnalysisOrchestrator(
+        alpha_service=FakeAlpha(_fundamental_strong(), _technical_bullish()),
+        cache=None,
+        request_delay_seconds=0,
+    )
+    result = orchestrator.analyze("AAPL", include_llm=False)
+    return {
+        "fundamental": result["fundamental_analysis"],
+        "technical": result["technical_analysis"],
+        "combined": result["combined_analysis"],
+        "llm_status": "completed",
+        "llm_summary": "Summary " * 40,
+        "llm_bull_case": "Bull case " * 40,
+        "llm_bear_case": "Bear case " * 40,
+        "llm_risk_assessment": "Risk " * 40,
+        "llm_confidence": "Medium",
+        "llm_ready": True,
+    }
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    full = build_response()
+    slim = _project(full, [], ["explanations", "raw_series"])
+
+    for name, payload in (("full", full), ("fields=-raw_series,-explanations", slim)):
+        stdlib_body = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        orjson_body = fast_json.dumps(payload)
+        gzip_body = gzip.compress(orjson_body, compresslevel=5)
+        print(f"\n{name}")
+        print(f"  size json                          {len(stdlib_body):9d} B")
+        print(f"  size orjson                        {len(orjson_body):9d} B")
+        print(f"  size orjson + gzip(5)              {len(gzip_body):9d} B")
+        timings = {
+            "jsonable_encoder + json.dumps": lambda: json.dumps(
+                jsonable_encoder(payload), separators=(",", ":"), ensure_ascii=False
+            ).encode("utf-8"),
+            "json.dumps": lambda: json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8"),
+            "orjson.dumps": lambda: fast_json.dumps(payload),
+            "gzip(5) of orjson body": lambda: gzip.compress(orjson_body, compresslevel=5),
+        }
+        for label, fn in timings.items():
+            print(f"  {label:<34} {timed(fn, args.repeat):9.1f} us")
+
+
+if __name__ == "__main__":
+    main()
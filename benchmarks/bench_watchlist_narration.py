@@ -0,0 +1,102 @@
+"""Compare watchlist narration throughput: one prompt per symbol against several symbols per prompt.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_watchlist_narration.py --symbols 16 --batch-size 8
+
+Needs a reachable Ollama (OLLAMA_URL / OLLAMA_MODEL as for the worker). Builds synthetic payloads
+shaped like the orchestrator's, narrates them once per symbol and once in batches, and prints
+symbols per minute, prompt/completion tokens and how many batch items would fall back to a
+single-symbol prompt. Run it a second time before reading the numbers, so both paths see a warm model.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Any, Dict, List
+
+from app.services.interpretation_engine import InterpretationEngine
+
+
+TRENDS = ("Uptrend", "Downtrend", "Sideways")
+RISK_LEVELS = ("Low", "Moderate", "Elevated")
+
+
+def build_payloads(count: int) -> List[Dict[str, Any]]:
+    payloads = []
+    for index in range(count):
+        fundamental = 4.0 + (index * 1.7) % 5
+        technical = 3.5 + (index * 2.3) % 6
+        payloads.append(
+            {
+                "symbol": f"SYM{index:03d}",
+                "overall_score": round(fundamental * 0.6 + technical * 0.4, 2),
+                "fundamental_score": round(fundamental, 2),
+                "technical_score": round(technical, 2),
+                "fundamental": {
+                    "profitability": round(fundamental + 0.5, 2),
+                    "growth": round(fundamental - 0.8, 2),
+                    "financial_strength": round(fundamental + 0.2, 2),
+                    "valuation": round(fundamental - 0.3, 2),
+                    "risk_level": RISK_LEVELS[index % len(RISK_LEVELS)],
+                    "top_strengths": ["profitability", "financial_strength"],
+                    "weaknesses": ["growth"],
+                },
+                "technical": {
+                    "trend_direction": TRENDS[index % len(TRENDS)],
+                    "momentum_strength": "Strong" if technical > 6 else "Weak",
+                    "volatility": "Moderate",
+                    "entry_signal": "Bullish continuation" if technical > 6 else "Neutral",
+                },
+            }
+        )
+    return payloads
+
+
+def report(label: str, symbols: int, seconds: float, usages: List[Dict[str, Any]], unusable: int) -> None:
+    prompt_tokens = sum(usage.get("prompt_tokens", 0) for usage in usages)
+    completion_tokens = sum(usage.get("completion_tokens", 0) for usage in usages)
+    print(f"\n{label}")
+    print(f"  prompts                  {len(usages):9d}")
+    print(f"  elapsed                  {seconds:9.1f} s")
+    print(f"  symbols/min              {symbols * 60 / seconds:9.1f}")
+    print(f"  prompt tokens            {prompt_tokens:9d}")
+    print(f"  completion tokens        {completion_tokens:9d}")
+    print(f"  unusable items           {unusable:9d}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=8)
+    args = parser.parse_args()
+
+    engine = InterpretationEngine()
+    payloads = build_payloads(args.symbols)
+
+    usages = []
+    unusable = 0
+    started = time.perf_counter()
+    for payload in payloads:
+        try:
+            usages.append(engine.generate(payload)["usage"])
+        except Exception:
+            unusable += 1
+    report("one prompt per symbol", args.symbols, time.perf_counter() - started, usages, unusable)
+
+    usages = []
+    unusable = 0
+    started = time.perf_counter()
+    for offset in range(0, len(payloads), args.batch_size):
+        chunk = payloads[offset : offset + args.batch_size]
+        try:
+            batch = engine.generate_batch(chunk)
+        except Exception:
+            unusable += len(chunk)
+            continue
+        usages.append(batch["usage"])
+        unusable += sum(1 for narration in batch["narrations"] if narration is None)
+    report(f"{args.batch_size} symbols per prompt", args.symbols, time.perf_counter() - started, usages, unusable)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Drive concurrent read traffic at a running API and report requests per second.
+
+Usage:
+    DATABASE_URL=sqlite:///./bench_analysis.db uvicorn app.main:app --port 8000
+    PYTHONPATH=. python benchmarks/load_test_analysis.py --base-url http://localhost:8000 --concurrency 64
+
+Seed the database first with benchmarks/bench_analysis_queries.py. Each worker alternates
+between a symbol listing page and a single-analysis lookup.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+async def worker(
+    client: httpx.AsyncClient,
+    symbol: str,
+    analysis_ids: list,
+    deadline: float,
+    latencies: list,
+    errors: list,
+) -> None:
+    turn = 0
+    while time.perf_counter() < deadline:
+        if turn % 2:
+            path = f"/analysis/{analysis_ids[turn % len(analysis_ids)]}"
+        else:
+            path = f"/analysis/symbols/{symbol}"
+        started = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+        except httpx.HTTPError as exc:
+            errors.append(type(exc).__name__)
+        latencies.append((time.perf_counter() - started) * 1000)
+        turn += 1
+
+
+async def run(base_url: str, symbol: str, concurrency: int, duration: float) -> None:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        page = (await client.get(f"/analysis/symbols/{symbol}", params={"limit": 100})).json()
+        analysis_ids = [item["analysis_id"] for item in page["items"]]
+        if not analysis_ids:
+            raise SystemExit(f"No analyses for {symbol}; seed the database first")
+
+        latencies: list = []
+        errors: list = []
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(
+            *(worker(client, symbol, analysis_ids, deadline, latencies, errors) for _ in range(concurrency))
+        )
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"{len(latencies)} requests in {elapsed:.1f}s with {concurrency} concurrent clients")
+    print(f"  requests/s  {len(latencies) / elapsed:9.1f}")
+    print(f"  p50         {statistics.median(latencies):9.1f} ms")
+    print(f"  p99         {latencies[int(len(latencies) * 0.99) - 1]:9.1f} ms")
+    print(f"  errors      {len(errors):9d}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--symbol", default="SYM0000")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=15.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.base_url, args.symbol, args.concurrency, args.duration))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 import { useEffect, useState } from "react";
-import { createAnalysis, getAnalysis } from "./services/api.js";
+import { createAnalysis, getAnalysis, streamAnalysis } from "./services/api.js";
 import SymbolForm from "./components/SymbolForm.jsx";
 import AnalysisResult from "./components/AnalysisResult.jsx";
 import LLMSection from "./components/LLMSection.jsx";
@@ -28,12 +28,23 @@ export default function App() {
   useEffect(() => {
     if (!analysisId) return;
 
+    let source = null;
     const interval = setInterval(async () => {
+      // While the SSE feed is open it carries the narration; polling covers the rest and any dropped feed.
+      if (source && source.readyState !== EventSource.CLOSED) return;
       try {
         const res = await getAnalysis(analysisId);
         setData(res.data);
         if (res.data.llm_ready) {
           clearInterval(interval);
+        } else if (!source && window.EventSource) {
+          source = streamAnalysis(analysisId);
+          source.onmessage = (event) => {
+            const message = JSON.parse(event.data);
+            setData((prev) => ({ ...prev, ...message.fields, llm_status: message.status }));
+            if (message.final) source.close();
+          };
+          source.onerror = () => source.close();
         }
       } catch (err) {
         setError("Failed to fetch analysis.");
@@ -41,7 +52,10 @@ export default function App() {
       }
     }, 3000);
 
-    return () => clearInterval(interval);
+    return () => {
+      clearInterval(interval);
+      if (source) source.close();
+    };
   }, [analysisId]);
 
   return (
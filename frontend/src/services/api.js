@@ -1,7 +1,9 @@
 import axios from "axios";
 
+const BASE_URL = import.meta.env.VITE_API_BASE_URL || "http://localhost:8000";
+
 const API = axios.create({
-  baseURL: import.meta.env.VITE_API_BASE_URL || "http://localhost:8000",
+  baseURL: BASE_URL,
 });
 
 export const createAnalysis = (symbol, selectedFundamentals, selectedTechnicals) => {
@@ -17,3 +19,5 @@ export const createAnalysis = (symbol, selectedFundamentals, selectedTechnicals)
 };
 
 export const getAnalysis = (analysisId) => API.get(`/analysis/${analysisId}`);
+
+export const streamAnalysis = (analysisId) => new EventSource(`${BASE_URL}/analysis/${analysisId}/stream`);
@@ -4,3 +4,120 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+
+# Alpha Vantage-shaped fixtures shared by the unit tests and the benchmarks.
+def _fundamental_strong():
+    return {
+        "overview": {"PERatio": "18.5", "EVToEBITDA": "10.2"},
+        "income_statement": {
+            "annualReports": [
+                {"fiscalDateEnding": "2024-12-31", "totalRevenue": "120000", "netIncome": "18000", "operatingIncome": "22000", "ebit": "21000", "interestExpense": "500"},
+                {"fiscalDateEnding": "2023-12-31", "totalRevenue": "110000", "netIncome": "16500", "operatingIncome": "20500", "ebit": "19500", "interestExpense": "600"},
+                {"fiscalDateEnding": "2022-12-31", "totalRevenue": "100000", "netIncome": "15000", "operatingIncome": "19000", "ebit": "18000", "interestExpense": "700"},
+                {"fiscalDateEnding": "2021-12-31", "totalRevenue": "90000", "netIncome": "13000", "operatingIncome": "17000", "ebit": "16000", "interestExpense": "800"},
+            ]
+        },
+        "balance_sheet": {
+            "annualReports": [
+                {"fiscalDateEnding": "2024-12-31", "totalShareholderEquity": "80000", "totalAssets": "150000", "totalLiabilities": "70000", "totalCurrentAssets": "50000", "totalCurrentLiabilities": "25000", "totalDebt": "20000"},
+                {"fiscalDateEnding": "2023-12-31", "totalShareholderEquity": "76000", "totalAssets": "140000", "totalLiabilities": "64000", "totalCurrentAssets": "47000", "totalCurrentLiabilities": "24000", "totalDebt": "21000"},
+                {"fiscalDateEnding": "2022-12-31", "totalShareholderEquity": "72000", "totalAssets": "130000", "totalLiabilities": "58000", "totalCurrentAssets": "45000", "totalCurrentLiabilities": "23000", "totalDebt": "22000"},
+                {"fiscalDateEnding": "2021-12-31", "totalShareholderEquity": "68000", "totalAssets": "120000", "totalLiabilities": "52000", "totalCurrentAssets": "43000", "totalCurrentLiabilities": "22000", "totalDebt": "23000"},
+            ]
+        },
+        "cash_flow": {
+            "annualReports": [
+                {"fiscalDateEnding": "2024-12-31", "operatingCashflow": "24000", "capitalExpenditures": "-5000", "freeCashFlow": "29000"},
+                {"fiscalDateEnding": "2023-12-31", "operatingCashflow": "22000", "capitalExpenditures": "-5000", "freeCashFlow": "27000"},
+                {"fiscalDateEnding": "2022-12-31", "operatingCashflow": "20000", "capitalExpenditures": "-5000", "freeCashFlow": "25000"},
+                {"fiscalDateEnding": "2021-12-31", "operatingCashflow": "18000", "capitalExpenditures": "-4000", "freeCashFlow": "22000"},
+            ]
+        },
+        "earnings": {
+            "annualEarnings": [
+                {"fiscalDateEnding": "2024-12-31", "reportedEPS": "6.20"},
+                {"fiscalDateEnding": "2023-12-31", "reportedEPS": "5.80"},
+                {"fiscalDateEnding": "2022-12-31", "reportedEPS": "5.30"},
+                {"fiscalDateEnding": "2021-12-31", "reportedEPS": "4.90"},
+            ]
+        },
+    }
+
+
+def _technical_bullish():
+    return {
+        "daily_series": {
+            "Time Series (Daily)": {
+                "2025-02-14": {"4. close": "220", "2. high": "225", "3. low": "215", "5. volume": "2000000"},
+                "2025-02-13": {"4. close": "218", "2. high": "222", "3. low": "214", "5. volume": "1500000"},
+                "2025-02-12": {"4. close": "216", "2. high": "220", "3. low": "212", "5. volume": "1400000"},
+                "2025-02-11": {"4. close": "214", "2. high": "218", "3. low": "210", "5. volume": "1350000"},
+                "2025-02-10": {"4. close": "212", "2. high": "216", "3. low": "208", "5. volume": "1300000"}
+            }
+        },
+        "rsi": {"Technical Analysis: RSI": {"2025-02-14": {"RSI": "65"}, "2025-02-13": {"RSI": "62"}}},
+        "macd": {
+            "Technical Analysis: MACD": {
+                "2025-02-14": {"MACD": "1.5", "MACD_Signal": "1.2", "MACD_Hist": "0.3"},
+                "2025-02-13": {"MACD": "1.1", "MACD_Signal": "1.2", "MACD_Hist": "-0.1"}
+            }
+        },
+        "sma_50": {"Technical Analysis: SMA": {"2025-02-14": {"SMA": "210"}, "2025-02-13": {"SMA": "208"}}},
+        "sma_200": {"Technical Analysis: SMA": {"2025-02-14": {"SMA": "190"}, "2025-02-13": {"SMA": "189"}}},
+        "ema_20": {"Technical Analysis: EMA": {"2025-02-14": {"EMA": "214"}, "2025-02-13": {"EMA": "212"}}},
+        "stoch": {"Technical Analysis: STOCH": {"2025-02-14": {"SlowK": "70", "SlowD": "65"}}},
+        "obv": {"Technical Analysis: OBV": {"2025-02-14": {"OBV": "12000000"}, "2025-02-13": {"OBV": "11800000"}}},
+        "atr": {"Technical Analysis: ATR": {"2025-02-14": {"ATR": "3.0"}, "2025-02-13": {"ATR": "2.8"}}},
+        "bbands": {
+            "Technical Analysis: BBANDS": {
+                "2025-02-14": {"Real Upper Band": "230", "Real Lower Band": "200", "Real Middle Band": "215"},
+                "2025-02-13": {"Real Upper Band": "228", "Real Lower Band": "198", "Real Middle Band": "213"}
+            }
+        }
+    }
+
+
+class FakeAlpha:
+    def __init__(self, fundamental: dict, technical: dict):
+        self.fundamental = fundamental
+        self.technical = technical
+
+    def get_overview(self, symbol):
+        return self.fundamental["overview"]
+
+    def get_income_statement(self, symbol):
+        return self.fundamental["income_statement"]
+
+    def get_balance_sheet(self, symbol):
+        return self.fundamental["balance_sheet"]
+
+    def get_cash_flow(self, symbol):
+        return self.fundamental["cash_flow"]
+
+    def get_earnings(self, symbol):
+        return self.fundamental["earnings"]
+
+    def get_daily_series(self, symbol):
+        return self.technical["daily_series"]
+
+    def get_technical_indicator(self, function_name, symbol, interval="daily", extra_params=None):
+        if function_name == "RSI":
+            return self.technical["rsi"]
+        if function_name == "MACD":
+            return self.technical["macd"]
+        if function_name == "SMA":
+            if extra_params and extra_params.get("time_period") == 50:
+                return self.technical["sma_50"]
+            return self.technical["sma_200"]
+        if function_name == "EMA":
+            return self.technical["ema_20"]
+        if function_name == "STOCH":
+            return self.technical["stoch"]
+        if function_name == "OBV":
+            return self.technical["obv"]
+        if function_name == "ATR":
+            return self.technical["atr"]
+        if function_name == "BBANDS":
+            return self.technical["bbands"]
+        return {}
@@ -0,0 +1,52 @@
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def setex(self, key, ttl, value):
+        self.store[key] = value
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+
+    def delete(self, key):
+        self.store.pop(key, None)
+
+    def hincrby(self, key, field, amount):
+        counts = self.store.setdefault(key, {})
+        counts[field] = counts.get(field, 0) + amount
+
+    def hgetall(self, key):
+        return dict(self.store.get(key, {}))
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def rpush(self, key, value):
+        self.commands.append(lambda: self.redis.store.setdefault(key, []).append(value))
+
+    def expire(self, key, ttl):
+        self.commands.append(lambda: True)
+
+    def hincrby(self, key, field, amount):
+        self.commands.append(lambda: self.redis.hincrby(key, field, amount))
+
+    def lrange(self, key, start, end):
+        self.commands.append(lambda: list(self.redis.store.get(key, [])))
+
+    def delete(self, key):
+        self.commands.append(lambda: self.redis.delete(key))
+
+    def execute(self):
+        return [command() for command in self.commands]
@@ -1,13 +1,27 @@
+import asyncio
+import itertools
+import json
 import os
+from datetime import UTC, datetime, timedelta
 
+import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from app.main import app
-from app.db.session import get_db
+from app.api.dependencies import get_async_read_db
+from app.db.session import get_async_db
+from app.db.threaded import threaded_sessionmaker
 from app.models import Base
+from app.services.analysis_writer import AnalysisWriter, get_analysis_writer
+from app.services.leaderboard import ScoreLeaderboard
+from app.services.llm_stream import get_narration_broker
+from app.services.snapshot_archive import SnapshotArchive, archive_expired_snapshots
+from app.tasks import analysis_tasks
+from app.utils.cache import RedisCache, get_redis_cache
 
 
 class FakeAlphaService:
@@ -15,13 +29,30 @@ class FakeAlphaService:
         self.api_key = api_key
 
 
+class FakeBytesRedis:
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def setex(self, key, ttl, value):
+        self.store[key] = value
+
+
 class FakeOrchestrator:
+    history_calls = 0
+
     def __init__(self, alpha_service):
         self.alpha_service = alpha_service
 
     def analyze(self, *args, **kwargs):
         return {
-            "fundamental_analysis": {"overall_score": 7.0},
+            "fundamental_analysis": {
+                "overall_score": 7.0,
+                "raw_series": {"years": [2024, 2023]},
+                "explanations": {"roe": {"meaning": "Return on equity"}},
+            },
             "technical_analysis": {"overall_technical_score": 6.0},
             "combined_analysis": {"overall_score": 6.6},
         }
@@ -29,30 +60,74 @@ class FakeOrchestrator:
     def _build_llm_payload(self, *args, **kwargs):
         return {"symbol": "AAPL", "overall_score": 6.6}
 
+    def fundamental_history(self, symbol, fundamental_basis="annual"):
+        FakeOrchestrator.history_calls += 1
+        return [
+            {"fiscal_year": 2024, "overall_score": 7.5, "category_scores": {"growth": 7.0}, "risk": {"level": "Low", "score": 0}},
+            {"fiscal_year": 2023, "overall_score": 6.5, "category_scores": {"growth": 6.0}, "risk": {"level": "Moderate", "score": 1}},
+        ]
 
-def test_analysis_flow(monkeypatch):
-    os.environ["ALPHA_VANTAGE_API_KEY"] = "test"
 
+class FakeBroker:
+    def __init__(self, messages):
+        self.messages = messages
+
+    async def listen(self, analysis_result_id):
+        yield None
+        for message in self.messages:
+            yield message
+
+
+def _async_sessions(url="sqlite+aiosqlite://"):
+    engine = create_async_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+
+    async def create_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_tables())
+    return async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+
+def _threaded_sessions():
     engine = create_engine(
         "sqlite://",
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
     )
-    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     Base.metadata.create_all(bind=engine)
+    return threaded_sessionmaker(sessionmaker(bind=engine, autoflush=False, expire_on_commit=False))
+
+
+def _use_test_database(url="sqlite+aiosqlite://", threaded=False):
+    # threaded=True is the default production setup: sync sessions run in worker threads.
+    TestingSessionLocal = _threaded_sessions() if threaded else _async_sessions(url)
 
-    def override_get_db():
-        db = TestingSessionLocal()
-        try:
+    async def override_get_async_db():
+        async with TestingSessionLocal() as db:
             yield db
-        finally:
-            db.close()
 
-    app.dependency_overrides[get_db] = override_get_db
+    # Reads and writes share the test database unless a test exercises replica routing.
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_read_db] = override_get_async_db
+    return TestingSessionLocal
+
+
+@pytest.mark.parametrize("threaded", [True, False])
+def test_analysis_flow(monkeypatch, threaded):
+    os.environ["ALPHA_VANTAGE_API_KEY"] = "test"
+
+    _use_test_database(threaded=threaded)
+    monkeypatch.setattr("app.services.analysis_writer.get_leaderboard", lambda: ScoreLeaderboard(None))
+    app.dependency_overrides[get_redis_cache] = lambda: RedisCache(None)
 
     monkeypatch.setattr("app.api.routes.analysis.AlphaVantageService", FakeAlphaService)
     monkeypatch.setattr("app.api.routes.analysis.AnalysisOrchestrator", FakeOrchestrator)
-    monkeypatch.setattr("app.api.routes.analysis.generate_llm_analysis.delay", lambda *args, **kwargs: None)
+    monkeypatch.setattr("app.tasks.llm_tasks.generate_llm_analysis.apply_async", lambda *args, **kwargs: None)
 
     client = TestClient(app)
 
@@ -67,6 +142,410 @@ def test_analysis_flow(monkeypatch):
     assert response.status_code == 200
     data = response.json()
     assert data["combined"] is not None
-    assert data["llm_status"] == "pending"
+    # The template narration is there at once; the model's replaces it later.
+    assert data["llm_status"] == "template"
+    assert data["llm_summary"].startswith("AAPL scores")
+    assert data["llm_ready"] is False
+    assert response.headers["cache-control"] == "no-cache"
+
+    response = client.post("/analysis/?symbol=AAPL&narrator=template")
+    data = client.get(f"/analysis/{response.json()['analysis_id']}").json()
+    assert (data["llm_status"], data["llm_model"], data["llm_ready"]) == ("completed", "template", True)
+
+    response = client.post(
+        f"/analysis/{analysis_id}/reweight",
+        json={"grid": [{"blend": {"fundamental": 1.0, "technical": 0.0}}, {"blend": {"fundamental": 0.0, "technical": 1.0}}]},
+    )
+    assert response.status_code == 200
+    assert len(response.json()["results"]) == 2
+
+    response = client.post(f"/analysis/{analysis_id}/reweight", json={"weights": {"blend": {"unknown": 1.0}}})
+    assert response.status_code == 400
+
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize("threaded", [True, False])
+def test_fundamental_history_is_persisted(monkeypatch, threaded):
+    os.environ["ALPHA_VANTAGE_API_KEY"] = "test"
+
+    _use_test_database(threaded=threaded)
+
+    monkeypatch.setattr("app.api.routes.analysis.AlphaVantageService", FakeAlphaService)
+    monkeypatch.setattr("app.api.routes.analysis.AnalysisOrchestrator", FakeOrchestrator)
+    FakeOrchestrator.history_calls = 0
+
+    client = TestClient(app)
+
+    response = client.get("/analysis/history/aapl")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["symbol"] == "AAPL"
+    assert [p["fiscal_year"] for p in data["periods"]] == [2023, 2024]
+    assert data["periods"][1]["risk_level"] == "Low"
+
+    response = client.get("/analysis/history/AAPL")
+    assert response.status_code == 200
+    assert response.json()["periods"] == data["periods"]
+    assert FakeOrchestrator.history_calls == 1
+
+    # Recomputing over stored periods updates them in place.
+    response = client.get("/analysis/history/AAPL?refresh=true")
+    assert response.status_code == 200
+    assert response.json()["periods"] == data["periods"]
+    assert FakeOrchestrator.history_calls == 2
+
+    app.dependency_overrides.clear()
+
+
+def test_analysis_listing_pagination(monkeypatch):
+    os.environ["ALPHA_VANTAGE_API_KEY"] = "test"
+
+    _use_test_database()
+    monkeypatch.setattr("app.services.analysis_writer.get_leaderboard", lambda: ScoreLeaderboard(None))
+
+    monkeypatch.setattr("app.api.routes.analysis.AlphaVantageService", FakeAlphaService)
+    monkeypatch.setattr("app.api.routes.analysis.AnalysisOrchestrator", FakeOrchestrator)
+
+    client = TestClient(app)
+
+    thread_id = client.post("/analysis/?symbol=AAPL&include_llm=false").json()["thread_id"]
+    created = [client.post(f"/analysis/?symbol=AAPL&include_llm=false&thread_id={thread_id}").json() for _ in range(4)]
+    client.post("/analysis/?symbol=MSFT&include_llm=false")
+
+    response = client.get(f"/analysis/threads/{thread_id}", params={"limit": 2})
+    assert response.status_code == 200
+    page = response.json()
+    assert [item["analysis_id"] for item in page["items"]] == [created[3]["analysis_id"], created[2]["analysis_id"]]
+    assert page["items"][0]["overall_score"] == 6.6
+
+    seen = [item["analysis_id"] for item in page["items"]]
+    while page["next_cursor"]:
+        page = client.get(f"/analysis/threads/{thread_id}", params={"limit": 2, "cursor": page["next_cursor"]}).json()
+        seen.extend(item["analysis_id"] for item in page["items"])
+    assert len(seen) == len(set(seen)) == 5
+
+    response = client.get("/analysis/symbols/aapl", params={"limit": 100})
+    assert len(response.json()["items"]) == 5
+    assert response.json()["next_cursor"] is None
+
+    assert client.get("/analysis/symbols/AAPL", params={"cursor": "not-a-cursor"}).status_code == 400
+
+    app.dependency_overrides.clear()
+
+
+def test_score_history_is_written_with_each_snapshot(monkeypatch):
+    os.environ["ALPHA_VANTAGE_API_KEY"] = "test"
+
+    _use_test_database()
+    monkeypatch.setattr("app.services.analysis_writer.get_leaderboard", lambda: ScoreLeaderboard(None))
+
+    monkeypatch.setattr("app.api.routes.analysis.AlphaVantageService", FakeAlphaService)
+    monkeypatch.setattr("app.api.routes.analysis.AnalysisOrchestrator", FakeOrchestrator)
+
+    client = TestClient(app)
+
+    client.post("/analysis/?symbol=AAPL&include_llm=false")
+    client.post("/analysis/?symbol=AAPL&include_llm=false")
+
+    response = client.get("/analysis/scores/aapl", params={"days": 30})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["symbol"] == "AAPL"
+    assert data["interval"] == "day"
+    assert len(data["points"]) == 1
+    assert data["points"][0]["overall_score"] == 6.6
+    assert "fundamental_category_scores" not in data["points"][0]
+
+    response = client.get("/analysis/scores/AAPL", params={"interval": "month", "include_categories": True})
+    assert response.json()["points"][0]["samples"] == 1
+    assert "technical_category_scores" in response.json()["points"][0]
+
+    assert client.get("/analysis/scores/AAPL", params={"start": "2024-02-01", "end": "2024-01-01"}).status_code == 400
+
+    app.dependency_overrides.clear()
+
+
+def test_final_analysis_is_served_with_etag_and_cached(monkeypatch):
+    os.environ["ALPHA_VANTAGE_API_KEY"] = "test"
+    redis_client = FakeBytesRedis()
+
+    _use_test_database()
+    monkeypatch.setattr("app.services.analysis_writer.get_leaderboard", lambda: ScoreLeaderboard(None))
+    app.dependency_overrides[get_redis_cache] = lambda: RedisCache(redis_client)
+
+    monkeypatch.setattr("app.api.routes.analysis.AlphaVantageService", FakeAlphaService)
+    monkeypatch.setattr("app.api.routes.analysis.AnalysisOrchestrator", FakeOrchestrator)
+    monkeypatch.setattr("app.tasks.llm_tasks.generate_llm_analysis.apply_async", lambda *args, **kwargs: None)
+
+    client = TestClient(app)
+
+    pending_id = client.post("/analysis/?symbol=AAPL").json()["analysis_id"]
+    response = client.get(f"/analysis/{pending_id}")
+    assert response.headers["cache-control"] == "no-cache"
+    assert redis_client.store == {}
+
+    analysis_id = client.post("/analysis/?symbol=AAPL&include_llm=false").json()["analysis_id"]
+    response = client.get(f"/analysis/{analysis_id}")
+    assert response.status_code == 200
+    assert "immutable" in response.headers["cache-control"]
+    etag = response.headers["etag"]
+    assert response.json()["fundamental"]["raw_series"]["years"] == [2024, 2023]
+    assert len(redis_client.store) == 1
+
+    response = client.get(f"/analysis/{analysis_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    response = client.get(f"/analysis/{analysis_id}", params={"fields": "-raw_series,-explanations"})
+    fundamental = response.json()["fundamental"]
+    assert "raw_series" not in fundamental and "explanations" not in fundamental
+    assert fundamental["overall_score"] == 7.0
+    assert response.headers["etag"] != etag
+
+    response = client.get("/analysis/", params={"analysis_id": analysis_id, "fields": "combined,fundamental.overall_score"})
+    assert response.json() == {"combined": {"overall_score": 6.6}, "fundamental": {"overall_score": 7.0}}
+    assert client.get(f"/analysis/{analysis_id}", params={"fields": "nope"}).status_code == 400
+
+    app.dependency_overrides.clear()
+
+
+def test_archived_analysis_is_served_from_parquet(monkeypatch, tmp_path):
+    os.environ["ALPHA_VANTAGE_API_KEY"] = "test"
+    database = tmp_path / "app.db"
+
+    _use_test_database(f"sqlite+aiosqlite:///{database}")
+    monkeypatch.setattr("app.services.analysis_writer.get_leaderboard", lambda: ScoreLeaderboard(None))
+    app.dependency_overrides[get_redis_cache] = lambda: RedisCache(None)
+
+    monkeypatch.setattr("app.api.routes.analysis.AlphaVantageService", FakeAlphaService)
+    monkeypatch.setattr("app.api.routes.analysis.AnalysisOrchestrator", FakeOrchestrator)
+    monkeypatch.setattr("app.services.snapshot_archive._snapshot_archive", SnapshotArchive(str(tmp_path / "archive")))
+
+    client = TestClient(app)
+    first = client.post("/analysis/?symbol=AAPL&include_llm=false").json()
+    live = client.get(f"/analysis/{first['analysis_id']}").json()
+
+    sync_engine = create_engine(f"sqlite:///{database}")
+    stats = archive_expired_snapshots(
+        sessionmaker(bind=sync_engine),
+        retention_days=0,
+        now=datetime.now(UTC) + timedelta(seconds=1),
+    )
+    assert stats["archived"] == 1
+    second = client.post(f"/analysis/?symbol=AAPL&include_llm=false&thread_id={first['thread_id']}").json()
+
+    assert client.get(f"/analysis/{first['analysis_id']}").json() == live
+
+    items = client.get(f"/analysis/threads/{first['thread_id']}").json()["items"]
+    assert [(item["analysis_id"], item["archived"]) for item in items] == [
+        (second["analysis_id"], False),
+        (first["analysis_id"], True),
+    ]
+    assert items[1]["overall_score"] == 6.6
+
+    app.dependency_overrides.clear()
+
+
+def test_reads_go_to_replica_except_right_after_a_write(monkeypatch):
+    os.environ["ALPHA_VANTAGE_API_KEY"] = "test"
+    PrimarySession = _async_sessions()
+    ReplicaSession = _async_sessions()
+
+    async def override_get_async_db():
+        async with PrimarySession() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    monkeypatch.setattr("app.services.analysis_writer.get_leaderboard", lambda: ScoreLeaderboard(None))
+    app.dependency_overrides[get_redis_cache] = lambda: RedisCache(None)
+    monkeypatch.setattr("app.db.session.AsyncSessionLocal", PrimarySession)
+    monkeypatch.setattr("app.db.session.AsyncReplicaSessions", [ReplicaSession])
+    monkeypatch.setattr("app.db.session.DATABASE_REPLICA_URLS", ["sqlite://replica"])
+    monkeypatch.setattr("app.db.session._replica_cycle", itertools.cycle([0]))
+    monkeypatch.setattr("app.api.routes.analysis.AlphaVantageService", FakeAlphaService)
+    monkeypatch.setattr("app.api.routes.analysis.AnalysisOrchestrator", FakeOrchestrator)
+
+    client = TestClient(app)
+
+    response = client.post("/analysis/?symbol=AAPL&include_llm=false")
+    analysis_id = response.json()["analysis_id"]
+    assert "X-Last-Write" in response.headers
+
+    # The writer's cookie pins its next reads to the primary, which already has the row.
+    assert client.get(f"/analysis/{analysis_id}").status_code == 200
+
+    # Without it the read goes to the (empty, lagging) replica.
+    client.cookies.clear()
+    assert client.get(f"/analysis/{analysis_id}").status_code == 404
+    pinned = client.get(f"/analysis/{analysis_id}", headers={"X-Last-Write": response.headers["X-Last-Write"]})
+    assert pinned.status_code == 200
+
+    app.dependency_overrides.clear()
+
+
+def test_reads_fall_back_to_primary_when_replica_is_down(monkeypatch, tmp_path):
+    os.environ["ALPHA_VANTAGE_API_KEY"] = "test"
+    PrimarySession = _async_sessions()
+    unreachable = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    DownReplicaSession = async_sessionmaker(unreachable, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with PrimarySession() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    monkeypatch.setattr("app.services.analysis_writer.get_leaderboard", lambda: ScoreLeaderboard(None))
+    app.dependency_overrides[get_redis_cache] = lambda: RedisCache(None)
+    monkeypatch.setattr("app.db.session.AsyncSessionLocal", PrimarySession)
+    monkeypatch.setattr("app.db.session.AsyncReplicaSessions", [DownReplicaSession])
+    monkeypatch.setattr("app.db.session.DATABASE_REPLICA_URLS", ["sqlite://replica"])
+    monkeypatch.setattr("app.db.session._replica_cycle", itertools.cycle([0]))
+    monkeypatch.setattr("app.api.routes.analysis.AlphaVantageService", FakeAlphaService)
+    monkeypatch.setattr("app.api.routes.analysis.AnalysisOrchestrator", FakeOrchestrator)
+
+    client = TestClient(app)
+    analysis_id = client.post("/analysis/?symbol=AAPL&include_llm=false").json()["analysis_id"]
+
+    # No read-after-write pin, so the read is sent to the replica, fails to connect and lands on the primary.
+    client.cookies.clear()
+    assert client.get(f"/analysis/{analysis_id}").status_code == 200
+
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize("threaded", [True, False])
+def test_narration_stream_relays_partial_text_until_final(monkeypatch, threaded):
+    os.environ["ALPHA_VANTAGE_API_KEY"] = "test"
+
+    sessions = _use_test_database(threaded=threaded)
+    monkeypatch.setattr("app.services.analysis_writer.get_leaderboard", lambda: ScoreLeaderboard(None))
+    app.dependency_overrides[get_narration_broker] = lambda: FakeBroker(
+        [
+            {"status": "streaming", "fields": {"llm_summary": "Apple rev"}, "final": False},
+            {"status": "completed", "fields": {"llm_summary": "Apple revenue grew."}, "final": True},
+            {"status": "completed", "fields": {"llm_summary": "never sent"}, "final": True},
+        ]
+    )
+    monkeypatch.setattr("app.api.routes.analysis.AsyncSessionLocal", sessions)
+    monkeypatch.setattr("app.api.routes.analysis.AlphaVantageService", FakeAlphaService)
+    monkeypatch.setattr("app.api.routes.analysis.AnalysisOrchestrator", FakeOrchestrator)
+    monkeypatch.setattr("app.tasks.llm_tasks.generate_llm_analysis.apply_async", lambda *args, **kwargs: None)
+
+    client = TestClient(app)
+    analysis_id = client.post("/analysis/?symbol=AAPL").json()["analysis_id"]
+
+    response = client.get(f"/analysis/{analysis_id}/stream")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [json.loads(line[len("data: "):]) for line in response.text.splitlines() if line.startswith("data: ")]
+    assert [(event["status"], event["fields"]["llm_summary"]) for event in events] == [
+        ("template", "AAPL scores 6.6 out of 10 overall."),
+        ("streaming", "Apple rev"),
+        ("completed", "Apple revenue grew."),
+    ]
+
+    finished_id = client.post("/analysis/?symbol=AAPL&include_llm=false").json()["analysis_id"]
+    response = client.get(f"/analysis/{finished_id}/stream")
+    assert response.text.count("data: ") == 1
+
+    assert client.get("/analysis/missing/stream").status_code == 404
+
+    app.dependency_overrides.clear()
+
+
+def test_narration_stream_times_out_when_the_row_never_changes(monkeypatch):
+    os.environ["ALPHA_VANTAGE_API_KEY"] = "test"
+
+    class SilentBroker:
+        async def listen(self, analysis_result_id):
+            while True:
+                await asyncio.sleep(0.01)
+                yield None
+
+    sessions = _use_test_database()
+    monkeypatch.setattr("app.services.analysis_writer.get_leaderboard", lambda: ScoreLeaderboard(None))
+    app.dependency_overrides[get_narration_broker] = lambda: SilentBroker()
+    monkeypatch.setattr("app.api.routes.analysis.AsyncSessionLocal", sessions)
+    monkeypatch.setattr("app.api.routes.analysis.AlphaVantageService", FakeAlphaService)
+    monkeypatch.setattr("app.api.routes.analysis.AnalysisOrchestrator", FakeOrchestrator)
+    monkeypatch.setattr("app.tasks.llm_tasks.generate_llm_analysis.apply_async", lambda *args, **kwargs: None)
+    monkeypatch.setattr("app.api.routes.analysis.NARRATION_STREAM_TIMEOUT_SECONDS", 0.1)
+
+    client = TestClient(app)
+    analysis_id = client.post("/analysis/?symbol=AAPL").json()["analysis_id"]
+
+    # The template row stays non-final and no worker ever publishes.
+    response = client.get(f"/analysis/{analysis_id}/stream")
+    events = [json.loads(line[len("data: "):]) for line in response.text.splitlines() if line.startswith("data: ")]
+    assert [event["status"] for event in events] == ["template", "timeout"]
+    assert events[-1]["final"] is True
+    assert events[-1]["fields"] == events[0]["fields"]
+    assert ": keepalive" in response.text
+
+    app.dependency_overrides.clear()
+
+
+def test_watchlist_queues_one_job_that_writes_every_symbol(monkeypatch, tmp_path):
+    os.environ["ALPHA_VANTAGE_API_KEY"] = "test"
+
+    class PartlyFailingOrchestrator(FakeOrchestrator):
+        def analyze(self, symbol, **kwargs):
+            if symbol == "BAD":
+                raise ValueError("no data")
+            return super().analyze()
+
+    database = tmp_path / "watchlist.db"
+    _use_test_database(f"sqlite+aiosqlite:///{database}")
+    published = []
+    writer = AnalysisWriter(
+        session_factory=sessionmaker(bind=create_engine(f"sqlite:///{database}")),
+        publish_scores=published.extend,
+    )
+    app.dependency_overrides[get_analysis_writer] = lambda: writer
+    app.dependency_overrides[get_redis_cache] = lambda: RedisCache(None)
+    jobs = []
+    dispatched = []
+    single = []
+    monkeypatch.setattr("app.api.routes.analysis.dispatch_watchlist_analysis", lambda *args: jobs.append(args) or "job-1")
+    monkeypatch.setattr("app.tasks.analysis_tasks.AlphaVantageService", FakeAlphaService)
+    monkeypatch.setattr("app.tasks.analysis_tasks.AnalysisOrchestrator", PartlyFailingOrchestrator)
+    monkeypatch.setattr("app.tasks.analysis_tasks.get_analysis_writer", lambda: writer)
+    monkeypatch.setattr("app.tasks.analysis_tasks.dispatch_watchlist_narration", dispatched.append)
+    monkeypatch.setattr("app.tasks.llm_tasks.generate_llm_analysis.apply_async", lambda *args, **kwargs: single.append(args))
+
+    client = TestClient(app)
+    response = client.post("/analysis/watchlist", json={"symbols": ["aapl", "MSFT", "BAD", "AAPL"]})
+
+    # The request only queues the job; nothing is analyzed or written on the request path.
+    assert response.status_code == 200
+    body = response.json()
+    assert body["job_id"] == "job-1"
+    assert body["symbols"] == ["AAPL", "MSFT", "BAD"]
+    assert body["status"] == "queued"
+    assert len(jobs) == 1
+    assert client.get(f"/analysis/threads/{body['thread_id']}").json()["items"] == []
+    again = client.post("/analysis/watchlist", json={"symbols": ["NVDA"], "thread_id": body["thread_id"]}).json()
+    assert again["thread_id"] == body["thread_id"]
+
+    result = analysis_tasks.analyze_watchlist.run(*jobs[0])
+    assert result["thread_id"] == body["thread_id"]
+    assert list(result["analyses"]) == ["AAPL", "MSFT"]
+    assert result["failed"] == ["BAD"]
+    # One narration task for the whole watchlist, none per symbol.
+    assert single == []
+    assert len(dispatched) == 1 and len(dispatched[0]) == 2
+    # Scores are ranked only after the batch committed.
+    assert [record["symbol"] for record in published] == ["AAPL", "MSFT"]
+
+    for symbol, analysis_id in result["analyses"].items():
+        data = client.get(f"/analysis/{analysis_id}").json()
+        assert data["llm_status"] == "template"
+    threads = client.get(f"/analysis/threads/{body['thread_id']}").json()
+    assert len(threads["items"]) == 2
+
+    assert client.post("/analysis/watchlist", json={"symbols": []}).status_code == 422
+    assert analysis_tasks.analyze_watchlist.run(body["thread_id"], ["BAD"], None, None)["status"] == "failed"
 
     app.dependency_overrides.clear()
@@ -0,0 +1,30 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.leaderboard import ScoreLeaderboard, get_leaderboard
+from tests.unit.test_leaderboard import FakeSortedSetRedis, _record
+
+
+def test_leaderboard_flow():
+    board = ScoreLeaderboard(FakeSortedSetRedis())
+    _record(board, "AAPL", 8.0, 6.0, 7.2)
+    _record(board, "MSFT", 7.0, 7.0, 7.0)
+    app.dependency_overrides[get_leaderboard] = lambda: board
+
+    client = TestClient(app)
+
+    response = client.get("/leaderboard/overall", params={"limit": 1})
+    assert response.status_code == 200
+    assert response.json()["entries"][0]["symbol"] == "AAPL"
+
+    response = client.get("/leaderboard/overall", params={"order": "bottom"})
+    assert response.json()["entries"][0]["symbol"] == "MSFT"
+
+    response = client.get("/leaderboard/overall/msft")
+    assert response.status_code == 200
+    assert response.json()["rank"] == 2
+
+    assert client.get("/leaderboard/overall/NVDA").status_code == 404
+    assert client.get("/leaderboard/unknown").status_code == 404
+
+    app.dependency_overrides.clear()
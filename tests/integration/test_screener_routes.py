@@ -0,0 +1,25 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.metric_store import MetricStore, get_metric_store
+from tests.unit.test_metric_store import _row
+
+
+def test_screener_flow():
+    store = MetricStore()
+    store.record("AAPL", *_row(0.30, 25, "Low", 8.0))
+    store.record("MSFT", *_row(0.20, 55, "Low", 7.5))
+    app.dependency_overrides[get_metric_store] = lambda: store
+
+    client = TestClient(app)
+
+    response = client.get("/screener/", params={"filter": "roe > 0.15 and rsi < 30", "sort": "-overall_score"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 1
+    assert data["results"][0]["symbol"] == "AAPL"
+
+    response = client.get("/screener/", params={"filter": "unknown > 1"})
+    assert response.status_code == 400
+
+    app.dependency_overrides.clear()
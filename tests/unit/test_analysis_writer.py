@@ -0,0 +1,169 @@
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models import Base
+from app.models.analysis import Analysis
+from app.models.analysis_result import AnalysisResult
+from app.models.thread import Thread
+from app.models.user import User
+from app.services.analysis_writer import AnalysisWriter
+
+
+RESULT = {
+    "fundamental_analysis": {"overall_score": 7.0},
+    "technical_analysis": {"overall_technical_score": 6.0},
+    "combined_analysis": {"overall_score": 6.6, "investment_bias": "Bullish"},
+}
+
+
+def _session_factory():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def _count_statements(engine, needle):
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if needle in statement:
+            statements.append(statement)
+
+    return statements
+
+
+def test_write_uses_one_transaction_and_caches_system_user():
+    engine, TestingSessionLocal = _session_factory()
+    dispatched = []
+    writer = AnalysisWriter(
+        dispatch=lambda result_id, payload: dispatched.append(result_id),
+        publish_scores=lambda records: None,
+    )
+    user_lookups = _count_statements(engine, "WHERE users.email")
+
+    commits = []
+    event.listen(engine, "commit", lambda conn: commits.append(1))
+
+    db = TestingSessionLocal()
+    try:
+        thread_id, new_thread = writer.resolve_thread(db, None)
+        first = writer.build_record(thread_id, new_thread, "aapl", None, None, RESULT, {"symbol": "AAPL"})
+        writer.submit(db, first)
+        assert len(commits) == 1
+
+        thread_id, new_thread = writer.resolve_thread(db, thread_id)
+        assert new_thread is False
+        writer.submit(db, writer.build_record(thread_id, new_thread, "msft", None, None, RESULT))
+        writer.submit(db, writer.build_record(*writer.resolve_thread(db, None), "nvda", None, None, RESULT))
+        assert len(commits) == 3
+
+        assert db.query(User).count() == 1
+        assert db.query(Thread).count() == 2
+        assert db.query(Analysis).filter(Analysis.symbol == "AAPL").one().overall_score == 6.6
+        results = db.query(AnalysisResult).all()
+        assert len(results) == 3
+        assert {r.llm_status for r in results} == {"template", None}
+        assert dispatched == [first["analysis_result_id"]]
+    finally:
+        db.close()
+
+    # Created by the first write, found and cached by the second, never looked up again.
+    assert len(user_lookups) == 2
+
+
+def test_write_behind_buffers_until_batch_is_full():
+    _, TestingSessionLocal = _session_factory()
+    dispatched = []
+    published = []
+    writer = AnalysisWriter(
+        session_factory=TestingSessionLocal,
+        buffer_size=3,
+        flush_interval_seconds=60,
+        dispatch=lambda result_id, payload: dispatched.append(result_id),
+        publish_scores=lambda records: published.extend(record["symbol"] for record in records),
+    )
+
+    db = TestingSessionLocal()
+    try:
+        for symbol in ("AAPL", "MSFT"):
+            writer.submit(db, writer.build_record(*writer.resolve_thread(db, None), symbol, None, None, RESULT, {}))
+        assert writer.pending() == 2
+        assert db.query(Analysis).count() == 0
+        assert dispatched == []
+        # Buffered records are not ranked yet: they may never be committed.
+        assert published == []
+
+        writer.submit(db, writer.build_record(*writer.resolve_thread(db, None), "NVDA", None, None, RESULT, {}))
+        deadline = time.monotonic() + 5
+        while len(dispatched) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert writer.pending() == 0
+        assert db.query(Analysis).count() == 3
+        assert db.query(AnalysisResult).count() == 3
+        assert len(dispatched) == 3
+        assert sorted(published) == ["AAPL", "MSFT", "NVDA"]
+    finally:
+        db.close()
+
+
+def test_write_behind_thread_is_reused_before_it_is_flushed():
+    _, TestingSessionLocal = _session_factory()
+    writer = AnalysisWriter(
+        session_factory=TestingSessionLocal,
+        buffer_size=10,
+        flush_interval_seconds=60,
+        dispatch=lambda result_id, payload: None,
+        publish_scores=lambda records: None,
+    )
+
+    db = TestingSessionLocal()
+    try:
+        thread_id, new_thread = writer.resolve_thread(db, None)
+        writer.submit(db, writer.build_record(thread_id, new_thread, "AAPL", None, None, RESULT))
+
+        # The client re-posts with the id it just got back, before the batch is flushed.
+        assert writer.resolve_thread(db, thread_id) == (thread_id, False)
+        writer.submit(db, writer.build_record(thread_id, False, "MSFT", None, None, RESULT))
+        assert writer.flush() == 2
+
+        assert db.query(Thread).count() == 1
+        assert {a.thread_id for a in db.query(Analysis).all()} == {thread_id}
+        assert writer.resolve_thread(db, thread_id) == (thread_id, False)
+        assert writer.resolve_thread(db, "unknown")[1] is True
+    finally:
+        db.close()
+
+
+def test_write_behind_ranks_only_committed_records():
+    _, TestingSessionLocal = _session_factory()
+    published = []
+    writer = AnalysisWriter(
+        session_factory=TestingSessionLocal,
+        buffer_size=10,
+        flush_interval_seconds=60,
+        dispatch=lambda result_id, payload: None,
+        publish_scores=lambda records: published.extend(record["symbol"] for record in records),
+    )
+
+    db = TestingSessionLocal()
+    try:
+        good = writer.build_record(*writer.resolve_thread(db, None), "AAPL", None, None, RESULT)
+        # Reuses the first record's primary key, so its insert fails.
+        bad = writer.build_record(*writer.resolve_thread(db, None), "MSFT", None, None, RESULT)
+        bad["analysis_id"] = good["analysis_id"]
+        writer.submit(db, good)
+        writer.submit(db, bad)
+        assert writer.flush() == 2
+
+        assert db.query(Analysis).count() == 1
+        assert published == ["AAPL"]
+    finally:
+        db.close()
@@ -0,0 +1,46 @@
+from app.celery_app import (
+    ANALYSIS_QUEUE,
+    BATCH_LLM_QUEUE,
+    INTERACTIVE_LLM_QUEUE,
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    celery_app,
+)
+from app.tasks import llm_tasks
+
+
+def _queue(task_name):
+    return celery_app.amqp.router.route({}, task_name)["queue"].name
+
+
+def test_tasks_are_routed_to_their_queues():
+    assert _queue("generate_llm_analysis") == INTERACTIVE_LLM_QUEUE
+    assert _queue("archive_expired_snapshots") == ANALYSIS_QUEUE
+    assert _queue("some_unrouted_task") == ANALYSIS_QUEUE
+    assert _queue("generate_llm_watchlist") == BATCH_LLM_QUEUE
+    assert _queue("analyze_watchlist") == ANALYSIS_QUEUE
+    assert llm_tasks.generate_llm_analysis.acks_late is True
+    assert llm_tasks.generate_llm_watchlist.acks_late is True
+
+
+def test_dispatch_narration_picks_queue_and_priority(monkeypatch):
+    sent = []
+    monkeypatch.setattr(
+        llm_tasks.generate_llm_analysis,
+        "apply_async",
+        lambda args, kwargs=None, **options: sent.append((args, kwargs, options)),
+    )
+
+    llm_tasks.dispatch_narration("result-1", {"symbol": "AAPL"})
+    llm_tasks.dispatch_narration("result-2", {"symbol": "MSFT"}, batch=True, countdown=300)
+
+    assert sent[0] == (
+        ("result-1", {"symbol": "AAPL"}),
+        None,
+        {"countdown": None, "queue": INTERACTIVE_LLM_QUEUE, "priority": PRIORITY_HIGH},
+    )
+    assert sent[1] == (
+        ("result-2", {"symbol": "MSFT"}),
+        {"batch": True},
+        {"countdown": 300, "queue": BATCH_LLM_QUEUE, "priority": PRIORITY_LOW},
+    )
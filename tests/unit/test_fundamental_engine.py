@@ -1,42 +1,5 @@
 from app.services.fundamental_engine import FundamentalEngine
-
-
-def _fundamental_strong():
-    return {
-        "overview": {"PERatio": "18.5", "EVToEBITDA": "10.2"},
-        "income_statement": {
-            "annualReports": [
-                {"fiscalDateEnding": "2024-12-31", "totalRevenue": "120000", "netIncome": "18000", "operatingIncome": "22000", "ebit": "21000", "interestExpense": "500"},
-                {"fiscalDateEnding": "2023-12-31", "totalRevenue": "110000", "netIncome": "16500", "operatingIncome": "20500", "ebit": "19500", "interestExpense": "600"},
-                {"fiscalDateEnding": "2022-12-31", "totalRevenue": "100000", "netIncome": "15000", "operatingIncome": "19000", "ebit": "18000", "interestExpense": "700"},
-                {"fiscalDateEnding": "2021-12-31", "totalRevenue": "90000", "netIncome": "13000", "operatingIncome": "17000", "ebit": "16000", "interestExpense": "800"},
-            ]
-        },
-        "balance_sheet": {
-            "annualReports": [
-                {"fiscalDateEnding": "2024-12-31", "totalShareholderEquity": "80000", "totalAssets": "150000", "totalLiabilities": "70000", "totalCurrentAssets": "50000", "totalCurrentLiabilities": "25000", "totalDebt": "20000"},
-                {"fiscalDateEnding": "2023-12-31", "totalShareholderEquity": "76000", "totalAssets": "140000", "totalLiabilities": "64000", "totalCurrentAssets": "47000", "totalCurrentLiabilities": "24000", "totalDebt": "21000"},
-                {"fiscalDateEnding": "2022-12-31", "totalShareholderEquity": "72000", "totalAssets": "130000", "totalLiabilities": "58000", "totalCurrentAssets": "45000", "totalCurrentLiabilities": "23000", "totalDebt": "22000"},
-                {"fiscalDateEnding": "2021-12-31", "totalShareholderEquity": "68000", "totalAssets": "120000", "totalLiabilities": "52000", "totalCurrentAssets": "43000", "totalCurrentLiabilities": "22000", "totalDebt": "23000"},
-            ]
-        },
-        "cash_flow": {
-            "annualReports": [
-                {"fiscalDateEnding": "2024-12-31", "operatingCashflow": "24000", "capitalExpenditures": "-5000", "freeCashFlow": "29000"},
-                {"fiscalDateEnding": "2023-12-31", "operatingCashflow": "22000", "capitalExpenditures": "-5000", "freeCashFlow": "27000"},
-                {"fiscalDateEnding": "2022-12-31", "operatingCashflow": "20000", "capitalExpenditures": "-5000", "freeCashFlow": "25000"},
-                {"fiscalDateEnding": "2021-12-31", "operatingCashflow": "18000", "capitalExpenditures": "-4000", "freeCashFlow": "22000"},
-            ]
-        },
-        "earnings": {
-            "annualEarnings": [
-                {"fiscalDateEnding": "2024-12-31", "reportedEPS": "6.20"},
-                {"fiscalDateEnding": "2023-12-31", "reportedEPS": "5.80"},
-                {"fiscalDateEnding": "2022-12-31", "reportedEPS": "5.30"},
-                {"fiscalDateEnding": "2021-12-31", "reportedEPS": "4.90"},
-            ]
-        },
-    }
+from tests.conftest import _fundamental_strong
 
 
 def _fundamental_bad():
@@ -160,3 +123,136 @@ def test_fundamental_neutral_case():
 
     assert result["overall_score"] is not None
     assert 4 <= result["overall_score"] <= 6
+
+
+def _quarterly_reports(fields: dict, quarters: int = 16) -> list:
+    reports = []
+    year, month = 2024, 12
+    for i in range(quarters):
+        row = {"fiscalDateEnding": f"{year}-{month:02d}-{28 if month == 12 else 30}"}
+        for field, (latest, step) in fields.items():
+            row[field] = str(latest - step * i)
+        reports.append(row)
+        month -= 3
+        if month <= 0:
+            month += 12
+            year -= 1
+    return reports
+
+
+def _fundamental_quarterly():
+    data = _fundamental_strong()
+    data["income_statement"]["quarterlyReports"] = _quarterly_reports(
+        {
+            "totalRevenue": (32000, 500),
+            "netIncome": (5000, 100),
+            "operatingIncome": (6000, 100),
+            "ebit": (5800, 100),
+            "interestExpense": (120, 0),
+        }
+    )
+    data["balance_sheet"]["quarterlyReports"] = _quarterly_reports(
+        {
+            "totalShareholderEquity": (82000, 500),
+            "totalAssets": (152000, 1000),
+            "totalLiabilities": (70000, 500),
+            "totalCurrentAssets": (51000, 300),
+            "totalCurrentLiabilities": (25000, 100),
+            "totalDebt": (20000, 0),
+        }
+    )
+    data["cash_flow"]["quarterlyReports"] = _quarterly_reports(
+        {"operatingCashflow": (6500, 100), "capitalExpenditures": (-1200, 0), "freeCashFlow": (7700, 100)}
+    )
+    data["earnings"]["quarterlyEarnings"] = _quarterly_reports({"reportedEPS": (1.7, 0.03)})
+    return data
+
+
+def test_fundamental_ttm_uses_rolling_quarter_sums():
+    data = _fundamental_quarterly()
+    engine = FundamentalEngine(
+        overview=data["overview"],
+        income_statement=data["income_statement"],
+        balance_sheet=data["balance_sheet"],
+        cash_flow=data["cash_flow"],
+        earnings=data["earnings"],
+        basis="ttm",
+    )
+    result = engine.analyze()
+
+    assert result["basis"] == "ttm"
+    revenue = result["raw_series"]["revenue"]
+    assert len(revenue) == 4
+    assert revenue[0] == 32000 + 31500 + 31000 + 30500
+    assert revenue[1] == 30000 + 29500 + 29000 + 28500
+    assert result["raw_series"]["equity"][0] == 82000
+    assert result["metrics"]["roe"]["value"] == (5000 + 4900 + 4800 + 4700) / 82000
+    assert result["metrics"]["revenue_cagr_3y"]["value"] is not None
+
+
+def test_fundamental_ttm_aligns_statements_on_fiscal_date():
+    data = _fundamental_quarterly()
+    # The balance sheet misses the latest quarter and cash flow stops three years back.
+    data["balance_sheet"]["quarterlyReports"] = data["balance_sheet"]["quarterlyReports"][1:]
+    data["cash_flow"]["quarterlyReports"] = data["cash_flow"]["quarterlyReports"][:12]
+    engine = FundamentalEngine(
+        overview=data["overview"],
+        income_statement=data["income_statement"],
+        balance_sheet=data["balance_sheet"],
+        cash_flow=data["cash_flow"],
+        earnings=data["earnings"],
+        basis="ttm",
+    )
+    result = engine.analyze()
+
+    series = result["raw_series"]
+    assert result["basis"] == "ttm"
+    assert len(series["equity"]) == len(series["revenue"]) == len(series["operating_cashflow"]) == 4
+    # A missing quarter stays missing instead of shifting the older quarters forward.
+    assert series["equity"][0] is None
+    assert series["equity"][1] == 82000 - 500 * 4
+    assert series["operating_cashflow"][0] == 6500 + 6400 + 6300 + 6200
+    assert series["operating_cashflow"][3] is None
+
+
+def test_fundamental_ttm_falls_back_to_annual_without_quarters():
+    data = _fundamental_strong()
+    engine = FundamentalEngine(
+        overview=data["overview"],
+        income_statement=data["income_statement"],
+        balance_sheet=data["balance_sheet"],
+        cash_flow=data["cash_flow"],
+        earnings=data["earnings"],
+        basis="ttm",
+    )
+    result = engine.analyze()
+
+    assert result["basis"] == "annual"
+    assert result["raw_series"]["revenue"][0] == 120000
+
+
+def test_fundamental_history_scores_every_period():
+    data = _fundamental_strong()
+    engine = FundamentalEngine(
+        overview=data["overview"],
+        income_statement=data["income_statement"],
+        balance_sheet=data["balance_sheet"],
+        cash_flow=data["cash_flow"],
+        earnings=data["earnings"],
+    )
+    periods = engine.analyze_history()
+
+    assert [p["fiscal_year"] for p in periods] == [2024, 2023, 2022, 2021]
+    valuation = FundamentalEngine.CATEGORY_METRICS["valuation"]
+    latest = FundamentalEngine(
+        overview=data["overview"],
+        income_statement=data["income_statement"],
+        balance_sheet=data["balance_sheet"],
+        cash_flow=data["cash_flow"],
+        earnings=data["earnings"],
+    ).analyze(selected_metrics=[name for name in FundamentalEngine.SCORING_RANGES if name not in valuation])
+    # Every period, the newest included, is scored the same way: without valuation.
+    assert periods[0]["overall_score"] == latest["overall_score"]
+    assert periods[0]["risk"]["level"] == latest["risk"]["level"]
+    assert all(p["category_scores"]["valuation"] is None for p in periods)
+    assert periods[1]["overall_score"] is not None
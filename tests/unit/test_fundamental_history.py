@@ -0,0 +1,43 @@
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models import Base
+from app.models.fundamental_score_period import FundamentalScorePeriod
+from app.services.fundamental_history import fundamental_period_values, upsert_fundamental_periods
+
+
+def _period(year, score):
+    return {
+        "fiscal_year": year,
+        "overall_score": score,
+        "category_scores": {"profitability": score},
+        "risk": {"level": "Low", "score": 1},
+    }
+
+
+def test_concurrent_recomputes_upsert_instead_of_conflicting():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    # Both requests missed the cache and computed the same periods.
+    for score in (6.0, 6.5):
+        with TestingSessionLocal() as db:
+            values = [fundamental_period_values("aapl", "annual", _period(year, score)) for year in (2023, 2024)]
+            upsert_fundamental_periods(db, "aapl", "annual", values)
+            db.commit()
+
+    # A refresh whose statements no longer include 2023 drops that period.
+    with TestingSessionLocal() as db:
+        refreshed = [fundamental_period_values("AAPL", "annual", _period(2024, 7.0))]
+        upsert_fundamental_periods(db, "AAPL", "annual", refreshed)
+        db.commit()
+
+    with TestingSessionLocal() as db:
+        rows = db.scalars(select(FundamentalScorePeriod)).all()
+        assert [(row.symbol, row.fiscal_year, row.overall_score) for row in rows] == [("AAPL", 2024, 7.0)]
@@ -0,0 +1,94 @@
+from app.services.leaderboard import ScoreLeaderboard
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        def _queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+
+        return _queue
+
+    def execute(self):
+        return [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+class FakeSortedSetRedis:
+    def __init__(self):
+        self.sets = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def zadd(self, key, mapping):
+        self.sets.setdefault(key, {}).update(mapping)
+
+    def zrem(self, key, member):
+        self.sets.get(key, {}).pop(member, None)
+
+    def _sorted(self, key, reverse):
+        return sorted(self.sets.get(key, {}).items(), key=lambda item: (item[1], item[0]), reverse=reverse)
+
+    def zrevrange(self, key, start, end, withscores=False):
+        return self._sorted(key, True)[start : end + 1]
+
+    def zrange(self, key, start, end, withscores=False):
+        return self._sorted(key, False)[start : end + 1]
+
+    def zrevrank(self, key, member):
+        members = [m for m, _ in self._sorted(key, True)]
+        return members.index(member) if member in members else None
+
+    def zscore(self, key, member):
+        return self.sets.get(key, {}).get(member)
+
+    def zcard(self, key):
+        return len(self.sets.get(key, {}))
+
+    def zmscore(self, key, members):
+        return [self.sets.get(key, {}).get(m) for m in members]
+
+
+def _record(board, symbol, fundamental, technical, overall):
+    board.record(
+        symbol,
+        {"overall_score": fundamental, "category_scores": {"growth": fundamental}},
+        {"overall_technical_score": technical, "category_scores": {"momentum_score": technical}},
+        {"overall_score": overall},
+    )
+
+
+def test_leaderboard_top_bottom_and_rank():
+    board = ScoreLeaderboard(FakeSortedSetRedis())
+    _record(board, "aapl", 8.0, 6.0, 7.2)
+    _record(board, "MSFT", 7.0, 7.0, 7.0)
+    _record(board, "TSLA", 4.0, 8.0, 5.6)
+
+    top = board.top("overall", limit=2)
+    assert [e["symbol"] for e in top] == ["AAPL", "MSFT"]
+    assert top[0]["rank"] == 1
+
+    bottom = board.bottom("technical", limit=1)
+    assert bottom[0]["symbol"] == "AAPL"
+
+    rank = board.rank("momentum", "tsla")
+    assert rank == {"symbol": "TSLA", "rank": 1, "score": 8.0, "total": 3}
+    assert board.rank("overall", "NVDA") is None
+
+
+def test_leaderboard_watchlist_and_removal():
+    board = ScoreLeaderboard(FakeSortedSetRedis())
+    _record(board, "AAPL", 8.0, 6.0, 7.2)
+    _record(board, "MSFT", 7.0, 7.0, 7.0)
+    _record(board, "TSLA", 4.0, 8.0, 5.6)
+
+    watchlist = board.top("overall", symbols=["tsla", "msft", "nvda"])
+    assert [e["symbol"] for e in watchlist] == ["MSFT", "TSLA"]
+
+    board.record("AAPL", None, {"overall_technical_score": 6.0}, {"overall_score": 6.0})
+    assert board.rank("fundamental", "AAPL") is None
+    assert board.rank("overall", "AAPL")["score"] == 6.0
@@ -1,6 +1,15 @@
 import json
 
-from app.services.interpretation_engine import InterpretationEngine
+import pytest
+
+from app.services.interpretation_engine import (
+    NARRATION_SCHEMA,
+    InterpretationEngine,
+    NarrationOutputError,
+    match_narrations,
+    parse_narration_list,
+)
+from app.services.narration_prompt import SYSTEM_PROMPT
 
 
 class FakeResponse:
@@ -41,18 +50,97 @@ def test_llm_parsing_success(monkeypatch):
     assert result["parsed"]["confidence"] == "Medium"
 
 
-def test_llm_parsing_failure(monkeypatch):
-    mock_output = {"response": "not-json"}
+def test_llm_output_is_repaired_before_any_retry(monkeypatch):
+    fenced = "Here you go:\n```json\n" + json.dumps(
+        {
+            "Executive Summary": "Test",
+            "bull_case": "Test",
+            "bear_case": "Test",
+            "risk_assessment": "Test",
+            "confidence": "high",
+        }
+    )[:-1] + ",}\n```"
+    requests_sent = []
 
     def fake_post(*args, **kwargs):
-        return FakeResponse(mock_output)
+        requests_sent.append(kwargs["json"])
+        return FakeResponse({"response": fenced, "prompt_eval_count": 300, "eval_count": 80})
 
     monkeypatch.setattr("requests.post", fake_post)
 
     engine = InterpretationEngine()
     result = engine.generate({"symbol": "TEST", "overall_score": 6.5})
 
-    assert result["parsed"] == {}
+    assert len(requests_sent) == 1
+    assert requests_sent[0]["format"] == NARRATION_SCHEMA
+    assert requests_sent[0]["system"] == SYSTEM_PROMPT
+    assert requests_sent[0]["prompt"] == "Data:\noverall_score=6.5; symbol=TEST"
+    assert requests_sent[0]["keep_alive"] == "30m"
+    assert result["repaired"] is True
+    assert result["parsed"]["executive_summary"] == "Test"
+    assert result["parsed"]["confidence"] == "High"
+    assert result["usage"]["completion_tokens"] == 80
+    assert result["wasted"]["generations"] == 0
+
+
+def test_llm_retries_once_with_a_shorter_prompt(monkeypatch):
+    valid = json.dumps(
+        {
+            "executive_summary": "Retry",
+            "bull_case": "Retry",
+            "bear_case": "Retry",
+            "risk_assessment": "Retry",
+            "confidence": "Low",
+        }
+    )
+    outputs = [
+        {"response": '{"executive_summary": "cut off', "prompt_eval_count": 300, "eval_count": 120, "total_duration": 2_500_000_000},
+        {
+            "response": valid,
+            "prompt_eval_count": 150,
+            "eval_count": 90,
+            "prompt_eval_duration": 400_000_000,
+            "eval_duration": 1_100_000_000,
+        },
+    ]
+    prompts = []
+
+    def fake_post(*args, **kwargs):
+        prompts.append(kwargs["json"]["system"] + kwargs["json"]["prompt"])
+        return FakeResponse(outputs[len(prompts) - 1])
+
+    monkeypatch.setattr("requests.post", fake_post)
+
+    result = InterpretationEngine().generate({"symbol": "TEST", "overall_score": 6.5})
+
+    assert len(prompts) == 2
+    assert len(prompts[1]) < len(prompts[0])
+    assert result["attempts"] == 2
+    assert result["parsed"]["executive_summary"] == "Retry"
+    assert result["wasted"] == {"generations": 1, "tokens": 420, "seconds": 2.5}
+    # Usage covers both calls, so the cost of the discarded attempt stays visible.
+    assert result["usage"]["prompt_tokens"] == 450
+    assert result["usage"]["completion_tokens"] == 210
+    assert result["usage"]["prompt_eval_seconds"] == 0.4
+    assert result["usage"]["eval_seconds"] == 1.1
+
+
+def test_llm_parsing_failure(monkeypatch):
+    calls = {"count": 0}
+
+    def fake_post(*args, **kwargs):
+        calls["count"] += 1
+        return FakeResponse({"response": "not-json", "prompt_eval_count": 100, "eval_count": 10})
+
+    monkeypatch.setattr("requests.post", fake_post)
+
+    engine = InterpretationEngine()
+    with pytest.raises(NarrationOutputError) as excinfo:
+        engine.generate({"symbol": "TEST", "overall_score": 6.5})
+
+    assert calls["count"] == 2
+    assert excinfo.value.wasted["generations"] == 2
+    assert excinfo.value.wasted["tokens"] == 220
 
 
 def test_llm_fallback_model(monkeypatch):
@@ -105,3 +193,55 @@ def test_llm_fallback_model(monkeypatch):
     result = engine.generate({"symbol": "TEST", "overall_score": 6.5})
 
     assert result["parsed"]["executive_summary"] == "OK"
+
+
+def test_batch_answer_is_matched_by_symbol(monkeypatch):
+    def item(symbol, confidence="Medium"):
+        return {
+            "symbol": symbol,
+            "executive_summary": f"{symbol} summary",
+            "bull_case": "Bull",
+            "bear_case": "Bear",
+            "risk_assessment": "Risk",
+            "confidence": confidence,
+        }
+
+    # Out of order, wrapped in an object, and one item with an invalid confidence.
+    answer = {"narrations": [item("MSFT"), item("AAPL"), item("NVDA", confidence="Sure")]}
+    requests_sent = []
+
+    def fake_post(*args, **kwargs):
+        requests_sent.append(kwargs["json"])
+        return FakeResponse({"response": json.dumps(answer), "prompt_eval_count": 300, "eval_count": 200})
+
+    monkeypatch.setattr("requests.post", fake_post)
+
+    payloads = [{"symbol": "AAPL"}, {"symbol": "MSFT"}, {"symbol": "NVDA"}, {"symbol": "TSLA"}]
+    result = InterpretationEngine().generate_batch(payloads)
+
+    assert len(requests_sent) == 1
+    assert "[AAPL]" in requests_sent[0]["prompt"] and "[TSLA]" in requests_sent[0]["prompt"]
+    assert [narration and narration["executive_summary"] for narration in result["narrations"]] == [
+        "AAPL summary",
+        "MSFT summary",
+        None,
+        None,
+    ]
+    assert "symbol" not in result["narrations"][0]
+    assert result["usage"]["completion_tokens"] == 200
+
+
+def test_untagged_batch_items_fall_back_to_position():
+    narration = {
+        "executive_summary": "Summary",
+        "bull_case": "Bull",
+        "bear_case": "Bear",
+        "risk_assessment": "Risk",
+        "confidence": "low",
+    }
+    payloads = [{"symbol": "AAPL"}, {"symbol": "MSFT"}]
+
+    assert parse_narration_list("```json\n[" + json.dumps(narration) + ",]\n```") == [narration]
+    assert match_narrations(payloads, [narration, narration])[1]["confidence"] == "Low"
+    # With a missing item, position says nothing about which symbol it belongs to.
+    assert match_narrations(payloads, [narration]) == [None, None]
@@ -0,0 +1,78 @@
+import json
+from datetime import UTC, datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models import Base
+from app.models.analysis_result import AnalysisResult
+from app.services.llm_stream import partial_fields
+from app.services import narration_sink
+from app.tasks import llm_tasks
+
+
+def test_partial_fields_track_every_prefix():
+    document = json.dumps(
+        {
+            "executive_summary": 'Margins "held" at 41%\nGrowth: é 📈',
+            "bull_case": "Services",
+            "score": 7.5,
+            "tags": ["a", "b,c"],
+            "confidence": "High",
+        },
+        indent=2,
+    )
+    final = json.loads(document)
+
+    for end in range(len(document) + 1):
+        fields = partial_fields(document[:end])
+        for key, value in fields.items():
+            assert final[key].startswith(value), (end, key, value)
+
+    assert partial_fields(document) == {k: v for k, v in final.items() if isinstance(v, str)}
+    assert partial_fields('{"executive_summary": "Apple rev') == {"executive_summary": "Apple rev"}
+    assert partial_fields("not json yet") == {}
+
+
+def test_streaming_task_persists_partial_text(monkeypatch):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with TestingSessionLocal() as db:
+        db.add(AnalysisResult(id="result-1", analysis_id="analysis-1", llm_status="pending", created_at=datetime.now(UTC)))
+        db.commit()
+
+    published = []
+    seen_mid_stream = []
+
+    def fake_generate(_payload, on_partial=None):
+        on_partial({"executive_summary": "Apple rev"})
+        with TestingSessionLocal() as db:
+            row = db.get(AnalysisResult, "result-1")
+            seen_mid_stream.append((row.llm_status, row.llm_summary))
+        return {"model_used": "test-model", "parsed": {"executive_summary": "Apple revenue grew.", "confidence": "High"}}
+
+    monkeypatch.setenv("LLM_STREAM_PERSIST_SECONDS", "0")
+    monkeypatch.setattr(llm_tasks, "LLM_STREAMING", True)
+    monkeypatch.setattr(llm_tasks, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(llm_tasks, "get_redis_client", lambda: None)
+    monkeypatch.setattr(llm_tasks, "_narration_sink", None)
+    monkeypatch.setattr(llm_tasks.InterpretationEngine, "generate", staticmethod(fake_generate))
+    def fake_publish(client, result_id, status, fields, final=False):
+        published.append((status, fields["llm_summary"], final))
+
+    monkeypatch.setattr(llm_tasks, "publish_narration", fake_publish)
+    monkeypatch.setattr(narration_sink, "publish_narration", fake_publish)
+
+    assert llm_tasks.generate_llm_analysis("result-1", {"symbol": "TEST"})["status"] == "completed"
+
+    assert seen_mid_stream == [("streaming", "Apple rev")]
+    assert published == [("streaming", "Apple rev", False), ("completed", "Apple revenue grew.", True)]
+    with TestingSessionLocal() as db:
+        row = db.get(AnalysisResult, "result-1")
+        assert (row.llm_status, row.llm_summary, row.llm_confidence) == ("completed", "Apple revenue grew.", "High")
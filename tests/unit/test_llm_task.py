@@ -18,7 +18,7 @@ def test_llm_task_updates_db(monkeypatch):
     TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     Base.metadata.create_all(bind=engine)
 
-    def fake_generate(_payload):
+    def fake_generate(_payload, on_partial=None):
         return {
             "model_used": "test-model",
             "parsed": {
@@ -0,0 +1,142 @@
+from datetime import UTC, datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models import Base
+from app.models.analysis_result import AnalysisResult
+from app.services.narration_cache import NarrationCache, canonicalize_payload, narration_key
+from app.tasks import llm_tasks
+from tests.fakes import FakeRedis
+
+
+PAYLOAD = {"symbol": "AAPL", "overall_score": 6.6}
+NARRATION = {
+    "model_used": "test-model",
+    "parsed": {"executive_summary": "Summary", "confidence": "Medium"},
+}
+
+
+def _setup(monkeypatch, *result_ids):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with TestingSessionLocal() as db:
+        for result_id in result_ids:
+            db.add(
+                AnalysisResult(
+                    id=result_id,
+                    analysis_id=f"analysis-{result_id}",
+                    llm_status="pending",
+                    created_at=datetime.now(UTC),
+                )
+            )
+        db.commit()
+
+    cache = NarrationCache(FakeRedis())
+    calls = []
+    rechecks = []
+
+    def fake_generate(payload, on_partial=None):
+        calls.append(payload)
+        return NARRATION
+
+    monkeypatch.setattr(llm_tasks, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(llm_tasks, "get_narration_cache", lambda: cache)
+    monkeypatch.setattr(llm_tasks.InterpretationEngine, "generate", staticmethod(fake_generate))
+    monkeypatch.setattr(
+        llm_tasks.generate_llm_analysis, "apply_async", lambda args, kwargs=None, **options: rechecks.append(args)
+    )
+    return TestingSessionLocal, cache, calls, rechecks
+
+
+def _statuses(session_factory):
+    with session_factory() as db:
+        return {row.id: (row.llm_status, row.llm_summary) for row in db.query(AnalysisResult).all()}
+
+
+def test_cache_hit_completes_without_model_call(monkeypatch):
+    session_factory, cache, calls, _ = _setup(monkeypatch, "result-1")
+    cache.set(narration_key(canonicalize_payload(PAYLOAD)), NARRATION)
+
+    outcome = llm_tasks.generate_llm_analysis("result-1", PAYLOAD)
+
+    assert outcome["source"] == "cache"
+    assert calls == []
+    assert _statuses(session_factory) == {"result-1": ("completed", "Summary")}
+
+
+def test_identical_in_flight_payloads_share_one_generation(monkeypatch):
+    session_factory, cache, calls, rechecks = _setup(monkeypatch, "result-1", "result-2")
+    key = narration_key(canonicalize_payload(PAYLOAD))
+
+    # result-1 is mid-generation on another worker when result-2 arrives.
+    assert cache.claim(key)
+    assert llm_tasks.generate_llm_analysis("result-2", PAYLOAD) == {"status": "coalesced"}
+    assert rechecks == [("result-2", PAYLOAD)]
+    cache.release(key)
+
+    outcome = llm_tasks.generate_llm_analysis("result-1", PAYLOAD)
+
+    assert outcome == {"status": "completed", "source": "model", "rows": 2}
+    assert len(calls) == 1
+    assert _statuses(session_factory) == {
+        "result-1": ("completed", "Summary"),
+        "result-2": ("completed", "Summary"),
+    }
+    # The scheduled re-check finds the row already filled and does nothing.
+    assert llm_tasks.generate_llm_analysis(*rechecks[0]) == {"status": "skipped"}
+    assert len(calls) == 1
+
+
+def test_burst_of_waiters_schedules_one_recheck_that_fills_every_row(monkeypatch):
+    session_factory, cache, calls, rechecks = _setup(monkeypatch, "result-1", "result-2", "result-3")
+    key = narration_key(canonicalize_payload(PAYLOAD))
+
+    # The leader claims the key and then dies without releasing it.
+    assert cache.claim(key)
+    for result_id in ("result-1", "result-2", "result-3"):
+        assert llm_tasks.generate_llm_analysis(result_id, PAYLOAD) == {"status": "coalesced"}
+    assert rechecks == [("result-1", PAYLOAD)]
+
+    # The claim expires and the single re-check generates for all of them.
+    cache.release(key)
+    assert llm_tasks.generate_llm_analysis(*rechecks[0])["rows"] == 3
+    assert len(calls) == 1
+    assert set(_statuses(session_factory).values()) == {("completed", "Summary")}
+
+
+def test_canonical_payload_reuses_narration_for_small_score_drift(monkeypatch):
+    first = {"symbol": "AAPL", "overall_score": 7.2381, "fundamental": {"top_strengths": ["growth", "profitability"]}}
+    drifted = {"symbol": "AAPL", "overall_score": 7.1102, "fundamental": {"top_strengths": ["growth", "profitability"]}}
+    reranked = {"symbol": "AAPL", "overall_score": 7.2381, "fundamental": {"top_strengths": ["profitability", "growth"]}}
+
+    assert canonicalize_payload(first, step=0.5) == {
+        "symbol": "AAPL",
+        "fundamental": {"top_strengths": ["growth", "profitability"]},
+        "overall_score": 7.0,
+    }
+    assert narration_key(canonicalize_payload(first, 0.5)) == narration_key(canonicalize_payload(drifted, 0.5))
+    assert narration_key(canonicalize_payload(first, 0.01)) != narration_key(canonicalize_payload(drifted, 0.01))
+    # The ranking is part of what gets narrated, so a different order is a different payload.
+    assert canonicalize_payload(reranked, 0.5)["fundamental"]["top_strengths"] == ["profitability", "growth"]
+    assert narration_key(canonicalize_payload(first, 0.5)) != narration_key(canonicalize_payload(reranked, 0.5))
+
+    monkeypatch.setenv("LLM_SCORE_BUCKET", "0.5")
+    _, cache, calls, _ = _setup(monkeypatch, "result-1", "result-2")
+    llm_tasks.generate_llm_analysis("result-1", first)
+    assert llm_tasks.generate_llm_analysis("result-2", drifted)["source"] == "cache"
+    assert len(calls) == 1
+    assert calls[0]["overall_score"] == 7.0
+
+    stats = cache.stats()
+    assert stats["requests"] == 2
+    assert stats["cache_hits"] == 1
+    assert stats["exact_repeats"] == 0
+    assert stats["hit_rate"] == 0.5
+    assert stats["hit_rate_gained"] == 0.5
@@ -6,6 +6,7 @@ from sqlalchemy.pool import StaticPool
 
 from app.models import Base
 from app.models.analysis_result import AnalysisResult
+from app.services.interpretation_engine import NarrationOutputError
 from app.tasks import llm_tasks
 
 
@@ -18,7 +19,7 @@ def test_llm_task_failure_sets_status(monkeypatch):
     TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     Base.metadata.create_all(bind=engine)
 
-    def fake_generate(_payload):
+    def fake_generate(_payload, on_partial=None):
         raise RuntimeError("LLM failed")
 
     monkeypatch.setattr(llm_tasks, "SessionLocal", TestingSessionLocal)
@@ -43,6 +44,67 @@ def test_llm_task_failure_sets_status(monkeypatch):
     try:
         updated = db.query(AnalysisResult).filter(AnalysisResult.id == "result-2").first()
         assert updated.llm_status == "failed"
-        assert updated.llm_summary is None
+        # The template narration stands in for the model's.
+        assert updated.llm_model == "template"
+        assert updated.llm_summary == "TEST has no overall score yet."
     finally:
         db.close()
+
+    monkeypatch.setattr(llm_tasks, "LLM_TEMPLATE_FALLBACK", False)
+    with TestingSessionLocal() as db:
+        db.add(AnalysisResult(id="result-4", analysis_id="analysis-4", created_at=datetime.now(UTC)))
+        db.commit()
+    llm_tasks.generate_llm_analysis("result-4", {"symbol": "TEST"})
+    with TestingSessionLocal() as db:
+        assert db.get(AnalysisResult, "result-4").llm_summary is None
+
+
+def test_llm_task_marks_unusable_output_failed_and_counts_the_waste(monkeypatch):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    recorded = []
+
+    class FakeCache:
+        lock_seconds = 300
+
+        def get(self, key):
+            return None
+
+        def set(self, key, value):
+            raise AssertionError("unusable output must not be cached")
+
+        def claim(self, key):
+            return True
+
+        def drain(self, key):
+            return []
+
+        def release(self, key):
+            pass
+
+        def seen_exact(self, key):
+            return False
+
+        def record(self, **counts):
+            recorded.append(counts)
+
+    def fake_generate(_payload, on_partial=None):
+        raise NarrationOutputError("bad output", {"generations": 2, "tokens": 900, "seconds": 4.2})
+
+    monkeypatch.setattr(llm_tasks, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(llm_tasks, "get_narration_cache", lambda: FakeCache())
+    monkeypatch.setattr(llm_tasks.InterpretationEngine, "generate", staticmethod(fake_generate))
+
+    with TestingSessionLocal() as db:
+        db.add(AnalysisResult(id="result-3", analysis_id="analysis-3", created_at=datetime.now(UTC)))
+        db.commit()
+
+    assert llm_tasks.generate_llm_analysis("result-3", {"symbol": "TEST"})["status"] == "failed"
+    with TestingSessionLocal() as db:
+        assert db.get(AnalysisResult, "result-3").llm_status == "failed"
+    assert {"retries": 1, "wasted_generations": 2, "wasted_tokens": 900, "wasted_ms": 4200, "invalid_outputs": 1} in recorded
@@ -0,0 +1,115 @@
+from datetime import UTC, datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models import Base
+from app.models.analysis_result import AnalysisResult
+from app.services.narration_cache import NarrationCache, canonicalize_payload, narration_key
+from app.tasks import llm_tasks
+from tests.fakes import FakeRedis
+
+
+def _narration(symbol):
+    return {
+        "executive_summary": f"{symbol} summary",
+        "bull_case": "Bull",
+        "bear_case": "Bear",
+        "risk_assessment": "Risk",
+        "confidence": "Medium",
+    }
+
+
+def _setup(monkeypatch, rows, generate_batch):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with TestingSessionLocal() as db:
+        for result_id, status in rows.items():
+            db.add(
+                AnalysisResult(
+                    id=result_id,
+                    analysis_id=f"analysis-{result_id}",
+                    llm_status=status,
+                    created_at=datetime.now(UTC),
+                )
+            )
+        db.commit()
+
+    cache = NarrationCache(FakeRedis())
+    fallbacks = []
+    monkeypatch.setattr(llm_tasks, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(llm_tasks, "get_narration_cache", lambda: cache)
+    monkeypatch.setattr(llm_tasks, "get_redis_client", lambda: None)
+    monkeypatch.setattr(llm_tasks, "_narration_sink", None)
+    monkeypatch.setattr(llm_tasks.InterpretationEngine, "generate_batch", staticmethod(generate_batch))
+    monkeypatch.setattr(
+        llm_tasks.generate_llm_analysis,
+        "apply_async",
+        lambda args, kwargs=None, **options: fallbacks.append((args, kwargs, options["queue"])),
+    )
+    return TestingSessionLocal, cache, fallbacks
+
+
+def _statuses(session_factory):
+    with session_factory() as db:
+        return {row.id: (row.llm_status, row.llm_summary) for row in db.query(AnalysisResult).all()}
+
+
+def test_watchlist_batches_symbols_and_falls_back_per_symbol(monkeypatch):
+    aapl, msft, nvda, tsla = ({"symbol": symbol, "overall_score": 6.6} for symbol in ("AAPL", "MSFT", "NVDA", "TSLA"))
+    batches = []
+
+    def fake_generate_batch(payloads):
+        batches.append([payload["symbol"] for payload in payloads])
+        # The model gets MSFT wrong; it is narrated again on its own.
+        return {
+            "model_used": "test-model",
+            "narrations": [None if payload["symbol"] == "MSFT" else _narration(payload["symbol"]) for payload in payloads],
+            "usage": {"prompt_tokens": 300, "completion_tokens": 200},
+        }
+
+    rows = {"r1": "template", "r2": "template", "r3": "template", "r4": "template", "r5": "template", "r6": "completed"}
+    session_factory, cache, fallbacks = _setup(monkeypatch, rows, fake_generate_batch)
+    monkeypatch.setenv("LLM_BATCH_SYMBOLS", "2")
+    cache.set(narration_key(canonicalize_payload(nvda)), {"model_used": "test-model", "parsed": _narration("NVDA")})
+
+    outcome = llm_tasks.generate_llm_watchlist(
+        [["r1", aapl], ["r2", msft], ["r3", aapl], ["r4", nvda], ["r5", tsla], ["r6", tsla]]
+    )
+
+    # AAPL is generated once for both of its rows, NVDA comes from the cache, r6 is already final.
+    assert batches == [["AAPL", "MSFT"], ["TSLA"]]
+    assert outcome == {"status": "completed", "prompts": 2, "cache_hits": 1, "fallbacks": 1, "skipped": 1, "rows": 4}
+    assert fallbacks == [(("r2", msft), {"batch": True}, "batch-llm")]
+    assert _statuses(session_factory) == {
+        "r1": ("completed", "AAPL summary"),
+        "r2": ("template", None),
+        "r3": ("completed", "AAPL summary"),
+        "r4": ("completed", "NVDA summary"),
+        "r5": ("completed", "TSLA summary"),
+        "r6": ("completed", None),
+    }
+    assert cache.get(narration_key(canonicalize_payload(aapl)))["parsed"] == _narration("AAPL")
+
+    stats = cache.stats()
+    assert (stats["batch_prompts"], stats["batch_symbols"], stats["batch_fallbacks"]) == (2, 3, 1)
+    assert stats["avg_batch_symbols"] == 1.5
+
+
+def test_failed_batch_sends_every_symbol_to_the_single_path(monkeypatch):
+    def failing_generate_batch(payloads):
+        raise TimeoutError("model timed out")
+
+    payloads = [{"symbol": "AAPL", "overall_score": 6.6}, {"symbol": "MSFT", "overall_score": 5.1}]
+    _, _, fallbacks = _setup(monkeypatch, {"r1": "template", "r2": "template"}, failing_generate_batch)
+
+    outcome = llm_tasks.generate_llm_watchlist([["r1", payloads[0]], ["r2", payloads[1]]])
+
+    assert outcome["fallbacks"] == 2
+    assert [args for args, _, _ in fallbacks] == [("r1", payloads[0]), ("r2", payloads[1])]
@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+
+import pytest
+
+from app.services.metric_store import MetricStore
+
+
+def _row(roe, rsi, risk_level, overall):
+    fundamental = {
+        "metrics": {"roe": {"value": roe, "score": roe * 20}},
+        "category_scores": {"profitability": 7.0},
+        "overall_score": overall,
+        "risk": {"level": risk_level, "score": 0},
+    }
+    technical = {
+        "indicators": {
+            "rsi": {"value": rsi, "score": 5.0},
+            "macd": {"value": {"macd": 1.0, "signal": 0.5, "hist": 0.5}, "score": 6.0},
+        },
+        "category_scores": {"momentum_score": 5.5},
+        "overall_technical_score": 5.0,
+        "trend_direction": "Uptrend",
+    }
+    combined = {"overall_score": overall, "investment_bias": "Bullish"}
+    return fundamental, technical, combined
+
+
+def test_metric_store_filter_and_sort():
+    store = MetricStore()
+    store.record("aaa", *_row(0.20, 25, "Low", 7.0))
+    store.record("BBB", *_row(0.25, 28, "Low", 8.0))
+    store.record("CCC", *_row(0.30, 45, "Low", 9.0))
+    store.record("DDD", *_row(0.18, 20, "High", 6.0))
+    store.record("EEE", *_row(0.05, 22, "Low", 5.0))
+
+    result = store.query("roe > 0.15 and rsi < 30 and risk_level == Low", sort="-overall_score")
+
+    assert result["total"] == 2
+    assert [r["symbol"] for r in result["results"]] == ["BBB", "AAA"]
+    assert result["results"][0]["macd_hist"] == 0.5
+    assert result["results"][0]["risk_level"] == "Low"
+
+
+def test_metric_store_upserts_symbol():
+    store = MetricStore()
+    store.record("AAA", *_row(0.20, 25, "Low", 7.0))
+    store.record("AAA", *_row(0.10, 60, "Moderate", 4.0))
+
+    result = store.query(columns=["roe", "risk_level"])
+    assert result["total"] == 1
+    assert result["results"][0] == {"symbol": "AAA", "roe": 0.10, "risk_level": "Moderate"}
+
+
+def test_metric_store_rejects_unknown_column():
+    store = MetricStore()
+    with pytest.raises(ValueError):
+        store.query("not_a_column > 1")
+    with pytest.raises(ValueError):
+        store.query("risk_level > Low")
+
+
+def test_metric_store_save_and_load(tmp_path):
+    path = str(tmp_path / "metrics.npz")
+    store = MetricStore(path=path)
+    store.record("AAA", *_row(0.20, 25, "Low", 7.0))
+    store.save()
+
+    reloaded = MetricStore(path=path)
+    result = reloaded.query("symbol == aaa")
+    assert result["results"][0]["roe"] == 0.20
+    assert result["results"][0]["investment_bias"] == "Bullish"
+
+
+def test_metric_store_saves_from_several_processes_merge(tmp_path):
+    path = str(tmp_path / "metrics.npz")
+    # Two API workers, each with its own in-memory store over the same file.
+    first = MetricStore(path=path, save_interval_seconds=0)
+    second = MetricStore(path=path, save_interval_seconds=0)
+    first.record("AAA", *_row(0.20, 25, "Low", 7.0))
+    second.record("BBB", *_row(0.25, 28, "Low", 8.0))
+    first.record("BBB", *_row(0.10, 60, "High", 4.0))
+    second.record("BBB", *_row(0.30, 40, "Low", 9.0))
+    first.save()
+    second.save()
+
+    reloaded = MetricStore(path=path)
+    result = reloaded.query(sort="symbol", columns=["roe"])
+    # Nothing the other process saved is lost, and the newest row for a symbol wins.
+    assert result["results"] == [{"symbol": "AAA", "roe": 0.20}, {"symbol": "BBB", "roe": 0.30}]
+    # The first process picks up the other's rows on its next query.
+    assert first.query("symbol == bbb", columns=["roe"])["results"] == [{"symbol": "BBB", "roe": 0.30}]
+
+
+def test_metric_store_saves_in_the_background(tmp_path, monkeypatch):
+    path = str(tmp_path / "metrics.npz")
+    store = MetricStore(path=path, save_interval_seconds=0.05)
+    saved_by = []
+    save = store.save
+    monkeypatch.setattr(store, "save", lambda: (saved_by.append(threading.current_thread().name), save()))
+
+    store.record("AAA", *_row(0.20, 25, "Low", 7.0))
+    # record() returns before the interval is up; the saver thread writes the file afterwards.
+    assert saved_by == []
+    deadline = time.monotonic() + 5
+    while not os.path.exists(path) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert saved_by == ["metric-store-saver"]
+    assert MetricStore(path=path).query("symbol == aaa")["total"] == 1
+
+
+def test_metric_store_query_over_10k_symbols():
+    store = MetricStore()
+    for i in range(10_000):
+        store.record(f"S{i}", *_row((i % 40) / 100, i % 100, "Low" if i % 3 else "High", (i % 97) / 10))
+
+    start = time.perf_counter()
+    result = store.query("roe > 0.15 and rsi < 30 and risk_level == Low", sort="-overall_score", limit=50)
+    elapsed = time.perf_counter() - start
+
+    assert result["total"] > 0
+    scores = [r["overall_score"] for r in result["results"]]
+    assert scores == sorted(scores, reverse=True)
+    assert elapsed < 0.5
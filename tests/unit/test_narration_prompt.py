@@ -0,0 +1,78 @@
+from app.services.narration_prompt import (
+    BATCH_SYSTEM_PROMPT,
+    SYSTEM_PROMPT,
+    build_batch_prompt,
+    build_prompt,
+    compact_data,
+    estimate_tokens,
+)
+
+
+PAYLOAD = {
+    "symbol": "AAPL",
+    "overall_score": 7.0,
+    "fundamental_score": 7.5,
+    "technical_score": 6.25,
+    "fundamental": {
+        "profitability": 8.0,
+        "growth": 6.5,
+        "financial_strength": None,
+        "valuation": 4.333333,
+        "risk_level": "Moderate",
+        "top_strengths": ["growth", "profitability"],
+        "weaknesses": ["valuation"],
+    },
+    "technical": {
+        "trend_direction": "Uptrend",
+        "momentum_strength": "Strong",
+        "volatility": "Low",
+        "entry_signal": None,
+    },
+}
+
+
+def test_compact_data_is_deterministic_and_smaller_than_repr():
+    text = compact_data(PAYLOAD, token_budget=1000)
+
+    assert text.splitlines() == [
+        "fundamental_score=7.5; overall_score=7; symbol=AAPL; technical_score=6.25",
+        "fundamental: growth=6.5; profitability=8; risk_level=Moderate; "
+        "top_strengths=growth,profitability; valuation=4.33; weaknesses=valuation",
+        "technical: momentum_strength=Strong; trend_direction=Uptrend; volatility=Low",
+    ]
+    assert "financial_strength" not in text and "entry_signal" not in text
+    reordered = dict(reversed(list(PAYLOAD.items())))
+    assert compact_data(reordered, token_budget=1000) == text
+    assert estimate_tokens(text) < estimate_tokens(f"{PAYLOAD}") * 0.7
+
+
+def test_token_budget_drops_name_lists_before_scores():
+    full = compact_data(PAYLOAD, token_budget=1000)
+    tight = compact_data(PAYLOAD, token_budget=estimate_tokens(full) - 5)
+
+    assert "top_strengths" not in tight
+    assert "overall_score=7" in tight
+    assert compact_data(PAYLOAD, token_budget=0) == "symbol=AAPL"
+
+
+def test_build_prompt_keeps_the_static_prefix_and_respects_the_budget(monkeypatch):
+    monkeypatch.setenv("LLM_PROMPT_TOKEN_BUDGET", str(estimate_tokens(SYSTEM_PROMPT) + 20))
+    system, prompt = build_prompt(PAYLOAD)
+    other_system, _ = build_prompt({**PAYLOAD, "symbol": "MSFT"})
+
+    assert system == other_system == SYSTEM_PROMPT
+    assert estimate_tokens(system) + estimate_tokens(prompt) <= estimate_tokens(SYSTEM_PROMPT) + 20 + 2
+    assert prompt.startswith("Data:\n")
+    assert "symbol=AAPL" in prompt
+
+    retry_system, retry_prompt = build_prompt(PAYLOAD, retry=True)
+    assert len(retry_system) < len(system)
+
+
+def test_batch_prompt_has_one_tagged_block_per_symbol():
+    system, prompt = build_batch_prompt([PAYLOAD, {**PAYLOAD, "symbol": "MSFT"}])
+
+    assert system == BATCH_SYSTEM_PROMPT
+    blocks = prompt.removeprefix("Data:\n").split("\n\n")
+    assert [block.splitlines()[0] for block in blocks] == ["[AAPL]", "[MSFT]"]
+    assert blocks[0].removeprefix("[AAPL]\n") == build_prompt(PAYLOAD)[1].removeprefix("Data:\n")
@@ -0,0 +1,189 @@
+from datetime import UTC, datetime
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models import Base
+from app.models.analysis_result import AnalysisResult
+from app.services.narration_sink import NarrationSink, journal_key, narration_entry
+
+
+class FakeRedis:
+    def __init__(self):
+        self.lists = {}
+        self.sets = {}
+        self.keys = {}
+        self.published = []
+
+    def set(self, key, value, ex=None):
+        self.keys[key] = value
+
+    def exists(self, key):
+        return int(key in self.keys)
+
+    def sadd(self, key, member):
+        self.sets.setdefault(key, set()).add(member)
+
+    def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    def srem(self, key, member):
+        self.sets.get(key, set()).discard(member)
+
+    def rpush(self, key, *values):
+        self.lists.setdefault(key, []).extend(values)
+
+    def lmove(self, source, destination, where_from, where_to):
+        items = self.lists.get(source, [])
+        if not items:
+            return None
+        value = items.pop(0)
+        self.lists.setdefault(destination, []).append(value)
+        return value
+
+    def lrange(self, key, start, end):
+        return list(self.lists.get(key, []))
+
+    def lrem(self, key, count, value):
+        items = self.lists.get(key, [])
+        if value in items:
+            items.remove(value)
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+
+    def pipeline(self):
+        redis = self
+
+        class Pipeline:
+            def __init__(self):
+                self.commands = []
+
+            def lrem(self, key, count, value):
+                self.commands.append(lambda: redis.lrem(key, count, value))
+
+            def execute(self):
+                return [command() for command in self.commands]
+
+        return Pipeline()
+
+
+def _database(*result_ids, status="pending"):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with TestingSessionLocal() as db:
+        for result_id in result_ids:
+            db.add(
+                AnalysisResult(
+                    id=result_id,
+                    analysis_id=f"analysis-{result_id}",
+                    llm_status=status,
+                    created_at=datetime.now(UTC),
+                )
+            )
+        db.commit()
+
+    updates = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_updates(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE"):
+            updates.append(len(parameters) if executemany else 1)
+
+    def write(job):
+        with TestingSessionLocal() as db:
+            value = job(db)
+            db.commit()
+            return value
+
+    return TestingSessionLocal, write, updates
+
+
+def _summaries(session_factory):
+    with session_factory() as db:
+        return {row.id: (row.llm_status, row.llm_summary) for row in db.query(AnalysisResult).all()}
+
+
+def _entry(result_id, summary="Summary"):
+    return narration_entry(result_id, "completed", "test-model", {"llm_summary": summary, "llm_confidence": "Medium"})
+
+
+def test_buffered_narrations_flush_as_one_bulk_update():
+    ids = [f"result-{i}" for i in range(5)]
+    session_factory, write, updates = _database(*ids)
+    redis = FakeRedis()
+    sink = NarrationSink(write, redis, batch_size=100, flush_interval_seconds=60)
+
+    assert sink.submit([_entry(ids[0])]) is None
+    assert sink.submit([_entry(result_id) for result_id in ids[1:]]) is None
+    assert sink.pending() == 5
+    assert len(redis.lists[sink.journal_key]) == 5
+    assert redis.published == []
+    assert all(status == "pending" for status, _ in _summaries(session_factory).values())
+
+    assert sink.flush() == 5
+    assert updates == [5]
+    assert _summaries(session_factory) == {result_id: ("completed", "Summary") for result_id in ids}
+    assert redis.lists[sink.journal_key] == []
+    assert sorted(channel for channel, _ in redis.published) == sorted(f"llm:stream:{result_id}" for result_id in ids)
+
+
+def test_journal_replays_narrations_a_crashed_worker_never_wrote():
+    session_factory, write, _ = _database("result-1", "result-2", "result-3")
+    redis = FakeRedis()
+
+    crashed = NarrationSink(write, redis, batch_size=100, flush_interval_seconds=60, worker_id="crashed")
+    crashed.submit([_entry("result-1"), _entry("result-2")])
+    # The worker dies here: its buffer is gone, the journal is not, and its heartbeat expires.
+    del redis.keys["llm:sink:alive:crashed"]
+    peer = NarrationSink(write, redis, batch_size=100, flush_interval_seconds=60, worker_id="peer")
+    peer.submit([_entry("result-3")])
+
+    replacement = NarrationSink(write, redis, batch_size=100, flush_interval_seconds=60, worker_id="replacement")
+    # Only the dead worker's entries are claimed; the live peer still holds its own.
+    assert replacement.recover() == 2
+    assert redis.lists[journal_key("peer")] != []
+    assert replacement.recover() == 0
+    replacement.flush()
+    assert _summaries(session_factory) == {
+        "result-1": ("completed", "Summary"),
+        "result-2": ("completed", "Summary"),
+        "result-3": ("pending", None),
+    }
+    assert redis.lists[journal_key("crashed")] == redis.lists[replacement.journal_key] == []
+
+    # A second delivery of the same narration is a no-op once the row is final, and is not announced.
+    published = len(redis.published)
+    redis.rpush(journal_key("crashed"), b'{"id":"result-1","status":"failed","model":null,"columns":{},'
+                b'"created_at":"2026-01-01T00:00:00+00:00"}')
+    redis.sadd("llm:sink:journals", "crashed")
+    assert replacement.recover() == 1
+    assert replacement.flush() == 1
+    assert _summaries(session_factory)["result-1"] == ("completed", "Summary")
+    assert len(redis.published) == published
+
+
+def test_duplicate_entries_in_one_flush_update_and_announce_once():
+    session_factory, write, updates = _database("result-1")
+    redis = FakeRedis()
+    sink = NarrationSink(write, redis, batch_size=100, flush_interval_seconds=60)
+
+    sink.submit([_entry("result-1", "Model text")])
+    sink.submit([narration_entry("result-1", "failed", "template", {"llm_summary": "Template text"})])
+    sink.flush()
+
+    assert _summaries(session_factory)["result-1"] == ("completed", "Model text")
+    assert updates == [1]
+    assert len(redis.published) == 1 and b"Model text" in redis.published[0][1]
+
+
+def test_without_redis_narrations_are_written_immediately():
+    session_factory, write, updates = _database("result-1")
+    sink = NarrationSink(write, None, batch_size=100)
+
+    assert sink.submit([_entry("result-1")]) == 1
+    assert sink.pending() == 0
+    assert updates == [1]
+    assert _summaries(session_factory)["result-1"] == ("completed", "Summary")
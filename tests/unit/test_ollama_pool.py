@@ -0,0 +1,251 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services.interpretation_engine import InterpretationEngine
+from app.services.ollama_pool import NoOllamaHostAvailable, OllamaHost, OllamaPool, parse_hosts
+
+
+NARRATION = {
+    "executive_summary": "Summary",
+    "bull_case": "Bull",
+    "bear_case": "Bear",
+    "risk_assessment": "Risk",
+    "confidence": "Medium",
+}
+
+
+class FakeOllama:
+    # A local stand-in for one Ollama host: /api/tags and a slow /api/generate.
+    def __init__(self, models, delay=0.05):
+        self.models = models
+        self.delay = delay
+        self.generate_status = 200
+        self.generated = []
+        self.tags_calls = 0
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                with fake.lock:
+                    fake.tags_calls += 1
+                self._send(200, {"models": [{"name": name} for name in fake.models]})
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if fake.generate_status != 200:
+                    self._send(fake.generate_status, {"error": "generation failed"})
+                    return
+                if request["model"] not in fake.models:
+                    self._send(404, {"error": f"model '{request['model']}' not found"})
+                    return
+                with fake.lock:
+                    fake.active += 1
+                    fake.peak = max(fake.peak, fake.active)
+                time.sleep(fake.delay)
+                with fake.lock:
+                    fake.active -= 1
+                    fake.generated.append(request["model"])
+                text = json.dumps(NARRATION)
+                if not request.get("stream"):
+                    self._send(200, {"response": text})
+                    return
+                # Ollama streams one JSON line per token, then a done marker.
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.end_headers()
+                for start in range(0, len(text), 7):
+                    line = {"response": text[start : start + 7], "done": False}
+                    self.wfile.write(json.dumps(line).encode("utf-8") + b"\n")
+                    self.wfile.flush()
+                self.wfile.write(json.dumps({"response": "", "done": True}).encode("utf-8") + b"\n")
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def _no_model_override(monkeypatch):
+    monkeypatch.delenv("OLLAMA_MODEL", raising=False)
+
+
+@pytest.fixture
+def servers():
+    started = []
+
+    def start(models, delay=0.05):
+        server = FakeOllama(models, delay)
+        started.append(server)
+        return server
+
+    yield start
+    for server in started:
+        server.close()
+
+
+def _run_concurrently(engine, count):
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(engine.generate({"symbol": "TEST"}))) for _ in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_parse_hosts_reads_capacity():
+    hosts = parse_hosts("http://gpu:11434=4, http://cpu:11434/api/generate")
+    assert [(h.url, h.max_concurrency) for h in hosts] == [("http://gpu:11434", 4), ("http://cpu:11434", 1)]
+
+
+def test_requests_spread_within_each_hosts_capacity(servers):
+    gpu = servers(["llama3:8b"])
+    cpu = servers(["llama3:8b"])
+    pool = OllamaPool([OllamaHost(gpu.url, 2), OllamaHost(cpu.url, 1)])
+    engine = InterpretationEngine(model="llama3:8b", pool=pool)
+
+    results = _run_concurrently(engine, 9)
+
+    assert all(result["parsed"]["confidence"] == "Medium" for result in results)
+    assert gpu.peak <= 2 and cpu.peak <= 1
+    assert len(gpu.generated) + len(cpu.generated) == 9
+    assert len(gpu.generated) > len(cpu.generated) > 0
+
+
+def test_missing_model_routes_to_host_that_has_it_without_per_request_tags(servers):
+    without = servers(["mistral:7b"])
+    with_model = servers(["llama3:8b"])
+    pool = OllamaPool([OllamaHost(without.url, 4), OllamaHost(with_model.url, 1)])
+    pool.refresh()
+    engine = InterpretationEngine(model="llama3:8b", pool=pool)
+
+    for _ in range(3):
+        assert engine.generate({"symbol": "TEST"})["model_used"] == "llama3:8b"
+
+    assert with_model.generated == ["llama3:8b"] * 3
+    assert without.generated == []
+    assert without.tags_calls == with_model.tags_calls == 1
+
+
+def test_falls_back_to_available_model_when_no_host_has_it(servers):
+    server = servers(["llama3.1:latest"])
+    pool = OllamaPool([OllamaHost(server.url)])
+    engine = InterpretationEngine(model="missing-model", pool=pool)
+
+    assert engine.generate({"symbol": "TEST"})["model_used"] == "llama3.1:latest"
+    assert engine.model == "missing-model"
+    assert engine.generate({"symbol": "TEST"})["model_used"] == "llama3.1:latest"
+    # The 404 refreshed the inventory once; the second call used the cached list.
+    assert server.tags_calls == 1
+
+
+def test_dead_host_is_ejected(servers):
+    live = servers(["llama3:8b"])
+    dead = OllamaHost("http://127.0.0.1:9", 4)
+    pool = OllamaPool([dead, OllamaHost(live.url, 1)], failure_threshold=1, eject_seconds=60)
+    engine = InterpretationEngine(model="llama3:8b", pool=pool)
+
+    for _ in range(3):
+        assert engine.generate({"symbol": "TEST"})["parsed"]["bull_case"] == "Bull"
+
+    assert len(live.generated) == 3
+    assert pool.snapshot()[0]["healthy"] is False
+
+    pool.hosts = [dead]
+    with pytest.raises(NoOllamaHostAvailable):
+        engine.generate({"symbol": "TEST"})
+
+
+def test_failing_generate_stays_ejected_across_refresh(servers):
+    broken = servers(["llama3:8b"])
+    broken.generate_status = 500
+    live = servers(["llama3:8b"])
+    pool = OllamaPool([OllamaHost(broken.url, 4), OllamaHost(live.url, 1)], failure_threshold=1, eject_seconds=60)
+    engine = InterpretationEngine(model="llama3:8b", pool=pool)
+
+    engine.generate({"symbol": "TEST"})
+    assert pool.snapshot()[0]["healthy"] is False
+
+    # /api/tags still answers, but that does not re-admit a host whose generations fail.
+    pool.refresh()
+    assert pool.snapshot()[0]["healthy"] is False
+    for _ in range(3):
+        engine.generate({"symbol": "TEST"})
+    assert broken.generated == []
+    assert len(live.generated) == 4
+
+
+def test_failed_tags_check_is_lifted_by_the_next_good_one(servers):
+    server = servers(["llama3:8b"])
+    host = OllamaHost(server.url)
+    pool = OllamaPool([host], eject_seconds=60)
+
+    server.close()
+    pool.refresh()
+    assert pool.snapshot()[0]["healthy"] is False
+
+    restarted = servers(["llama3:8b"])
+    host.url = restarted.url
+    pool.refresh()
+    assert pool.snapshot()[0]["healthy"] is True
+
+
+def test_streamed_generation_matches_blocking_output(servers):
+    server = servers(["llama3:8b"], delay=0)
+    pool = OllamaPool([OllamaHost(server.url)])
+    engine = InterpretationEngine(model="llama3:8b", pool=pool)
+    partials = []
+
+    streamed = engine.generate({"symbol": "TEST"}, on_partial=partials.append)
+    blocking = engine.generate({"symbol": "TEST"})
+
+    assert streamed["parsed"] == blocking["parsed"] == NARRATION
+    assert streamed["raw_output"] == blocking["raw_output"]
+    # The summary shows up, partially written, before any later field has started.
+    first = partials[0]
+    assert list(first) == ["executive_summary"]
+    assert NARRATION["executive_summary"].startswith(first["executive_summary"])
+    assert partials[-1] == NARRATION
+    assert pool.snapshot()[0]["in_flight"] == 0
+
+
+def test_consumer_side_exits_do_not_count_against_the_host(servers):
+    server = servers(["llama3:8b"], delay=0)
+    pool = OllamaPool([OllamaHost(server.url)], failure_threshold=1, eject_seconds=60)
+    engine = InterpretationEngine(model="llama3:8b", pool=pool)
+
+    def reject(fields):
+        raise ValueError("subscriber went away")
+
+    with pytest.raises(ValueError):
+        engine.generate({"symbol": "TEST"}, on_partial=reject)
+    pieces = iter(pool.stream("llama3:8b", {"prompt": "narrate"}))
+    next(pieces)
+    pieces.close()
+
+    assert pool.snapshot()[0]["healthy"] is True
+    assert pool.snapshot()[0]["in_flight"] == 0
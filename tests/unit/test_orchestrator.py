@@ -1,51 +1,5 @@
 from app.services.analysis_orchestrator import AnalysisOrchestrator
-from tests.unit.test_fundamental_engine import _fundamental_strong
-from tests.unit.test_technical_engine import _technical_bullish
-
-
-class FakeAlpha:
-    def __init__(self, fundamental: dict, technical: dict):
-        self.fundamental = fundamental
-        self.technical = technical
-
-    def get_overview(self, symbol):
-        return self.fundamental["overview"]
-
-    def get_income_statement(self, symbol):
-        return self.fundamental["income_statement"]
-
-    def get_balance_sheet(self, symbol):
-        return self.fundamental["balance_sheet"]
-
-    def get_cash_flow(self, symbol):
-        return self.fundamental["cash_flow"]
-
-    def get_earnings(self, symbol):
-        return self.fundamental["earnings"]
-
-    def get_daily_series(self, symbol):
-        return self.technical["daily_series"]
-
-    def get_technical_indicator(self, function_name, symbol, interval="daily", extra_params=None):
-        if function_name == "RSI":
-            return self.technical["rsi"]
-        if function_name == "MACD":
-            return self.technical["macd"]
-        if function_name == "SMA":
-            if extra_params and extra_params.get("time_period") == 50:
-                return self.technical["sma_50"]
-            return self.technical["sma_200"]
-        if function_name == "EMA":
-            return self.technical["ema_20"]
-        if function_name == "STOCH":
-            return self.technical["stoch"]
-        if function_name == "OBV":
-            return self.technical["obv"]
-        if function_name == "ATR":
-            return self.technical["atr"]
-        if function_name == "BBANDS":
-            return self.technical["bbands"]
-        return {}
+from tests.conftest import FakeAlpha, _fundamental_strong, _technical_bullish
 
 
 def test_orchestrator_with_mocked_service():
@@ -57,3 +11,19 @@ def test_orchestrator_with_mocked_service():
 
     assert result["combined_analysis"]["overall_score"] is not None
     assert result["fundamental_analysis"]["overall_score"] >= 6.5
+
+
+def test_llm_payload_ranks_categories_on_bucketed_scores(monkeypatch):
+    monkeypatch.setenv("LLM_SCORE_BUCKET", "0.5")
+    orchestrator = AnalysisOrchestrator(alpha_service=None, cache=None, request_delay_seconds=0)
+
+    def payload(profitability, growth):
+        categories = {"profitability": profitability, "growth": growth, "financial_strength": 4.0, "valuation": 2.0}
+        return orchestrator._build_llm_payload("AAPL", {"category_scores": categories}, {}, {"overall_score": 6.0})
+
+    # 7.1 and 7.2 share a bucket, so their run-to-run order must not decide the ranking or the key.
+    first, second = payload(7.1, 7.2), payload(7.2, 7.1)
+    assert first["fundamental"]["top_strengths"] == ["growth", "profitability", "financial_strength"]
+    assert second["fundamental"]["top_strengths"] == first["fundamental"]["top_strengths"]
+    assert second["fundamental"]["weaknesses"] == ["valuation", "financial_strength", "growth"]
+    assert orchestrator._llm_key(first) == orchestrator._llm_key(second)
@@ -0,0 +1,69 @@
+import pytest
+
+from app.services.analysis_orchestrator import AnalysisOrchestrator
+from app.services.fundamental_engine import FundamentalEngine
+from app.services.reweighting import ScoreReweighter
+from tests.unit.test_fundamental_engine import _fundamental_strong
+from tests.unit.test_technical_engine import _build_engine, _technical_bullish
+
+
+def _results():
+    data = _fundamental_strong()
+    fundamental = FundamentalEngine(
+        overview=data["overview"],
+        income_statement=data["income_statement"],
+        balance_sheet=data["balance_sheet"],
+        cash_flow=data["cash_flow"],
+        earnings=data["earnings"],
+    ).analyze()
+    technical = _build_engine(_technical_bullish()).analyze()
+    return fundamental, technical
+
+
+def test_default_weights_reproduce_stored_scores():
+    fundamental, technical = _results()
+    combined = AnalysisOrchestrator(alpha_service=None)._combine_scores(fundamental, technical)
+
+    result = ScoreReweighter(fundamental, technical).evaluate([{}])[0]
+
+    assert result["fundamental"]["overall_score"] == pytest.approx(fundamental["overall_score"])
+    for name, score in fundamental["category_scores"].items():
+        assert result["fundamental"]["category_scores"][name] == pytest.approx(score)
+    assert result["technical"]["overall_technical_score"] == pytest.approx(technical["overall_technical_score"])
+    assert result["combined"]["overall_score"] == pytest.approx(combined["overall_score"])
+    assert result["combined"]["investment_bias"] == combined["investment_bias"]
+    assert result["combined"]["confidence"] == "High"
+
+
+def test_grid_evaluates_each_weight_vector():
+    fundamental, technical = _results()
+    grid = [
+        {"blend": {"fundamental": 1.0, "technical": 0.0}},
+        {"blend": {"fundamental": 0.0, "technical": 1.0}},
+        {"fundamental_categories": {"valuation": 0.0}, "fundamental_metrics": {"roe": 2.0}},
+    ]
+
+    results = ScoreReweighter(fundamental, technical).evaluate(grid)
+
+    assert len(results) == 3
+    assert results[0]["combined"]["overall_score"] == pytest.approx(fundamental["overall_score"])
+    assert results[1]["combined"]["overall_score"] == pytest.approx(technical["overall_technical_score"])
+    profitability = [fundamental["metrics"][m]["score"] for m in ["roe", "roe", "roa", "net_margin", "operating_margin"]]
+    assert results[2]["fundamental"]["category_scores"]["profitability"] == pytest.approx(
+        sum(profitability) / len(profitability)
+    )
+
+
+def test_missing_side_and_invalid_weights():
+    fundamental, _ = _results()
+    reweighter = ScoreReweighter(fundamental, None)
+
+    result = reweighter.evaluate([{}])[0]
+    assert result["technical"]["overall_technical_score"] is None
+    assert result["combined"]["overall_score"] == pytest.approx(fundamental["overall_score"])
+    assert result["combined"]["confidence"] == "Medium"
+
+    with pytest.raises(ValueError):
+        reweighter.evaluate([{"blend": {"sentiment": 1.0}}])
+    with pytest.raises(ValueError):
+        reweighter.evaluate([{"fundamental_categories": {"growth": -1.0}}])
@@ -0,0 +1,80 @@
+from datetime import date, datetime
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models import Base
+from app.models.score_history import ScoreHistory
+from app.services.score_history import choose_interval, downsample, score_history_values, upsert_score_history
+
+
+def _result(overall, bias):
+    return {
+        "combined_analysis": {
+            "overall_score": overall,
+            "fundamental_score": overall - 1,
+            "technical_score": overall + 1,
+            "investment_bias": bias,
+        },
+        "fundamental_analysis": {"category_scores": {"profitability": overall}},
+        "technical_analysis": {"category_scores": {"trend_score": overall}},
+    }
+
+
+def test_upsert_keeps_latest_snapshot_per_day():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    with TestingSessionLocal() as db:
+        upsert_score_history(
+            db,
+            [
+                score_history_values("aapl", "a-1", datetime(2024, 3, 1, 9), _result(5.0, "Neutral")),
+                score_history_values("AAPL", "a-2", datetime(2024, 3, 1, 15), _result(7.0, "Bullish")),
+                score_history_values("AAPL", "a-3", datetime(2024, 3, 2, 9), _result(6.0, "Neutral")),
+            ],
+        )
+        db.commit()
+        # An older snapshot replayed later (e.g. a backfill) must not overwrite the newer row.
+        upsert_score_history(
+            db, [score_history_values("AAPL", "a-0", datetime(2024, 3, 1, 8), _result(1.0, "Bearish"))]
+        )
+        db.commit()
+
+        rows = db.scalars(select(ScoreHistory).order_by(ScoreHistory.as_of_date)).all()
+        assert [(row.as_of_date, row.analysis_id) for row in rows] == [
+            (date(2024, 3, 1), "a-2"),
+            (date(2024, 3, 2), "a-3"),
+        ]
+        assert rows[0].overall_score == 7.0
+        assert rows[0].fundamental_category_scores == {"profitability": 7.0}
+        assert rows[0].investment_bias == "Bullish"
+
+
+def test_downsample_averages_buckets_and_keeps_latest_bias():
+    rows = [
+        {"as_of_date": date(2024, 1, 1), "overall_score": 4.0, "fundamental_score": 3.0,
+         "technical_score": None, "investment_bias": "Neutral"},
+        {"as_of_date": date(2024, 1, 3), "overall_score": 6.0, "fundamental_score": 5.0,
+         "technical_score": 7.0, "investment_bias": "Bullish"},
+        {"as_of_date": date(2024, 1, 8), "overall_score": 8.0, "fundamental_score": None,
+         "technical_score": None, "investment_bias": "Bullish"},
+    ]
+
+    weekly = downsample(rows, "week")
+    assert weekly == [
+        {"date": "2024-01-01", "samples": 2, "overall_score": 5.0, "fundamental_score": 4.0,
+         "technical_score": 7.0, "investment_bias": "Bullish"},
+        {"date": "2024-01-08", "samples": 1, "overall_score": 8.0, "fundamental_score": None,
+         "technical_score": None, "investment_bias": "Bullish"},
+    ]
+    assert [point["date"] for point in downsample(rows, "month")] == ["2024-01-01"]
+    assert choose_interval(date(2024, 1, 1), date(2024, 3, 1)) == "day"
+    assert choose_interval(date(2022, 1, 1), date(2024, 1, 1)) == "week"
+    assert choose_interval(date(2015, 1, 1), date(2024, 1, 1)) == "month"
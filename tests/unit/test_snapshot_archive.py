@@ -0,0 +1,138 @@
+from datetime import datetime
+
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models import Base
+from app.models.analysis import Analysis
+from app.models.analysis_result import AnalysisResult
+from app.models.archived_analysis import ArchivedAnalysis
+from app.models.snapshot_blob import SnapshotBlob
+from app.models.thread import Thread
+from app.models.user import User
+from app.services.snapshot_archive import SnapshotArchive
+from app.services.snapshot_store import store_snapshot_blob
+
+
+SHARED = {"overall_score": 6.0, "metrics": {"roe": {"score": 6.0}}}
+
+
+def _seed(db, analysis_id, created_at, fundamental):
+    db.add(
+        Analysis(
+            id=analysis_id,
+            thread_id="thread-1",
+            symbol="AAPL",
+            overall_score=6.5,
+            selected_fundamentals=["roe"],
+            created_at=created_at,
+        )
+    )
+    db.add(
+        AnalysisResult(
+            id=f"result-{analysis_id}",
+            analysis_id=analysis_id,
+            fundamental_blob_hash=store_snapshot_blob(db, fundamental),
+            technical_blob_hash=store_snapshot_blob(db, {"overall_technical_score": 7.0, "id": analysis_id}),
+            combined_json={
+                "overall_score": 6.5,
+                "fundamental_score": 6.0,
+                "technical_score": 7.0,
+                "investment_bias": "Bullish",
+            },
+            llm_status="completed",
+            llm_summary=f"Summary {analysis_id}",
+            created_at=created_at,
+        )
+    )
+
+
+def test_archive_moves_expired_snapshots_to_parquet(tmp_path):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = TestingSessionLocal()
+    try:
+        db.add(User(id="user-1", email="system@local", hashed_password=""))
+        db.add(Thread(id="thread-1", user_id="user-1"))
+        _seed(db, "old-1", datetime(2023, 1, 5, 10), SHARED)
+        _seed(db, "old-2", datetime(2023, 1, 6, 10), {"overall_score": 4.0})
+        _seed(db, "new-1", datetime(2025, 1, 1, 10), SHARED)
+        db.execute(update(SnapshotBlob).values(last_used_at=datetime(2023, 1, 6, 10)))
+        db.commit()
+    finally:
+        db.close()
+
+    archive = SnapshotArchive(str(tmp_path))
+    stats = archive.archive_before(TestingSessionLocal, datetime(2024, 1, 1), batch_size=1)
+    assert stats["archived"] == 2
+    assert stats["files"] == 2
+    # Only the blobs unique to the archived snapshots go; the shared fundamental stays for new-1.
+    assert stats["blobs_deleted"] == 3
+    assert sorted(p.parent.name for p in tmp_path.rglob("*.parquet")) == ["date=2023-01-05", "date=2023-01-06"]
+
+    db = TestingSessionLocal()
+    try:
+        assert [a.id for a in db.query(Analysis).all()] == ["new-1"]
+        assert db.query(AnalysisResult).count() == 1
+        assert db.query(SnapshotBlob).count() == 2
+
+        pointer = db.get(ArchivedAnalysis, "old-1")
+        assert pointer.symbol == "AAPL"
+        assert pointer.investment_bias == "Bullish"
+        assert pointer.archive_path.startswith("date=2023-01-05/")
+
+        restored = archive.read(pointer)
+        assert restored.fundamental == SHARED
+        assert restored.technical == {"overall_technical_score": 7.0, "id": "old-1"}
+        assert restored.llm_summary == "Summary old-1"
+        assert restored.llm_status == "completed"
+    finally:
+        db.close()
+
+    assert archive.archive_before(TestingSessionLocal, datetime(2024, 1, 1))["archived"] == 0
+
+
+def test_orphan_sweep_spares_recently_used_blobs(tmp_path):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = TestingSessionLocal()
+    try:
+        db.add(User(id="user-1", email="system@local", hashed_password=""))
+        db.add(Thread(id="thread-1", user_id="user-1"))
+        _seed(db, "old-1", datetime(2023, 1, 5, 10), SHARED)
+        db.execute(update(SnapshotBlob).values(last_used_at=datetime(2023, 1, 5, 10)))
+        db.commit()
+        # A writer reusing the shared body touches it before its own result commits.
+        store_snapshot_blob(db, SHARED)
+        db.commit()
+    finally:
+        db.close()
+
+    stats = SnapshotArchive(str(tmp_path)).archive_before(TestingSessionLocal, datetime(2024, 1, 1))
+    assert stats["archived"] == 1
+    assert stats["blobs_deleted"] == 1
+
+    db = TestingSessionLocal()
+    try:
+        assert [blob.payload for blob in db.query(SnapshotBlob).all()] == [SHARED]
+        # A body the sweep already removed is simply stored again.
+        db.query(SnapshotBlob).delete()
+        db.commit()
+        blob_hash = store_snapshot_blob(db, SHARED)
+        db.commit()
+        assert db.get(SnapshotBlob, blob_hash).payload == SHARED
+    finally:
+        db.close()
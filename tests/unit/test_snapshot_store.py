@@ -0,0 +1,91 @@
+from datetime import UTC, datetime
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.migrations import migrate_snapshot_blobs
+from app.models import Base
+from app.models.analysis_result import AnalysisResult
+from app.models.snapshot_blob import SnapshotBlob
+from app.services.snapshot_store import store_snapshot_blob
+
+
+def _engine():
+    return create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+
+
+def test_identical_snapshots_share_one_blob():
+    engine = _engine()
+    Base.metadata.create_all(bind=engine)
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    payload = {"overall_score": 7.0, "explanations": {"roe": {"meaning": "x" * 500}}}
+
+    db = TestingSessionLocal()
+    try:
+        for i in range(3):
+            db.add(
+                AnalysisResult(
+                    id=f"result-{i}",
+                    analysis_id=f"analysis-{i}",
+                    fundamental_blob_hash=store_snapshot_blob(db, dict(reversed(list(payload.items())))),
+                    created_at=datetime.now(UTC),
+                )
+            )
+        db.commit()
+
+        assert db.query(SnapshotBlob).count() == 1
+        blob = db.query(SnapshotBlob).one()
+        assert len(blob.data) < blob.size_bytes
+        row = db.query(AnalysisResult).filter(AnalysisResult.id == "result-2").one()
+        assert row.fundamental == payload
+        assert row.technical is None
+    finally:
+        db.close()
+
+
+def test_migration_converts_legacy_rows():
+    engine = _engine()
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE analysis_results ("
+                "id VARCHAR(36) PRIMARY KEY, analysis_id VARCHAR(36) NOT NULL, fundamental_json JSON, "
+                "technical_json JSON, combined_json JSON, llm_model VARCHAR(100), llm_status VARCHAR(20), "
+                "llm_summary TEXT, llm_bull_case TEXT, llm_bear_case TEXT, llm_risk_assessment TEXT, "
+                "llm_confidence VARCHAR(20), llm_created_at DATETIME, created_at DATETIME NOT NULL)"
+            )
+        )
+        for i in range(5):
+            conn.execute(
+                text(
+                    "INSERT INTO analysis_results (id, analysis_id, fundamental_json, technical_json, created_at) "
+                    "VALUES (:id, :analysis_id, :fundamental, :technical, '2025-01-01 00:00:00')"
+                ),
+                {
+                    "id": f"result-{i}",
+                    "analysis_id": f"analysis-{i}",
+                    "fundamental": '{"overall_score": 7.0}',
+                    "technical": '{"overall_technical_score": %d}' % (i % 2),
+                },
+            )
+
+    converted = migrate_snapshot_blobs(engine, batch_size=2)
+    assert converted == 5
+
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = TestingSessionLocal()
+    try:
+        assert db.query(SnapshotBlob).count() == 3
+        row = db.query(AnalysisResult).filter(AnalysisResult.id == "result-3").one()
+        assert row.fundamental_json is None
+        assert row.fundamental == {"overall_score": 7.0}
+        assert row.technical == {"overall_technical_score": 1}
+    finally:
+        db.close()
+
+    assert migrate_snapshot_blobs(engine) == 0
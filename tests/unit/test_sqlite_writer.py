@@ -0,0 +1,104 @@
+import threading
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+
+from app.db.sqlite import SQLiteWriter, configure_sqlite
+from app.models import Base
+from app.models.user import User
+
+
+def _engine(path, begin_immediate=False):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    configure_sqlite(engine, begin_immediate=begin_immediate)
+    return engine
+
+
+def test_configure_sqlite_applies_pragmas(tmp_path):
+    engine = _engine(tmp_path / "app.db")
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+        assert conn.exec_driver_sql("PRAGMA mmap_size").scalar() > 0
+
+
+def test_writer_serializes_and_batches_concurrent_writes(tmp_path):
+    path = tmp_path / "app.db"
+    reader = _engine(path)
+    Base.metadata.create_all(bind=reader)
+    writer_engine = _engine(path, begin_immediate=True)
+    commits = []
+    event.listen(writer_engine, "commit", lambda conn: commits.append(1))
+    writer = SQLiteWriter(writer_engine)
+
+    def add_user(index):
+        def job(db):
+            if index == 13:
+                raise ValueError("bad row")
+            db.add(User(id=f"user-{index}", email=f"user-{index}@local", hashed_password=""))
+            return index
+
+        return job
+
+    futures = []
+    read_errors = []
+
+    def produce(start):
+        for index in range(start, start + 10):
+            futures.append(writer.submit(add_user(index)))
+
+    def read():
+        try:
+            for _ in range(50):
+                with Session(reader) as db:
+                    db.execute(text("SELECT count(*) FROM users")).scalar()
+        except Exception as exc:
+            read_errors.append(exc)
+
+    threads = [threading.Thread(target=produce, args=(start,)) for start in range(0, 80, 10)]
+    threads += [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    failures = [future for future in futures if future.exception() is not None]
+    assert len(failures) == 1
+    with pytest.raises(ValueError):
+        failures[0].result()
+    assert read_errors == []
+
+    with Session(reader) as db:
+        assert db.query(User).count() == 79
+    # Jobs queued behind each other share commits.
+    assert len(commits) < 80
+    writer.stop()
+
+
+def test_concurrent_callers_share_one_writer(monkeypatch, tmp_path):
+    from app.db import session
+
+    started = []
+
+    class SlowWriter:
+        def __init__(self, engine, max_batch):
+            started.append(self)
+            # Widens the window in which a second caller could also see no writer.
+            threading.Event().wait(0.05)
+
+    monkeypatch.setattr(session, "SQLITE_PRODUCTION", True)
+    monkeypatch.setattr(session, "DATABASE_URL", f"sqlite:///{tmp_path / 'app.db'}")
+    monkeypatch.setattr(session, "SQLiteWriter", SlowWriter)
+    monkeypatch.setattr(session, "_sqlite_writer", None)
+
+    writers = []
+    callers = [threading.Thread(target=lambda: writers.append(session.get_sqlite_writer())) for _ in range(8)]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join()
+
+    assert len(started) == 1
+    assert all(writer is started[0] for writer in writers)
@@ -1,37 +1,5 @@
 from app.services.technical_engine import TechnicalEngine
-
-
-def _technical_bullish():
-    return {
-        "daily_series": {
-            "Time Series (Daily)": {
-                "2025-02-14": {"4. close": "220", "2. high": "225", "3. low": "215", "5. volume": "2000000"},
-                "2025-02-13": {"4. close": "218", "2. high": "222", "3. low": "214", "5. volume": "1500000"},
-                "2025-02-12": {"4. close": "216", "2. high": "220", "3. low": "212", "5. volume": "1400000"},
-                "2025-02-11": {"4. close": "214", "2. high": "218", "3. low": "210", "5. volume": "1350000"},
-                "2025-02-10": {"4. close": "212", "2. high": "216", "3. low": "208", "5. volume": "1300000"}
-            }
-        },
-        "rsi": {"Technical Analysis: RSI": {"2025-02-14": {"RSI": "65"}, "2025-02-13": {"RSI": "62"}}},
-        "macd": {
-            "Technical Analysis: MACD": {
-                "2025-02-14": {"MACD": "1.5", "MACD_Signal": "1.2", "MACD_Hist": "0.3"},
-                "2025-02-13": {"MACD": "1.1", "MACD_Signal": "1.2", "MACD_Hist": "-0.1"}
-            }
-        },
-        "sma_50": {"Technical Analysis: SMA": {"2025-02-14": {"SMA": "210"}, "2025-02-13": {"SMA": "208"}}},
-        "sma_200": {"Technical Analysis: SMA": {"2025-02-14": {"SMA": "190"}, "2025-02-13": {"SMA": "189"}}},
-        "ema_20": {"Technical Analysis: EMA": {"2025-02-14": {"EMA": "214"}, "2025-02-13": {"EMA": "212"}}},
-        "stoch": {"Technical Analysis: STOCH": {"2025-02-14": {"SlowK": "70", "SlowD": "65"}}},
-        "obv": {"Technical Analysis: OBV": {"2025-02-14": {"OBV": "12000000"}, "2025-02-13": {"OBV": "11800000"}}},
-        "atr": {"Technical Analysis: ATR": {"2025-02-14": {"ATR": "3.0"}, "2025-02-13": {"ATR": "2.8"}}},
-        "bbands": {
-            "Technical Analysis: BBANDS": {
-                "2025-02-14": {"Real Upper Band": "230", "Real Lower Band": "200", "Real Middle Band": "215"},
-                "2025-02-13": {"Real Upper Band": "228", "Real Lower Band": "198", "Real Middle Band": "213"}
-            }
-        }
-    }
+from tests.conftest import _technical_bullish
 
 
 def _technical_bearish():
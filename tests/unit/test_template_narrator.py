@@ -0,0 +1,56 @@
+import time
+
+from app.services.interpretation_engine import validate_narration
+from app.services.template_narrator import narrate
+
+
+PAYLOAD = {
+    "symbol": "AAPL",
+    "overall_score": 7.24,
+    "fundamental_score": 7.8,
+    "technical_score": 6.4,
+    "fundamental": {
+        "profitability": 8.9,
+        "growth": 7.1,
+        "financial_strength": 6.0,
+        "valuation": 3.2,
+        "risk_level": "Moderate",
+        "top_strengths": ["profitability", "growth", "financial_strength"],
+        "weaknesses": ["valuation", "financial_strength", "growth"],
+    },
+    "technical": {
+        "trend_direction": "Uptrend",
+        "momentum_strength": "Strong",
+        "volatility": "Low",
+        "entry_signal": "Bullish",
+    },
+}
+
+
+def test_template_narration_reads_the_scores():
+    narration = narrate(PAYLOAD)
+
+    assert narration["executive_summary"] == (
+        "AAPL scores 7.2 out of 10 overall (7.8 fundamental, 6.4 technical). "
+        "The price is in an uptrend with strong momentum. Fundamental risk is moderate."
+    )
+    assert narration["bull_case"].startswith(
+        "The strongest areas are profitability (8.9), growth (7.1), financial strength (6.0)."
+    )
+    assert "entry signal reads bullish" in narration["bull_case"]
+    # A category never appears as both a strength and a weakness.
+    assert narration["bear_case"] == "The weakest areas are valuation (3.2)."
+    assert narration["confidence"] == "High"
+    assert validate_narration(narration) == narration
+
+
+def test_template_narration_handles_missing_data_quickly():
+    narration = narrate({"symbol": "TEST"})
+    assert narration["executive_summary"] == "TEST has no overall score yet."
+    assert narration["bull_case"] == "No category or signal stands out on the upside."
+    assert narration["confidence"] == "Low"
+
+    started = time.perf_counter()
+    for _ in range(1000):
+        narrate(PAYLOAD)
+    assert (time.perf_counter() - started) / 1000 < 0.001
@@ -0,0 +1,31 @@
+import asyncio
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from app.db.threaded import threaded_sessionmaker
+
+
+def test_sessions_waiting_for_a_connection_do_not_starve_the_holder(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'app.db'}",
+        connect_args={"check_same_thread": False},
+        poolclass=QueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=5,
+    )
+    make_session = threaded_sessionmaker(sessionmaker(bind=engine))
+
+    async def read_twice():
+        async with make_session() as db:
+            first = await db.scalar(text("SELECT 1"))
+            # The session keeps its connection here while the others queue for it.
+            await asyncio.sleep(0.01)
+            return first + await db.scalar(text("SELECT 1"))
+
+    async def run():
+        return await asyncio.gather(*(read_twice() for _ in range(16)))
+
+    assert asyncio.run(run()) == [2] * 16